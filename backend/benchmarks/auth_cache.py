@@ -0,0 +1,61 @@
+"""p50/p95 latency of an authenticated request with and without the user cache.
+
+Runs the real app in-process against the configured MongoDB:
+
+    python -m benchmarks.auth_cache --requests 2000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+import httpx
+from benchmarks.common import latency_summary, print_table
+from main import app
+from models.user import user_cache, user_collection
+from utils.auth import create_access_token
+
+
+async def measure(client: httpx.AsyncClient, headers: dict, requests: int, cached: bool) -> list:
+    latencies = []
+    for _ in range(requests):
+        if not cached:
+            user_cache.clear()
+        start = time.perf_counter()
+        response = await client.get("/auth/me", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+async def run(requests: int):
+    result = await user_collection.insert_one({
+        "email": f"bench-{uuid.uuid4().hex}@example.com",
+        "full_name": "Benchmark User",
+        "role": "user",
+        "created_at": datetime.utcnow(),
+        "is_active": True,
+    })
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(result.inserted_id)})}"}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await measure(client, headers, 50, cached=True)  # warm up
+            rows = []
+            for label, cached in (("uncached", False), ("cached", True)):
+                summary = latency_summary(await measure(client, headers, requests, cached))
+                rows.append({"mode": label, **summary})
+            stats = user_cache.stats()
+    finally:
+        await user_collection.delete_one({"_id": result.inserted_id})
+        user_cache.clear()
+
+    print(f"GET /auth/me latency (ms), {requests} sequential requests")
+    print_table(rows, ["mode", "count", "p50", "p95", "p99"])
+    print(f"user cache: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(run(parser.parse_args().requests))
@@ -0,0 +1,76 @@
+"""Query latency of the columnar fleet index over a synthetic fleet, without MongoDB.
+
+    python -m benchmarks.fleet_index --labels 1000000 --stores 500
+"""
+import argparse
+import random
+import time
+from bson import ObjectId
+from benchmarks.common import latency_summary, print_table
+from services.fleet_index import FleetSnapshot
+
+STATUSES = ["active", "active", "active", "inactive", "error"]
+
+
+def build(labels: int, stores: int, rng: random.Random) -> tuple[FleetSnapshot, list]:
+    store_ids = [ObjectId() for _ in range(stores)]
+    docs = [
+        {
+            "_id": ObjectId(),
+            "storeId": rng.choice(store_ids),
+            "status": rng.choice(STATUSES),
+            "batteryLevel": rng.randint(0, 100),
+            "signalStrength": rng.randint(0, 100),
+        }
+        for _ in range(labels)
+    ]
+    start = time.perf_counter()
+    snapshot = FleetSnapshot()
+    for offset in range(0, labels, 10000):
+        snapshot.extend(docs[offset:offset + 10000])
+    print(f"Indexed {labels} labels in {time.perf_counter() - start:.2f}s")
+    return snapshot, store_ids
+
+
+def timed(fn, repeat: int) -> list:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run(labels: int, stores: int, repeat: int, seed: int):
+    rng = random.Random(seed)
+    snapshot, store_ids = build(labels, stores, rng)
+    store_id = store_ids[0]
+    queries = {
+        "battery < 20 in store": lambda: snapshot.mask(store_id, None, 20).nonzero()[0][:100],
+        "battery < 20 fleet-wide": lambda: snapshot.mask(battery_below=20).nonzero()[0][:100],
+        "signal histogram": lambda: snapshot.histogram("signalStrength", snapshot.mask(), 10, False),
+        "signal histogram per store": lambda: snapshot.histogram("signalStrength", snapshot.mask(), 10, True),
+        "worst 100 batteries": lambda: snapshot.describe(snapshot.top("batteryLevel", snapshot.mask(), 100)),
+        "single label update": lambda: snapshot.upsert({
+            "_id": snapshot.ids[rng.randrange(snapshot.size)],
+            "storeId": store_id,
+            "status": "active",
+            "batteryLevel": rng.randint(0, 100),
+            "signalStrength": rng.randint(0, 100),
+        }),
+    }
+    rows = []
+    for name, query in queries.items():
+        summary = latency_summary(timed(query, repeat))
+        rows.append({"query": name, "p50 ms": summary["p50"], "p95 ms": summary["p95"], "p99 ms": summary["p99"]})
+    print_table(rows, ["query", "p50 ms", "p95 ms", "p99 ms"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", type=int, default=1_000_000)
+    parser.add_argument("--stores", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    run(args.labels, args.stores, args.repeat, args.seed)
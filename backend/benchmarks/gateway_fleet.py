@@ -0,0 +1,303 @@
+"""End-to-end load from a simulated gateway fleet: heartbeats, change-feed pulls, label reports and sync logs.
+
+Creates its own stores, products, labels and gateways through the API, runs
+one asyncio task per virtual gateway for ``--duration`` seconds, then deletes
+everything it created. By default the app runs in-process (with its lifespan,
+so the write-behind buffers and background jobs run too) against the
+configured MongoDB; pass ``--url`` to load a running server instead:
+
+    python -m benchmarks.gateway_fleet --stores 20 --gateways-per-store 50 --labels-per-store 1000 --duration 60
+    python -m benchmarks.gateway_fleet --url http://localhost:8000 --failure-rate 0.05
+
+Each virtual gateway owns its store's share of labels and, on its own jittered schedule:
+
+- sends a heartbeat every ``--heartbeat-interval`` seconds
+- pulls ``GET /gateways/{id}/changes`` every ``--poll-interval`` seconds, "transmits" each
+  changed label it owns with ``--radio-latency`` ms latency and ``--failure-rate`` failures,
+  and uploads the outcomes to ``POST /sync-logs/batch``
+- reports its labels' drained batteries and signal with ``PATCH /esls/bulk`` every
+  ``--report-interval`` seconds; readings leave a label's ``changeVersion`` alone, so they
+  do not come back through the change feed
+
+Meanwhile a back office changes ``--price-changes`` product prices per second, which
+reaches the gateways through price propagation and their change feeds.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import Optional
+import httpx
+from benchmarks.common import latency_summary, print_table
+
+CHUNK = 1000
+
+
+class Recorder:
+    """Latency and outcome of every request, keyed by endpoint template."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    async def call(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        if self.recording:
+            self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+            if response is None or response.status_code >= 400:
+                self.errors[endpoint] += 1
+        return response
+
+    def rows(self, duration: float) -> list:
+        rows = []
+        for endpoint in sorted(self.latencies):
+            summary = latency_summary(self.latencies[endpoint])
+            rows.append({
+                "endpoint": endpoint,
+                "requests": summary["count"],
+                "req/s": summary["count"] / duration,
+                "p50 ms": summary["p50"],
+                "p95 ms": summary["p95"],
+                "p99 ms": summary["p99"],
+                "errors": self.errors[endpoint],
+                "error %": 100 * self.errors[endpoint] / summary["count"],
+            })
+        return rows
+
+
+class VirtualGateway:
+    def __init__(self, gateway_id: str, store_name: str, labels: list, args, rng: random.Random):
+        self.id = gateway_id
+        self.store_name = store_name
+        # label id -> [battery, signal]
+        self.labels = {label_id: [rng.randint(40, 100), rng.randint(30, 100)] for label_id in labels}
+        self.args = args
+        self.rng = rng
+        self.checkpoint = "0"
+        self.syncs = 0
+        self.errors = 0
+        self.transmitted = 0
+
+    async def run(self, client: httpx.AsyncClient, recorder: Recorder, stop: asyncio.Event):
+        # Spread the fleet over the first interval so requests do not arrive in waves
+        await asyncio.sleep(self.rng.uniform(0, self.args.poll_interval))
+        loops = [
+            (self.args.heartbeat_interval, self.heartbeat),
+            (self.args.poll_interval, self.pull),
+            (self.args.report_interval, self.report),
+        ]
+        await asyncio.gather(*(self._every(interval, step, client, recorder, stop) for interval, step in loops))
+
+    async def _every(self, interval: float, step, client, recorder, stop: asyncio.Event):
+        await asyncio.sleep(self.rng.uniform(0, interval))
+        while not stop.is_set():
+            await step(client, recorder)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval * self.rng.uniform(0.8, 1.2))
+            except asyncio.TimeoutError:
+                pass
+
+    async def heartbeat(self, client, recorder):
+        body = {"status": "online", "syncCount": self.syncs, "errorCount": self.errors}
+        response = await recorder.call(client, "POST /gateways/{id}/heartbeat", "POST", f"/gateways/{self.id}/heartbeat", json=body)
+        if response is not None and response.status_code < 400:
+            self.syncs = self.errors = 0
+
+    async def pull(self, client, recorder):
+        has_more = True
+        while has_more:
+            response = await recorder.call(
+                client, "GET /gateways/{id}/changes", "GET", f"/gateways/{self.id}/changes",
+                params={"since": self.checkpoint, "limit": self.args.change_batch},
+            )
+            if response is not None and response.status_code == 410:
+                # Away longer than the tombstones are kept; start over
+                self.checkpoint = "0"
+                continue
+            if response is None or response.status_code >= 400:
+                return
+            batch = response.json()
+            # The store's feed covers every gateway of the store; each one drives its own labels
+            await self.transmit(client, recorder, [change for change in batch["changes"] if change["id"] in self.labels])
+            self.checkpoint, has_more = batch["checkpoint"], batch["hasMore"]
+
+    async def transmit(self, client, recorder, changes: list):
+        """Push each changed label over the simulated radio and upload the outcomes."""
+        if not changes:
+            return
+        events = []
+        for change in changes:
+            latency = self.rng.expovariate(1000 / self.args.radio_latency) if self.args.radio_latency else 0.0
+            failed = self.rng.random() < self.args.failure_rate
+            events.append({
+                "eslId": change["id"],
+                "productName": change.get("productName") or "",
+                "gatewayId": self.id,
+                "storeName": self.store_name,
+                "status": "failed" if failed else "success",
+                "syncedAt": datetime.utcnow().isoformat(),
+                "errorMessage": "No acknowledgement from label" if failed else None,
+                "duration": f"{latency:.3f}s",
+            })
+            self.errors += failed
+            self.syncs += not failed
+        # Labels are reached in parallel; the slowest one bounds the round
+        await asyncio.sleep(max(parse(event["duration"]) for event in events))
+        self.transmitted += len(events)
+        await recorder.call(client, "POST /sync-logs/batch", "POST", "/sync-logs/batch", json=events)
+
+    async def report(self, client, recorder):
+        updates = []
+        for label_id, state in self.labels.items():
+            state[0] = max(0, state[0] - self.rng.choice((0, 0, 0, 1)))
+            state[1] = min(100, max(0, state[1] + self.rng.randint(-3, 3)))
+            updates.append({"id": label_id, "batteryLevel": state[0], "signalStrength": state[1]})
+        for start in range(0, len(updates), CHUNK):
+            await recorder.call(client, "PATCH /esls/bulk", "PATCH", "/esls/bulk", json=updates[start:start + CHUNK])
+
+
+def parse(duration: str) -> float:
+    return float(duration.rstrip("s"))
+
+
+async def back_office(client, recorder, products: list, rate: float, stop: asyncio.Event, rng: random.Random):
+    """Change product prices at ``rate`` per second."""
+    if rate <= 0:
+        return
+    while not stop.is_set():
+        product = rng.choice(products)
+        product["sellingPrice"] = round(product["mrp"] * rng.uniform(0.7, 1.0), 2)
+        body = {k: v for k, v in product.items() if k != "id"}
+        await recorder.call(client, "PUT /products/{id}", "PUT", f"/products/{product['id']}", json=body)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=rng.expovariate(rate))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def bulk(client: httpx.AsyncClient, method: str, path: str, items: list) -> list:
+    """Send ``items`` in chunks and return the per-item results; fails loudly, as setup must succeed."""
+    results = []
+    for start in range(0, len(items), CHUNK):
+        response = await client.request(method, path, json=items[start:start + CHUNK])
+        response.raise_for_status()
+        results.extend(response.json()["results"])
+    return results
+
+
+async def setup(client: httpx.AsyncClient, args, tag: str, rng: random.Random) -> dict:
+    created = {"stores": [], "products": [], "esls": [], "gateways": []}
+    products = [
+        {"name": f"{tag} product {i}", "barcode": f"{tag}-{i}", "mrp": 10.0 + i % 90, "discount": 0.0,
+         "sellingPrice": 10.0 + i % 90, "category": "load test"}
+        for i in range(args.products)
+    ]
+    for product, result in zip(products, await bulk(client, "POST", "/products/bulk", products)):
+        product["id"] = result["id"]
+    created["products"] = products
+
+    fleet = []
+    for s in range(args.stores):
+        response = await client.post("/stores/", json={"name": f"{tag} store {s}", "location": "load test", "manager": "load test"})
+        response.raise_for_status()
+        store = response.json()
+        created["stores"].append(store["id"])
+        labels = [
+            {"labelSize": "2.9 inch", "batteryLevel": 100, "signalStrength": 80, "status": "active",
+             "storeId": store["id"], "productId": rng.choice(products)["id"]}
+            for _ in range(args.labels_per_store)
+        ]
+        label_ids = [result["id"] for result in await bulk(client, "POST", "/esls/bulk", labels)]
+        gateways = [
+            {"storeId": store["id"], "ipAddress": f"10.{s % 256}.{g // 256}.{g % 256}", "firmwareVersion": "load-test",
+             "lastHeartbeat": datetime.utcnow().isoformat(), "status": "online", "syncCount": 0, "errorCount": 0, "uptime": "0s"}
+            for g in range(args.gateways_per_store)
+        ]
+        gateway_ids = [result["id"] for result in await bulk(client, "POST", "/gateways/bulk", gateways)]
+        created["esls"].extend(label_ids)
+        created["gateways"].extend(gateway_ids)
+        for g, gateway_id in enumerate(gateway_ids):
+            fleet.append(VirtualGateway(gateway_id, store["name"], label_ids[g::len(gateway_ids)], args, random.Random(rng.random())))
+    created["fleet"] = fleet
+    return created
+
+
+async def teardown(client: httpx.AsyncClient, created: dict):
+    await bulk(client, "DELETE", "/esls/bulk", created["esls"])
+    await bulk(client, "DELETE", "/gateways/bulk", created["gateways"])
+    await bulk(client, "DELETE", "/products/bulk", [product["id"] for product in created["products"]])
+    for store_id in created["stores"]:
+        await client.delete(f"/stores/{store_id}")
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    tag = f"loadtest-{uuid.uuid4().hex[:8]}"
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits))
+        else:
+            from main import app
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60))
+
+        started = time.perf_counter()
+        created = await setup(client, args, tag, rng)
+        fleet = created["fleet"]
+        print(
+            f"Created {len(created['stores'])} stores, {len(created['esls'])} labels and {len(fleet)} gateways "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        recorder = Recorder()
+        stop = asyncio.Event()
+        try:
+            recorder.recording = True
+            tasks = [asyncio.create_task(gateway.run(client, recorder, stop)) for gateway in fleet]
+            tasks.append(asyncio.create_task(back_office(client, recorder, created["products"], args.price_changes, stop, rng)))
+            await asyncio.sleep(args.duration)
+            stop.set()
+            recorder.recording = False
+            await asyncio.gather(*tasks)
+        finally:
+            if not args.keep:
+                await teardown(client, created)
+
+    print(f"{len(fleet)} gateways for {args.duration:.0f}s ({args.url or 'in-process'})")
+    print_table(recorder.rows(args.duration), ["endpoint", "requests", "req/s", "p50 ms", "p95 ms", "p99 ms", "errors", "error %"])
+    transmitted = sum(gateway.transmitted for gateway in fleet)
+    print(f"Labels transmitted by gateways: {transmitted} ({transmitted / args.duration:.1f}/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="load a running server instead of the in-process app")
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--gateways-per-store", type=int, default=20)
+    parser.add_argument("--labels-per-store", type=int, default=500)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--heartbeat-interval", type=float, default=10.0)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--report-interval", type=float, default=30.0)
+    parser.add_argument("--change-batch", type=int, default=500)
+    parser.add_argument("--radio-latency", type=float, default=50.0, help="mean ms to reach a label")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="share of label transmissions that fail")
+    parser.add_argument("--price-changes", type=float, default=2.0, help="product price changes per second")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size with --url")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="leave the generated data in place")
+    # One INFO line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(parser.parse_args()))
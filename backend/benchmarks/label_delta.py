@@ -0,0 +1,75 @@
+"""Bytes per label update and encode time of delta payloads versus full frames.
+
+    python -m benchmarks.label_delta --updates 2000
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from benchmarks.common import latency_summary, print_table
+from services.label_delta import ENCODING_NAMES, apply_delta, encode_delta
+from services.label_renderer import LABEL_SIZES, pack_pixels, render_pixels
+
+
+def price_change(content: dict, rng: random.Random) -> dict:
+    new_price = round(max(0.49, content["sellingPrice"] + rng.choice([-1, 1]) * rng.choice([0.1, 0.5, 1.0])), 2)
+    return dict(content, sellingPrice=new_price)
+
+
+def promotion(content: dict, rng: random.Random) -> dict:
+    discount = rng.choice([0.25, 0.5, 1.0])
+    return dict(content, sellingPrice=round(content["mrp"] - discount, 2), discount=discount)
+
+
+def product_swap(content: dict, rng: random.Random) -> dict:
+    return dict(content, productName=f"Product {rng.randrange(100000)}", sellingPrice=round(rng.uniform(1, 99), 2))
+
+
+SCENARIOS = {"price": price_change, "promotion": promotion, "swap": product_swap}
+
+
+def frame(label_size: str, content: dict, bits_per_pixel: int) -> bytes:
+    return pack_pixels(render_pixels(label_size, content, bits_per_pixel), bits_per_pixel)
+
+
+def run(updates: int, seed: int):
+    rng = random.Random(seed)
+    rows = []
+    for label_size, (width, height) in LABEL_SIZES.items():
+        for bits_per_pixel in (1, 2):
+            for scenario, change in SCENARIOS.items():
+                sizes, timings, encodings = [], [], Counter()
+                full_size = width * height * bits_per_pixel // 8 + 1
+                for _ in range(updates):
+                    mrp = round(rng.uniform(1, 99), 2)
+                    before = {"productName": f"Product {rng.randrange(100000)}", "sellingPrice": mrp, "mrp": mrp, "discount": None}
+                    old = frame(label_size, before, bits_per_pixel)
+                    new = frame(label_size, change(before, rng), bits_per_pixel)
+                    start = time.perf_counter()
+                    payload = encode_delta(old, new, height)
+                    timings.append((time.perf_counter() - start) * 1e3)
+                    assert apply_delta(old, payload, height) == new
+                    sizes.append(len(payload))
+                    encodings[ENCODING_NAMES[payload[0]]] += 1
+                summary = latency_summary(timings)
+                mean_size = sum(sizes) / len(sizes)
+                rows.append({
+                    "size": label_size,
+                    "bpp": bits_per_pixel,
+                    "scenario": scenario,
+                    "full B": full_size,
+                    "delta B": mean_size,
+                    "saved %": 100 * (1 - mean_size / full_size),
+                    "encodings": " ".join(f"{k}={v}" for k, v in sorted(encodings.items())),
+                    "p50 ms": summary["p50"],
+                    "p95 ms": summary["p95"],
+                })
+    print_table(rows, ["size", "bpp", "scenario", "full B", "delta B", "saved %", "encodings", "p50 ms", "p95 ms"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.updates, args.seed)
@@ -0,0 +1,94 @@
+"""Login throughput under a login storm, and the latency it adds to other endpoints.
+
+Runs the real app in-process against the configured MongoDB:
+
+    python -m benchmarks.login_storm --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+import httpx
+from benchmarks.common import latency_summary, print_table
+from main import app
+from models.user import user_collection
+from utils.auth import get_password_hash, password_hasher
+
+PASSWORD = "benchmark-password"
+PROBE_PATH = "/stores/?limit=1"
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list:
+    """Hit a cheap endpoint at a steady rate and record its latency."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(PROBE_PATH)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_worker(client: httpx.AsyncClient, email: str, stop: asyncio.Event, counts: dict):
+    while not stop.is_set():
+        response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        if response.status_code == 200:
+            counts["ok"] += 1
+        elif response.status_code == 503:
+            counts["rejected"] += 1
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        else:
+            counts["failed"] += 1
+
+
+async def run_phase(client: httpx.AsyncClient, email: str, concurrency: int, duration: float, interval: float):
+    stop = asyncio.Event()
+    counts = {"ok": 0, "rejected": 0, "failed": 0}
+    probe_task = asyncio.create_task(probe(client, stop, interval))
+    workers = [asyncio.create_task(login_worker(client, email, stop, counts)) for _ in range(concurrency)]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*workers)
+    return counts, await probe_task
+
+
+async def run(concurrency: int, duration: float, interval: float):
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    result = await user_collection.insert_one({
+        "email": email,
+        "hashed_password": get_password_hash(PASSWORD),
+        "full_name": "Benchmark User",
+        "role": "user",
+        "created_at": datetime.utcnow(),
+        "is_active": True,
+    })
+    transport = httpx.ASGITransport(app=app)
+    rows = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            for label, workers in (("idle", 0), ("login storm", concurrency)):
+                counts, latencies = await run_phase(client, email, workers, duration, interval)
+                rows.append({
+                    "phase": label,
+                    "logins/s": counts["ok"] / duration,
+                    "rejected": counts["rejected"],
+                    "failed": counts["failed"],
+                    **{f"probe {k}": v for k, v in latency_summary(latencies).items() if k != "count"},
+                })
+    finally:
+        await user_collection.delete_one({"_id": result.inserted_id})
+        password_hasher.shutdown()
+
+    print(f"{concurrency} concurrent login clients for {duration:.0f}s; probe = GET {PROBE_PATH} (latency in ms)")
+    print_table(rows, ["phase", "logins/s", "rejected", "failed", "probe p50", "probe p95", "probe p99"])
+    print(f"password hasher: {password_hasher.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.duration, args.probe_interval))
@@ -0,0 +1,97 @@
+"""Sustained sync log ingestion through POST /sync-logs/batch, measured up to the last insert.
+
+Runs the real app in-process against the configured MongoDB:
+
+    python -m benchmarks.sync_log_ingest --batch 500 --concurrency 8 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import httpx
+from benchmarks.common import latency_summary, print_table
+from main import app
+from models.sync_log import sync_log_collection
+from services.sync_log_writer import sync_log_writer
+
+
+def make_batch(store_name: str, size: int) -> bytes:
+    """An NDJSON body of ``size`` events."""
+    events = (
+        {
+            "eslId": f"esl-{i}",
+            "productName": "Benchmark Product",
+            "gatewayId": "gateway-1",
+            "storeName": store_name,
+            "status": "success",
+            "syncedAt": "2024-01-15 10:30:00",
+            "errorMessage": None,
+            "duration": "1.2s",
+        }
+        for i in range(size)
+    )
+    return "\n".join(json.dumps(event) for event in events).encode()
+
+
+async def sender(client: httpx.AsyncClient, body: bytes, stop: asyncio.Event, counts: dict, latencies: list):
+    headers = {"Content-Type": "application/x-ndjson"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post("/sync-logs/batch", content=body, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code == 202:
+            counts["accepted"] += response.json()["accepted"]
+        elif response.status_code == 503:
+            counts["throttled"] += 1
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        else:
+            counts["failed"] += 1
+
+
+async def run(batch: int, concurrency: int, duration: float):
+    store_name = f"benchmark-{uuid.uuid4().hex}"
+    body = make_batch(store_name, batch)
+    counts = {"accepted": 0, "throttled": 0, "failed": 0}
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    await sync_log_writer.start()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            stop = asyncio.Event()
+            start = time.perf_counter()
+            workers = [
+                asyncio.create_task(sender(client, body, stop, counts, latencies)) for _ in range(concurrency)
+            ]
+            await asyncio.sleep(duration)
+            stop.set()
+            await asyncio.gather(*workers)
+            # The final flush is part of the measured time
+            await sync_log_writer.stop()
+            elapsed = time.perf_counter() - start
+        written = await sync_log_collection.count_documents({"storeName": store_name})
+        summary = latency_summary(latencies)
+        print_table([{
+            "batch": batch,
+            "concurrency": concurrency,
+            "accepted": counts["accepted"],
+            "written": written,
+            "events/s": written / elapsed,
+            "throttled": counts["throttled"],
+            "failed": counts["failed"],
+            "p50 ms": summary["p50"],
+            "p95 ms": summary["p95"],
+            "p99 ms": summary["p99"],
+        }], ["batch", "concurrency", "accepted", "written", "events/s", "throttled", "failed", "p50 ms", "p95 ms", "p99 ms"])
+    finally:
+        await sync_log_writer.stop()
+        await sync_log_collection.delete_many({"storeName": store_name})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.batch, args.concurrency, args.duration))
@@ -0,0 +1,39 @@
+"""Micro-benchmark of verify_token with and without the verified-token cache.
+
+    python -m benchmarks.token_cache --iterations 100000
+"""
+import argparse
+import time
+from benchmarks.common import print_table
+from utils.auth import create_access_token, token_cache, verify_token
+
+
+def measure(token: str, iterations: int, cached: bool) -> float:
+    token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if not cached:
+            token_cache.clear()
+        verify_token(token)
+    return time.perf_counter() - start
+
+
+def run(iterations: int):
+    token = create_access_token({"sub": "64b7f0c2e4b0a1a2b3c4d5e6", "role": "manager"})
+    rows = []
+    for label, cached in (("uncached", False), ("cached", True)):
+        elapsed = measure(token, iterations, cached)
+        rows.append({
+            "mode": label,
+            "iterations": iterations,
+            "us/verify": elapsed / iterations * 1e6,
+            "verifies/s": iterations / elapsed,
+        })
+    rows[1]["speedup"] = rows[0]["us/verify"] / rows[1]["us/verify"]
+    print_table(rows, ["mode", "iterations", "us/verify", "verifies/s", "speedup"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,17 @@
+import asyncio
+import sys
+from database.indexes import ensure_indexes, find_collection_scans
+
+async def check_indexes():
+    await ensure_indexes()
+    failures = await find_collection_scans()
+    if failures:
+        print("Query shapes without a usable index (COLLSCAN or in-memory SORT):")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("All query shapes are served by an index")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(check_indexes()))
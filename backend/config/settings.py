@@ -6,6 +6,49 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 60
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 256
+    TOKEN_CACHE_MAX_SIZE: int = 50000
+    PRICE_PROPAGATION_BATCH_SIZE: int = 500
+    PRICE_PROPAGATION_INTERVAL_SECONDS: float = 1.0
+    RENDER_CACHE_MAX_SIZE: int = 50000
+    RENDER_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LABEL_FRAME_RETENTION_DAYS: int = 30
+    LABEL_FRAME_TOUCH_INTERVAL_SECONDS: float = 3600.0
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS: float = 2.0
+    HEARTBEAT_MAX_PENDING: int = 10000
+    HEARTBEAT_MAX_BUFFERED: int = 50000
+    SYNC_LOG_RETENTION_DAYS: int = 30
+    SYNC_LOG_BATCH_SIZE: int = 1000
+    SYNC_LOG_FLUSH_INTERVAL_SECONDS: float = 0.5
+    SYNC_LOG_MAX_PENDING: int = 100000
+    LOW_BATTERY_THRESHOLD: int = 20
+    REFERENCE_CACHE_MAX_SIZE: int = 10000
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+    FLEET_INDEX_REFRESH_SECONDS: float = 300.0
+    TELEMETRY_FLUSH_INTERVAL_SECONDS: float = 5.0
+    TELEMETRY_MAX_PENDING: int = 100000
+    TELEMETRY_RAW_DAYS: int = 7
+    TELEMETRY_RETENTION_DAYS: int = 180
+    BATTERY_FORECAST_INTERVAL_SECONDS: float = 3600.0
+    BATTERY_FORECAST_WINDOW_DAYS: int = 30
+    EVENT_HISTORY_SIZE: int = 10000
+    EVENT_SUBSCRIBER_QUEUE_SIZE: int = 1000
+    EVENT_MAX_SUBSCRIBERS: int = 1000
+    EVENT_KEEPALIVE_SECONDS: float = 15.0
+    TOMBSTONE_RETENTION_DAYS: int = 30
+    TOMBSTONE_PURGE_INTERVAL_SECONDS: float = 3600.0
+    # The dispatcher's only transport so far is the in-process gateway simulator
+    DISPATCH_SIMULATE_GATEWAYS: bool = False
+    DISPATCH_CONCURRENCY: int = 4
+    DISPATCH_RATE_PER_SECOND: float = 10.0
+    DISPATCH_BURST: int = 20
+    DISPATCH_MAX_ATTEMPTS: int = 5
+    DISPATCH_BACKOFF_SECONDS: float = 1.0
+    DISPATCH_MAX_BACKOFF_SECONDS: float = 60.0
+    DISPATCH_MAX_QUEUED: int = 100000
 
     class Config:
         env_file = ".env"
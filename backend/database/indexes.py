@@ -0,0 +1,55 @@
+from pymongo.errors import OperationFailure
+from models import category, esl, gateway, label_frame, product, store, sync_log, sync_rollup, telemetry, tombstone, user
+from utils.logger import logger
+
+# Each model module declares INDEXES and the QUERY_SHAPES its routes issue
+MODEL_MODULES = {
+    "categories": (category.category_collection, category),
+    "esls": (esl.esl_collection, esl),
+    "gateways": (gateway.gateway_collection, gateway),
+    "label_frames": (label_frame.label_frame_collection, label_frame),
+    "products": (product.product_collection, product),
+    "stores": (store.store_collection, store),
+    "sync_logs": (sync_log.sync_log_collection, sync_log),
+    "sync_rollups": (sync_rollup.sync_rollup_collection, sync_rollup),
+    "esl_telemetry": (telemetry.telemetry_collection, telemetry),
+    "esl_tombstones": (tombstone.tombstone_collection, tombstone),
+    "users": (user.user_collection, user),
+}
+
+
+async def ensure_indexes():
+    """Create every declared index. ``create_indexes`` is a no-op for indexes that already exist."""
+    for name, (collection, module) in MODEL_MODULES.items():
+        try:
+            await collection.create_indexes(module.INDEXES)
+        except OperationFailure as e:
+            # e.g. a unique index over existing duplicates; keep serving and report it
+            logger.error(f"Failed to create indexes on {name}: {e}")
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def find_collection_scans() -> list[str]:
+    """Explain every declared query shape and return the ones whose winning plan is a COLLSCAN
+    or sorts in memory (a blocking SORT stage)."""
+    failures = []
+    for name, (collection, module) in MODEL_MODULES.items():
+        for query, sort in module.QUERY_SHAPES:
+            cursor = collection.find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            explain = await cursor.explain()
+            winning_plan = explain["queryPlanner"]["winningPlan"]
+            stages = list(_plan_stages(winning_plan))
+            logger.info(f"{name} {query} sort={sort}: {' <- '.join(filter(None, stages))}")
+            if "COLLSCAN" in stages or "SORT" in stages:
+                failures.append(f"{name} {query} sort={sort}")
+    return failures
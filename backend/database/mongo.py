@@ -1,8 +1,9 @@
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from config.settings import settings
 from urllib.parse import urlparse
+from utils.logger import logger
 
-client = MongoClient(settings.MONGO_URL, serverSelectionTimeoutMS=5000)
+client = AsyncIOMotorClient(settings.MONGO_URL, serverSelectionTimeoutMS=5000)
 
 parsed = urlparse(settings.MONGO_URL)
 if parsed.path and parsed.path != "/":
@@ -12,8 +13,9 @@ else:
 
 db = client[db_name]
 
-try:
-    client.admin.command('ping')
-    print("MongoDB connection successful!")
-except Exception as e:
-    print(f"MongoDB connection failed: {e}") 
\ No newline at end of file
+async def ping():
+    try:
+        await client.admin.command('ping')
+        logger.info("MongoDB connection successful!")
+    except Exception as e:
+        logger.error(f"MongoDB connection failed: {e}")
\ No newline at end of file
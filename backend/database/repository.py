@@ -0,0 +1,122 @@
+from typing import Awaitable, Callable, Optional
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from pymongo import ReturnDocument
+from database.versions import ChangeVersions, allocate, needs_version
+from utils.pagination import keyset_page, serialize_doc
+
+
+class Repository:
+    """CRUD access to one collection where every write is a single round trip.
+
+    Creates assign ``_id`` locally and build the response from the inserted
+    document; updates use ``find_one_and_update`` to get the new version back
+    in the same call. ``encoder`` converts incoming fields to their stored
+    form and ``formatter`` converts documents back for the response.
+
+    With ``on_change`` set, each write also reports its (before, after) raw
+    documents, as the bulk helpers do; updates and deletes then get the previous
+    version back from ``find_one_and_update``/``find_one_and_delete`` instead,
+    so this costs no extra round trip.
+
+    ``lookups`` are the aggregation stages that embed referenced documents
+    when a read asks for ``expand``. With ``versions`` set, creates stamp the
+    document with a new ``changeVersion``, and so do updates that set one of
+    ``versioned_fields`` (any update when it is None).
+    """
+
+    def __init__(
+        self,
+        collection,
+        name: str,
+        formatter: Callable[[dict], dict] = serialize_doc,
+        projection: Optional[dict] = None,
+        encoder: Optional[Callable[[dict], dict]] = None,
+        on_change: Optional[Callable[[list], Awaitable[None]]] = None,
+        lookups: Optional[list] = None,
+        versions: Optional[ChangeVersions] = None,
+        versioned_fields: Optional[tuple] = None,
+    ):
+        self.collection = collection
+        self.name = name
+        self.formatter = formatter
+        self.projection = projection
+        self.encoder = encoder or (lambda fields: fields)
+        self.on_change = on_change
+        self.lookups = lookups or []
+        self.versions = versions
+        self.versioned_fields = versioned_fields
+
+    def object_id(self, value: str) -> ObjectId:
+        if not ObjectId.is_valid(value):
+            raise HTTPException(status_code=400, detail=f"Invalid {self.name.lower()} ID")
+        return ObjectId(value)
+
+    def not_found(self) -> HTTPException:
+        return HTTPException(status_code=404, detail=f"{self.name} not found")
+
+    async def list_page(
+        self,
+        response: Response,
+        filters: Optional[dict] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        expand: bool = False,
+    ) -> list:
+        pipeline = self.lookups if expand else None
+        return await keyset_page(
+            self.collection, response, filters, after, limit, self.formatter, self.projection, pipeline
+        )
+
+    async def get(self, doc_id: str, expand: bool = False) -> dict:
+        query = {"_id": self.object_id(doc_id)}
+        if expand and self.lookups:
+            stages = [{"$match": query}] + ([{"$project": self.projection}] if self.projection else [])
+            docs = [doc async for doc in self.collection.aggregate(stages + self.lookups)]
+            doc = docs[0] if docs else None
+        else:
+            doc = await self.collection.find_one(query, self.projection)
+        if doc is None:
+            raise self.not_found()
+        return self.formatter(doc)
+
+    async def create(self, data: dict) -> dict:
+        doc = self.encoder(dict(data, _id=ObjectId()))
+        async with allocate(self.versions, 1) as stamps:
+            if stamps:
+                doc["changeVersion"] = next(stamps)
+            await self.collection.insert_one(doc)
+        if self.on_change:
+            await self.on_change([(None, dict(doc))])
+        return self.formatter(doc)
+
+    async def update(self, doc_id: str, fields: dict) -> dict:
+        if not fields:
+            return await self.get(doc_id)
+        fields = self.encoder(dict(fields))
+        async with allocate(self.versions, int(needs_version(fields, self.versioned_fields))) as stamps:
+            if stamps:
+                fields["changeVersion"] = next(stamps)
+            doc = await self.collection.find_one_and_update(
+                {"_id": self.object_id(doc_id)},
+                {"$set": fields},
+                projection=self.projection,
+                return_document=ReturnDocument.BEFORE if self.on_change else ReturnDocument.AFTER,
+            )
+        if doc is None:
+            raise self.not_found()
+        if self.on_change:
+            before, doc = doc, dict(doc, **fields)
+            await self.on_change([(before, dict(doc))])
+        return self.formatter(doc)
+
+    async def delete(self, doc_id: str) -> None:
+        if self.on_change:
+            doc = await self.collection.find_one_and_delete({"_id": self.object_id(doc_id)})
+            if doc is None:
+                raise self.not_found()
+            await self.on_change([(doc, None)])
+            return
+        result = await self.collection.delete_one({"_id": self.object_id(doc_id)})
+        if result.deleted_count == 0:
+            raise self.not_found()
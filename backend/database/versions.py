@@ -0,0 +1,72 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterator, Optional
+from pymongo import ReturnDocument
+from database.mongo import db
+
+counter_collection = db["counters"]
+
+
+class ChangeVersions:
+    """Monotonic change versions handed out from one counter document.
+
+    ``allocate(count)`` reserves a block of consecutive versions with a single
+    ``$inc`` and keeps it in flight until the writes stamped with it are done.
+    Blocks can finish in any order, so readers that page by version only trust
+    versions up to ``stable()``: everything below the oldest block still in
+    flight in this process. Writes from other processes are not covered by it.
+    """
+
+    def __init__(self, collection, name: str):
+        self.collection = collection
+        self.name = name
+        self.issued = 0
+        # block -> the lowest version it holds (or can still receive)
+        self._in_flight: dict = {}
+
+    @asynccontextmanager
+    async def allocate(self, count: int = 1) -> AsyncIterator[Iterator[int]]:
+        block = object()
+        # Whatever the counter returns will be above every version issued before the request
+        self._in_flight[block] = self.issued + 1
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"_id": self.name},
+                {"$inc": {"value": count}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            first = doc["value"] - count + 1
+            self.issued = max(self.issued, doc["value"])
+            self._in_flight[block] = first
+            yield iter(range(first, first + count))
+        finally:
+            del self._in_flight[block]
+
+    def stable(self) -> Optional[int]:
+        """Highest version below every write still in flight, or None when none are."""
+        return min(self._in_flight.values()) - 1 if self._in_flight else None
+
+    def stats(self) -> dict:
+        return {"issued": self.issued, "inFlight": len(self._in_flight)}
+
+
+def needs_version(fields: dict, versioned_fields: Optional[tuple], before: Optional[dict] = None) -> bool:
+    """Whether an update setting ``fields`` gets a new version: only when it sets one of
+    ``versioned_fields`` (any field when None), to a new value if ``before`` is known."""
+    if versioned_fields is None:
+        return True
+    return any(field in fields and (before is None or before.get(field) != fields[field]) for field in versioned_fields)
+
+
+@asynccontextmanager
+async def allocate(versions: Optional[ChangeVersions], count: int) -> AsyncIterator[Optional[Iterator[int]]]:
+    """``versions.allocate(count)``, or None for collections that are not versioned."""
+    if versions is None or count == 0:
+        yield None
+        return
+    async with versions.allocate(count) as stamps:
+        yield stamps
+
+
+# Shared by ESLs and products, so a label's version also orders it against product changes
+change_versions = ChangeVersions(counter_collection, "changeVersion")
@@ -0,0 +1,392 @@
+"""Generate a large synthetic dataset: stores, products, gateways, ESLs and sync logs.
+
+    python generate_data.py --stores 500 --products 100000 --esls 1000000 --sync-logs 50000000
+    python generate_data.py --stores 50 --esls 100000 --output data/
+
+Every document is a function of ``--seed``, its collection and its position,
+ObjectIds included, so any batch can be produced by any worker process and
+two runs with the same arguments (and ``--until``) write identical data.
+References are consistent: each store owns a contiguous range of labels and
+``--gateways-per-store`` gateways, labels carry their product's name and
+prices, and sync logs point at an existing label, its store and one of the
+store's gateways.
+
+The work is split into fixed-size parts that a process pool streams out in
+``insert_many`` batches. The generated collections are dropped first and
+their indexes rebuilt once loading is done, which is much faster than
+maintaining them on every insert; store counters are computed while the
+labels are generated, and the sync rollups are rebuilt at the end. With
+``--output`` the documents are written as NDJSON files (MongoDB extended
+JSON, one directory per collection) for ``mongoimport`` instead.
+"""
+import argparse
+import asyncio
+import calendar
+import math
+import multiprocessing
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator, NamedTuple, Optional
+from bson import ObjectId, json_util
+from pymongo import MongoClient
+from config.settings import settings
+from database.mongo import db_name
+
+# Collections replaced by a run: the generated ones and those derived from them
+DROPPED_COLLECTIONS = ("stores", "products", "gateways", "esls", "sync_logs", "sync_rollups", "esl_tombstones", "esl_telemetry")
+
+# Documents per unit of work handed to a worker
+PART_SIZE = 50000
+
+# Second byte group of every generated ObjectId, after the timestamp
+KINDS = {"stores": 1, "products": 2, "gateways": 3, "esls": 4, "sync_logs": 5}
+
+# Salts for the independent choices derived from a document's position
+PRODUCT_SALT, STORE_SALT, ESL_PRODUCT_SALT, SYNC_LOG_ESL_SALT = 1, 2, 3, 4
+
+MASK64 = (1 << 64) - 1
+
+ADJECTIVES = ["Organic", "Premium", "Fresh", "Classic", "Crunchy", "Family Size", "Low Fat", "Wholegrain", "Spicy", "Roasted"]
+NOUNS = ["Coffee Beans", "Milk", "Bread", "Apples", "Yogurt", "Pasta", "Rice", "Olive Oil", "Cereal", "Cheese", "Juice", "Tea"]
+CATEGORIES = ["Beverages", "Dairy", "Bakery", "Produce", "Pantry", "Frozen", "Snacks", "Household"]
+CITIES = ["Springfield", "Riverton", "Lakeside", "Fairview", "Georgetown", "Madison", "Franklin", "Clinton"]
+SITES = ["Mall", "Plaza", "Center", "High Street", "Retail Park", "Station"]
+FIRST_NAMES = ["John", "Sarah", "Mike", "Priya", "Chen", "Fatima", "Lucas", "Anna", "Omar", "Grace"]
+LAST_NAMES = ["Smith", "Johnson", "Davis", "Patel", "Wang", "Khan", "Silva", "Novak", "Haddad", "Okafor"]
+# Cumulative weights, as random.choices takes them without summing per call
+LABEL_SIZES, LABEL_SIZE_WEIGHTS = ("2.9 inch", "4.2 inch", "7.5 inch"), (60, 90, 100)
+ESL_STATUSES, ESL_STATUS_WEIGHTS = ("active", "inactive", "error"), (90, 96, 100)
+SYNC_STATUSES, SYNC_STATUS_WEIGHTS = ("success", "failed", "pending"), (93, 98, 100)
+FIRMWARE_VERSIONS = ["2.3.1", "2.4.0", "2.4.2"]
+SYNC_ERRORS = ["No acknowledgement from label", "Label out of range", "Checksum mismatch", "Gateway timeout"]
+
+
+class Plan(NamedTuple):
+    seed: int
+    stores: int
+    products: int
+    gateways_per_store: int
+    esls: int
+    sync_logs: int
+    log_days: float
+    until: datetime
+    batch_size: int
+    output: Optional[str]
+
+
+def _mix(seed: int, salt: int, index: int) -> int:
+    """A well-spread 64-bit value for (seed, salt, index), for choices other workers must be able to repeat."""
+    z = (seed * 0x9E3779B97F4A7C15 + salt * 0xD1B54A32D192ED03 + index) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+@lru_cache(maxsize=None)
+def epoch_seconds(at: datetime) -> int:
+    return calendar.timegm(at.utctimetuple())
+
+
+def object_id(plan: Plan, collection: str, index: int, seconds: Optional[int] = None) -> ObjectId:
+    """Timestamp, collection, seed and position, so ids are unique across collections and runs with other seeds."""
+    if seconds is None:
+        seconds = epoch_seconds(plan.until)
+    return ObjectId(struct.pack(">III", seconds, KINDS[collection] << 24 | plan.seed & 0xFFFFFF, index))
+
+
+def esl_range(plan: Plan, store: int) -> range:
+    """The labels owned by a store; the remainder of an uneven split goes to the first stores."""
+    size, extra = divmod(plan.esls, plan.stores)
+    start = store * size + min(store, extra)
+    return range(start, start + size + (store < extra))
+
+
+def store_of_esl(plan: Plan, esl: int) -> int:
+    size, extra = divmod(plan.esls, plan.stores)
+    if esl < extra * (size + 1):
+        return esl // (size + 1)
+    return extra + (esl - extra * (size + 1)) // size
+
+
+def product_of_esl(plan: Plan, esl: int) -> Optional[int]:
+    return _mix(plan.seed, ESL_PRODUCT_SALT, esl) % plan.products if plan.products else None
+
+
+def store_name(store: int) -> str:
+    return f"Store #{store + 1:04d}"
+
+
+def store_doc(plan: Plan, store: int, counters: dict) -> dict:
+    h = _mix(plan.seed, STORE_SALT, store)
+    return {
+        "_id": object_id(plan, "stores", store),
+        "name": store_name(store),
+        "location": f"{CITIES[h % len(CITIES)]} {SITES[(h >> 8) % len(SITES)]}",
+        "manager": f"{FIRST_NAMES[(h >> 16) % len(FIRST_NAMES)]} {LAST_NAMES[(h >> 24) % len(LAST_NAMES)]}",
+        "status": "active",
+        "lastSync": plan.until.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        **counters,
+    }
+
+
+# Labels and sync logs look up their product's name and prices over and over
+@lru_cache(maxsize=None)
+def product_doc(plan: Plan, product: int) -> dict:
+    h = _mix(plan.seed, PRODUCT_SALT, product)
+    mrp = round(0.99 + (h >> 24) % 5000 / 100, 2)
+    discount = round(mrp * ((h >> 40) % 4) * 5 / 100, 2)
+    return {
+        "_id": object_id(plan, "products", product),
+        "name": f"{ADJECTIVES[h % len(ADJECTIVES)]} {NOUNS[(h >> 8) % len(NOUNS)]} {product + 1}",
+        "barcode": f"{plan.seed % 100:02d}{product:011d}",
+        "mrp": mrp,
+        "discount": discount,
+        "sellingPrice": round(mrp - discount, 2),
+        "category": CATEGORIES[(h >> 16) % len(CATEGORIES)],
+        "changeVersion": product + 1,
+    }
+
+
+def gateway_docs(plan: Plan, store: int, rng: random.Random) -> Iterator[dict]:
+    for g in range(plan.gateways_per_store):
+        index = store * plan.gateways_per_store + g
+        online = rng.random() < 0.95
+        yield {
+            "_id": object_id(plan, "gateways", index),
+            "storeId": object_id(plan, "stores", store),
+            "storeName": store_name(store),
+            "ipAddress": f"10.{store // 256 % 256}.{store % 256}.{g % 254 + 1}",
+            "firmwareVersion": rng.choice(FIRMWARE_VERSIONS),
+            "lastHeartbeat": plan.until - timedelta(seconds=rng.uniform(0, 60) if online else rng.uniform(3600, 86400)),
+            "status": "online" if online else "offline",
+            "syncCount": rng.randint(0, 100000),
+            "errorCount": rng.randint(0, 500),
+            "uptime": rng.uniform(3600, 90 * 86400),
+        }
+
+
+def esl_docs(plan: Plan, store: int, rng: random.Random) -> Iterator[dict]:
+    for esl in esl_range(plan, store):
+        product = product_of_esl(plan, esl)
+        status = rng.choices(ESL_STATUSES, cum_weights=ESL_STATUS_WEIGHTS)[0]
+        last_sync = plan.until - timedelta(seconds=rng.expovariate(1 / 3600))
+        doc = {
+            "_id": object_id(plan, "esls", esl),
+            "labelSize": rng.choices(LABEL_SIZES, cum_weights=LABEL_SIZE_WEIGHTS)[0],
+            "batteryLevel": 0 if status == "error" else int(rng.triangular(0, 100, 85)),
+            "signalStrength": 0 if status == "error" else rng.randint(20, 100),
+            "status": status,
+            "storeId": object_id(plan, "stores", store),
+            "storeName": store_name(store),
+            "lastSync": last_sync,
+            "isRecentlySync": plan.until - last_sync < timedelta(minutes=5),
+            "changeVersion": plan.products + esl + 1,
+        }
+        if product is not None:
+            details = product_doc(plan, product)
+            doc.update(
+                productId=details["_id"],
+                productName=details["name"],
+                mrp=details["mrp"],
+                discount=details["discount"],
+                sellingPrice=details["sellingPrice"],
+            )
+        yield doc
+
+
+def sync_log_docs(plan: Plan, start: int, count: int, rng: random.Random) -> Iterator[dict]:
+    window = plan.log_days * 86400
+    until = epoch_seconds(plan.until)
+    for i in range(start, start + count):
+        esl = _mix(plan.seed, SYNC_LOG_ESL_SALT, i) % plan.esls
+        store = store_of_esl(plan, esl)
+        product = product_of_esl(plan, esl)
+        gateway = store * plan.gateways_per_store + rng.randrange(plan.gateways_per_store) if plan.gateways_per_store else None
+        # Spread evenly over the window in position order, so _id order is also time order
+        age = window * (plan.sync_logs - i) / plan.sync_logs
+        synced_at = plan.until - timedelta(seconds=age)
+        status = rng.choices(SYNC_STATUSES, cum_weights=SYNC_STATUS_WEIGHTS)[0]
+        yield {
+            "_id": object_id(plan, "sync_logs", i, until - math.ceil(age)),
+            "eslId": str(object_id(plan, "esls", esl)),
+            "productName": product_doc(plan, product)["name"] if product is not None else "",
+            "gatewayId": str(object_id(plan, "gateways", gateway)) if gateway is not None else "",
+            "storeName": store_name(store),
+            "status": status,
+            "syncedAt": synced_at,
+            "errorMessage": rng.choice(SYNC_ERRORS) if status == "failed" else None,
+            "duration": round(rng.lognormvariate(-1.5, 0.6), 3),
+            "createdAt": synced_at,
+        }
+
+
+_database = None
+
+
+def database():
+    """This process's own client; clients must not be shared with worker processes."""
+    global _database
+    if _database is None:
+        _database = MongoClient(settings.MONGO_URL)[db_name]
+    return _database
+
+
+@contextmanager
+def open_sink(plan: Plan, collection: str, part: int):
+    """A ``write(docs)`` callable for one part of a collection: ``insert_many`` or an NDJSON file."""
+    if plan.output is None:
+        target = database()[collection]
+        yield lambda docs: target.insert_many(docs, ordered=False)
+        return
+    directory = os.path.join(plan.output, collection)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{part:06d}.ndjson"), "w", encoding="utf-8") as f:
+        yield lambda docs: f.writelines(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n" for doc in docs)
+
+
+def stream(plan: Plan, collection: str, part: int, docs: Iterator[dict]) -> int:
+    written = 0
+    with open_sink(plan, collection, part) as write:
+        while batch := list(islice(docs, plan.batch_size)):
+            write(batch)
+            written += len(batch)
+    return written
+
+
+def generate_products(plan: Plan, start: int, count: int) -> tuple[dict, None]:
+    docs = (product_doc(plan, product) for product in range(start, start + count))
+    return {"products": stream(plan, "products", start // PART_SIZE, docs)}, None
+
+
+def generate_store_fleet(plan: Plan, store: int) -> tuple[dict, tuple[int, dict]]:
+    """A store's gateways and labels, and the store counters they add up to."""
+    rng = random.Random(f"{plan.seed}:store:{store}")
+    counters = dict.fromkeys(("eslCount", "activeEslCount", "errorEslCount", "lowBatteryEslCount"), 0)
+
+    def counted(docs):
+        for doc in docs:
+            counters["eslCount"] += 1
+            counters["activeEslCount"] += doc["status"] == "active"
+            counters["errorEslCount"] += doc["status"] == "error"
+            counters["lowBatteryEslCount"] += doc["batteryLevel"] < settings.LOW_BATTERY_THRESHOLD
+            yield doc
+
+    written = {
+        "gateways": stream(plan, "gateways", store, gateway_docs(plan, store, rng)),
+        "esls": stream(plan, "esls", store, counted(esl_docs(plan, store, rng))),
+    }
+    return written, (store, dict(counters, gatewayCount=plan.gateways_per_store))
+
+
+def generate_sync_logs(plan: Plan, start: int, count: int) -> tuple[dict, None]:
+    rng = random.Random(f"{plan.seed}:sync_logs:{start}")
+    return {"sync_logs": stream(plan, "sync_logs", start // PART_SIZE, sync_log_docs(plan, start, count, rng))}, None
+
+
+def parts(total: int) -> list[tuple[int, int]]:
+    return [(start, min(PART_SIZE, total - start)) for start in range(0, total, PART_SIZE)]
+
+
+def run_phase(pool: Optional[ProcessPoolExecutor], name: str, task, args: list) -> list:
+    """Run ``task`` over ``args`` and report documents per second for the phase."""
+    started = time.perf_counter()
+    if pool is None:
+        outcomes = (task(*a) for a in args)
+    else:
+        outcomes = (future.result() for future in as_completed([pool.submit(task, *a) for a in args]))
+    written, results, reported = {}, [], 0
+    for done, (counts, result) in enumerate(outcomes, 1):
+        for collection, count in counts.items():
+            written[collection] = written.get(collection, 0) + count
+        results.append(result)
+        # Progress in tenths for the long phases
+        if len(args) >= 10 and done * 10 // len(args) > reported:
+            reported = done * 10 // len(args)
+            print(f"  {name}: {done}/{len(args)} parts")
+    elapsed = time.perf_counter() - started
+    for collection, count in written.items():
+        print(f"{collection}: {count} documents in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f}/s)")
+    return results
+
+
+async def finish(plan: Plan) -> None:
+    """Rebuild what the direct inserts bypassed: the indexes and the hourly sync rollups."""
+    from database.indexes import ensure_indexes
+    from rebuild_sync_rollups import rebuild_sync_rollups
+    started = time.perf_counter()
+    await ensure_indexes()
+    print(f"Built indexes in {time.perf_counter() - started:.1f}s")
+    if plan.sync_logs:
+        await rebuild_sync_rollups()
+
+
+def generate(plan: Plan, workers: int) -> None:
+    if plan.output is None:
+        for name in DROPPED_COLLECTIONS:
+            database().drop_collection(name)
+
+    started = time.perf_counter()
+    # spawn: worker processes open their own clients instead of inheriting this one's sockets
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+    try:
+        run_phase(pool, "products", generate_products, [(plan, *part) for part in parts(plan.products)])
+        counters = dict(run_phase(pool, "labels", generate_store_fleet, [(plan, store) for store in range(plan.stores)]))
+        run_phase(pool, "sync logs", generate_sync_logs, [(plan, *part) for part in parts(plan.sync_logs)])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    stream(plan, "stores", 0, (store_doc(plan, store, counters[store]) for store in range(plan.stores)))
+    # Later writes must get versions above every generated one
+    versions = plan.products + plan.esls
+    if plan.output is None:
+        database()["counters"].update_one({"_id": "changeVersion"}, {"$max": {"value": versions}}, upsert=True)
+    else:
+        stream(plan, "counters", 0, iter([{"_id": "changeVersion", "value": versions}]))
+    total = plan.stores + plan.products + plan.stores * plan.gateways_per_store + plan.esls + plan.sync_logs
+    elapsed = time.perf_counter() - started
+    print(f"Generated {total} documents in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s)")
+
+    if plan.output is None:
+        asyncio.run(finish(plan))
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stores", type=int, default=500)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--gateways-per-store", type=int, default=10)
+    parser.add_argument("--esls", type=int, default=1000000)
+    parser.add_argument("--sync-logs", type=int, default=1000000)
+    parser.add_argument("--log-days", type=float, default=7.0, help="spread sync logs over this many days before --until")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="latest generated timestamp, UTC (default: now)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="documents per insert_many")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="write NDJSON files to this directory instead of MongoDB")
+    args = parser.parse_args(argv)
+    if args.stores < 1 and (args.esls or args.sync_logs):
+        parser.error("labels and sync logs need at least one store")
+    if args.sync_logs and not args.esls:
+        parser.error("sync logs need labels")
+    if args.log_days >= settings.SYNC_LOG_RETENTION_DAYS and args.output is None:
+        parser.error(f"--log-days must be below SYNC_LOG_RETENTION_DAYS ({settings.SYNC_LOG_RETENTION_DAYS}) or the TTL index removes the logs")
+    if args.output and os.path.isdir(args.output) and os.listdir(args.output):
+        parser.error(f"{args.output} is not empty")
+    until = args.until or datetime.utcnow().replace(microsecond=0)
+    plan = Plan(
+        args.seed, args.stores, args.products, args.gateways_per_store, args.esls, args.sync_logs,
+        args.log_days, until, args.batch_size, args.output,
+    )
+    generate(plan, args.workers)
+
+
+if __name__ == "__main__":
+    main()
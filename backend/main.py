@@ -1,9 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config.settings import settings
-from routes import product, user, store, gateway, esl, sync_log, auth, category
+from database.indexes import ensure_indexes
+from database.mongo import client, ping
+from services.battery_forecast import battery_forecaster
+from services.change_feed import tombstone_purger
+from services.dispatcher import dispatcher
+from services.fleet_index import fleet_index
+from services.heartbeat import heartbeat_buffer
+from services.price_propagation import price_propagator
+from services.simulated_gateway import SimulatedGateway
+from services.sync_log_writer import sync_log_writer
+from services.telemetry import telemetry_recorder
+from utils.auth import password_hasher
+from utils.pagination import NEXT_CURSOR_HEADER
+from routes import product, user, store, gateway, esl, sync_log, auth, category, metrics, analytics, fleet, events, dispatch
 
-app = FastAPI(title="ESL Management Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ping()
+    await ensure_indexes()
+    await price_propagator.start()
+    await heartbeat_buffer.start()
+    await sync_log_writer.start()
+    await fleet_index.start()
+    await telemetry_recorder.start()
+    await battery_forecaster.start()
+    await tombstone_purger.start()
+    if settings.DISPATCH_SIMULATE_GATEWAYS:
+        await dispatcher.start(SimulatedGateway().send)
+    yield
+    await dispatcher.stop()
+    await tombstone_purger.stop()
+    await battery_forecaster.stop()
+    await telemetry_recorder.stop()
+    await fleet_index.stop()
+    await sync_log_writer.stop()
+    await heartbeat_buffer.stop()
+    await price_propagator.stop()
+    password_hasher.shutdown()
+    client.close()
+
+app = FastAPI(title="ESL Management Backend", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -12,6 +51,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the paging cursor
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(auth.router)
@@ -22,7 +63,12 @@ app.include_router(gateway.router)
 app.include_router(esl.router)
 app.include_router(sync_log.router)
 app.include_router(category.router)
+app.include_router(metrics.router)
+app.include_router(analytics.router)
+app.include_router(fleet.router)
+app.include_router(events.router)
+app.include_router(dispatch.router)
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "ESL Management Backend is running"} 
\ No newline at end of file
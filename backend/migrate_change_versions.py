@@ -0,0 +1,10 @@
+import asyncio
+from services.change_feed import backfill_change_versions
+
+async def main():
+    stamped = await backfill_change_versions()
+    for name, count in stamped.items():
+        print(f"{name}: stamped {count} documents with a change version")
+
+if __name__ == "__main__":
+    asyncio.run(main())
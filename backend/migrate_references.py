@@ -0,0 +1,80 @@
+import asyncio
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from models.esl import esl_collection
+from models.gateway import gateway_collection
+from models.product import product_collection
+from models.store import store_collection
+from services.store_counters import rebuild_store_counters
+
+BATCH_SIZE = 1000
+
+# Name-keyed indexes replaced by the storeId/productId ones
+OBSOLETE_INDEXES = [
+    (esl_collection, "storeName_1_status_1__id_1"),
+    (esl_collection, "productName_1__id_1"),
+    (esl_collection, "storeName_1_lastSync_1"),
+    (gateway_collection, "storeName_1__id_1"),
+]
+
+async def load_ids(collection) -> tuple[dict, set]:
+    """Name -> id for every document (the first one wins on duplicate names), and the set of ids."""
+    by_name, ids = {}, set()
+    async for doc in collection.find({}, {"name": 1}):
+        by_name.setdefault(doc.get("name"), doc["_id"])
+        ids.add(doc["_id"])
+    return by_name, ids
+
+def resolve(doc: dict, id_field: str, name_field: str, by_name: dict, ids: set):
+    """The ObjectId a document refers to: its id field if that names an existing document, else its name."""
+    value = doc.get(id_field)
+    if isinstance(value, ObjectId) and value in ids:
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value) and ObjectId(value) in ids:
+        return ObjectId(value)
+    return by_name.get(doc.get(name_field))
+
+async def migrate_collection(name, collection, references):
+    """Stream the documents whose references are not ObjectIds yet and convert them in batches."""
+    query = {"$or": [{id_field: {"$not": {"$type": "objectId"}}} for id_field, _, _, _ in references]}
+    projection = {field: 1 for id_field, name_field, _, _ in references for field in (id_field, name_field)}
+    ops, converted, unresolved = [], 0, 0
+    async for doc in collection.find(query, projection).batch_size(BATCH_SIZE):
+        changes = {}
+        for id_field, name_field, by_name, ids in references:
+            target = resolve(doc, id_field, name_field, by_name, ids)
+            if target is None:
+                unresolved += 1
+            elif target != doc.get(id_field):
+                changes[id_field] = target
+        if changes:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if len(ops) >= BATCH_SIZE:
+            await collection.bulk_write(ops, ordered=False)
+            converted += len(ops)
+            ops = []
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+        converted += len(ops)
+    print(f"{name}: converted {converted} documents, {unresolved} references could not be resolved")
+
+async def migrate_references():
+    stores, store_ids = await load_ids(store_collection)
+    products, product_ids = await load_ids(product_collection)
+    await migrate_collection("esls", esl_collection, [
+        ("storeId", "storeName", stores, store_ids),
+        ("productId", "productName", products, product_ids),
+    ])
+    await migrate_collection("gateways", gateway_collection, [("storeId", "storeName", stores, store_ids)])
+    for collection, index_name in OBSOLETE_INDEXES:
+        try:
+            await collection.drop_index(index_name)
+        except OperationFailure:
+            pass
+    # Store counters are keyed by storeId
+    result = await rebuild_store_counters()
+    print(f"Rebuilt counters for {result['stores']} stores")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_references())
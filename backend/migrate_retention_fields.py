@@ -0,0 +1,29 @@
+import asyncio
+from datetime import datetime
+from models.label_frame import label_frame_collection
+from models.sync_log import sync_log_collection
+from models.tombstone import tombstone_collection
+
+async def migrate_retention_fields():
+    """Give documents stored before their collection's TTL index existed the field it expires them by,
+    and drop the tombstone TTL index that the purge job replaced."""
+    now = datetime.utcnow()
+    # Sync logs expire by createdAt; older entries count from when they were synced (string
+    # syncedAt values not yet converted by migrate_time_fields.py count from now)
+    synced = await sync_log_collection.update_many(
+        {"createdAt": None, "syncedAt": {"$type": "date"}}, [{"$set": {"createdAt": "$syncedAt"}}]
+    )
+    rest = await sync_log_collection.update_many({"createdAt": None}, {"$set": {"createdAt": now}})
+    print(f"sync_logs: stamped {synced.modified_count + rest.modified_count} logs with createdAt")
+    # Frames are a cache: count the existing ones as used now, so the unused ones go after one retention period
+    result = await label_frame_collection.update_many({"lastUsedAt": None}, {"$set": {"lastUsedAt": now}})
+    print(f"label_frames: stamped {result.modified_count} frames with lastUsedAt")
+    # Tombstones are now purged by the server, which records the versions it removed;
+    # the old TTL index would delete them behind its back
+    indexes = await tombstone_collection.index_information()
+    if indexes.get("deletedAt_1", {}).get("expireAfterSeconds") is not None:
+        await tombstone_collection.drop_index("deletedAt_1")
+        print("esl_tombstones: dropped the deletedAt TTL index")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_retention_fields())
@@ -0,0 +1,43 @@
+import asyncio
+from pymongo import UpdateOne
+from models.esl import esl_collection, esl_time_fields
+from models.gateway import gateway_collection, gateway_time_fields
+from models.sync_log import sync_log_collection, sync_log_time_fields
+
+BATCH_SIZE = 1000
+
+MIGRATIONS = [
+    ("esls", esl_collection, esl_time_fields),
+    ("gateways", gateway_collection, gateway_time_fields),
+    ("sync_logs", sync_log_collection, sync_log_time_fields),
+]
+
+async def migrate_collection(name, collection, time_fields):
+    """Stream the documents that still hold string time fields and convert them in batches."""
+    fields = list(time_fields.kinds)
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    ops, converted, unparsed = [], 0, 0
+    async for doc in collection.find(query, projection).batch_size(BATCH_SIZE):
+        original = {field: doc[field] for field in fields if isinstance(doc.get(field), str)}
+        # Relative values such as "2 min ago" are resolved against the time of the migration
+        encoded = time_fields.encode(dict(original))
+        changes = {field: value for field, value in encoded.items() if not isinstance(value, str)}
+        unparsed += len(original) - len(changes)
+        if changes:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if len(ops) >= BATCH_SIZE:
+            await collection.bulk_write(ops, ordered=False)
+            converted += len(ops)
+            ops = []
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+        converted += len(ops)
+    print(f"{name}: converted {converted} documents, left {unparsed} unparseable values as strings")
+
+async def migrate_time_fields():
+    for name, collection, time_fields in MIGRATIONS:
+        await migrate_collection(name, collection, time_fields)
+
+if __name__ == "__main__":
+    asyncio.run(migrate_time_fields())
@@ -1,16 +1,28 @@
+from pymongo import ASCENDING, IndexModel
 from database.mongo import db
+from database.repository import Repository
 from datetime import datetime
 
 # Get the categories collection
 category_collection = db["categories"]
+category_repository = Repository(category_collection, "Category")
+
+INDEXES = [
+    IndexModel([("name", ASCENDING)], unique=True),
+    IndexModel([("is_active", ASCENDING), ("name", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({}, [("name", ASCENDING)]),
+    ({"is_active": True}, [("name", ASCENDING)]),
+]
 
 # Create indexes for better performance
-def create_category_indexes():
-    category_collection.create_index("name", unique=True)
-    category_collection.create_index("is_active")
+async def create_category_indexes():
+    await category_collection.create_indexes(INDEXES)
 
 # Initialize default categories
-def initialize_default_categories():
+async def initialize_default_categories():
     default_categories = [
         {"name": "Beverages", "description": "Drinks and beverages", "is_active": True},
         {"name": "Dairy", "description": "Dairy products", "is_active": True},
@@ -26,8 +38,8 @@ def initialize_default_categories():
     
     for category in default_categories:
         # Check if category already exists
-        existing = category_collection.find_one({"name": category["name"]})
+        existing = await category_collection.find_one({"name": category["name"]})
         if not existing:
             category["created_at"] = datetime.utcnow()
             category["updated_at"] = datetime.utcnow()
-            category_collection.insert_one(category) 
\ No newline at end of file
+            await category_collection.insert_one(category) 
\ No newline at end of file
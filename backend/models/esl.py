@@ -1,3 +1,71 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 from database.mongo import db
+from database.repository import Repository
+from database.versions import change_versions
+from models.store import format_store, record_esl_changes
+from utils.pagination import lookup_one, serialize_doc, serialize_refs
+from utils.timefmt import RELATIVE, TIMESTAMP, TimeFields
 
-esl_collection = db["esls"] 
\ No newline at end of file
+esl_collection = db["esls"]
+
+INDEXES = [
+    IndexModel([("storeId", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("productId", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("labelSize", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("lastSync", ASCENDING)]),
+    IndexModel([("storeId", ASCENDING), ("lastSync", ASCENDING)]),
+    IndexModel([("batteryDaysRemaining", ASCENDING)]),
+    IndexModel([("storeId", ASCENDING), ("batteryDaysRemaining", ASCENDING)]),
+    IndexModel([("storeId", ASCENDING), ("changeVersion", ASCENDING), ("_id", ASCENDING)]),
+]
+
+# Filter/sort shapes issued by the routes, checked against the indexes by check_indexes.py
+QUERY_SHAPES = [
+    ({"storeId": ObjectId(), "status": ""}, [("_id", ASCENDING)]),
+    ({"storeId": ObjectId()}, [("_id", ASCENDING)]),
+    ({"status": ""}, [("_id", ASCENDING)]),
+    ({"productId": ObjectId()}, [("_id", ASCENDING)]),
+    ({"labelSize": ""}, [("_id", ASCENDING)]),
+    ({"lastSync": {"$lt": datetime(2024, 1, 1)}}, []),
+    ({"storeId": ObjectId(), "lastSync": {"$lt": datetime(2024, 1, 1)}}, []),
+    ({"batteryDaysRemaining": {"$lte": 7}}, [("batteryDaysRemaining", ASCENDING)]),
+    ({"storeId": ObjectId(), "batteryDaysRemaining": {"$lte": 7}}, [("batteryDaysRemaining", ASCENDING)]),
+    ({"storeId": ObjectId(), "changeVersion": {"$gt": 0}}, [("changeVersion", ASCENDING), ("_id", ASCENDING)]),
+]
+
+# What a label shows, and the store whose gateways drive it; writes that set none of these
+# (battery and signal readings, sync times, forecasts) keep the label's changeVersion
+DISPLAY_FIELDS = ("labelSize", "status", "productId", "productName", "storeId", "mrp", "discount", "sellingPrice")
+
+# lastSync is stored as a datetime and sent as a timestamp, with "2 min ago" in lastSyncDisplay
+esl_time_fields = TimeFields(lastSync=RELATIVE, batteryForecastAt=TIMESTAMP)
+
+def format_esl(esl: dict) -> dict:
+    esl = serialize_refs(serialize_doc(esl_time_fields.decode(esl)), "storeId", "productId")
+    # Referenced documents embedded by ?expand=true
+    if esl.get("store"):
+        esl["store"] = format_store(esl["store"])
+    if esl.get("product"):
+        esl["product"] = serialize_doc(esl["product"])
+    return esl
+
+# Receive the (before, after) pairs of every ESL write; services register their own
+esl_change_hooks = [record_esl_changes]
+
+async def record_changes(changes: list) -> None:
+    for hook in esl_change_hooks:
+        await hook(changes)
+
+esl_repository = Repository(
+    esl_collection,
+    "ESL",
+    formatter=format_esl,
+    encoder=esl_time_fields.encode,
+    on_change=record_changes,
+    lookups=lookup_one("stores", "storeId", "store") + lookup_one("products", "productId", "product"),
+    versions=change_versions,
+    versioned_fields=DISPLAY_FIELDS,
+)
\ No newline at end of file
@@ -1,3 +1,48 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 from database.mongo import db
+from database.repository import Repository
+from models.store import format_store, record_gateway_changes
+from utils.pagination import lookup_one, serialize_doc, serialize_refs
+from utils.timefmt import TIMESTAMP, UPTIME, TimeFields
 
-gateway_collection = db["gateways"] 
\ No newline at end of file
+gateway_collection = db["gateways"]
+
+INDEXES = [
+    IndexModel([("storeId", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("lastHeartbeat", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({"storeId": ObjectId()}, [("_id", ASCENDING)]),
+    ({"status": ""}, [("_id", ASCENDING)]),
+    ({"lastHeartbeat": {"$lt": datetime(2024, 1, 1)}}, []),
+]
+
+# lastHeartbeat is stored as a datetime, uptime in seconds
+gateway_time_fields = TimeFields(lastHeartbeat=TIMESTAMP, uptime=UPTIME)
+
+def format_gateway(gateway: dict) -> dict:
+    gateway = serialize_refs(serialize_doc(gateway_time_fields.decode(gateway)), "storeId")
+    # Store embedded by ?expand=true
+    if gateway.get("store"):
+        gateway["store"] = format_store(gateway["store"])
+    return gateway
+
+# Receive the (before, after) pairs of every gateway write; services register their own
+gateway_change_hooks = [record_gateway_changes]
+
+async def record_changes(changes: list) -> None:
+    for hook in gateway_change_hooks:
+        await hook(changes)
+
+gateway_repository = Repository(
+    gateway_collection,
+    "Gateway",
+    formatter=format_gateway,
+    encoder=gateway_time_fields.encode,
+    on_change=record_changes,
+    lookups=lookup_one("stores", "storeId", "store"),
+)
\ No newline at end of file
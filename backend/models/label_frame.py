@@ -0,0 +1,15 @@
+from pymongo import ASCENDING, IndexModel
+from config.settings import settings
+from database.mongo import db
+
+# Rendered label frames keyed by content hash; the base images for delta updates
+label_frame_collection = db["label_frames"]
+
+INDEXES = [
+    # Frames nobody has rendered or diffed against for this long are removed; a label whose
+    # base frame is gone just gets a full frame on its next delta request
+    IndexModel([("lastUsedAt", ASCENDING)], expireAfterSeconds=settings.LABEL_FRAME_RETENTION_DAYS * 86400),
+]
+
+# Frames are only read by _id
+QUERY_SHAPES = []
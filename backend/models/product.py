@@ -1,3 +1,26 @@
+from pymongo import ASCENDING, IndexModel
 from database.mongo import db
+from database.repository import Repository
+from database.versions import change_versions
 
-product_collection = db["products"] 
\ No newline at end of file
+product_collection = db["products"]
+
+INDEXES = [
+    IndexModel([("barcode", ASCENDING)]),
+    IndexModel([("category", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("name", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({"barcode": ""}, [("_id", ASCENDING)]),
+    ({"category": ""}, [("_id", ASCENDING)]),
+]
+
+# Receive the (before, after) pairs of single product writes; services register their own
+product_change_hooks = []
+
+async def record_changes(changes: list) -> None:
+    for hook in product_change_hooks:
+        await hook(changes)
+
+product_repository = Repository(product_collection, "Product", on_change=record_changes, versions=change_versions)
\ No newline at end of file
@@ -1,3 +1,82 @@
+import re
+from collections import defaultdict
+from typing import Callable
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from config.settings import settings
 from database.mongo import db
+from database.repository import Repository
+from utils.pagination import serialize_doc
 
-store_collection = db["stores"] 
\ No newline at end of file
+store_collection = db["stores"]
+
+INDEXES = [
+    IndexModel([("name", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("location", ASCENDING), ("_id", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({"status": ""}, [("_id", ASCENDING)]),
+    ({"location": ""}, [("_id", ASCENDING)]),
+]
+
+def generate_manager_id(manager_name: str) -> str:
+    return f"mgr-{re.sub(r'[^a-zA-Z0-9]', '', manager_name.lower())[:8]}-{str(hash(manager_name))[-4:]}"
+
+# Per-store label and gateway counters, kept current with $inc on every ESL and gateway write
+# to the store referenced by storeId
+ESL_COUNTER_FIELDS = ("eslCount", "activeEslCount", "errorEslCount", "lowBatteryEslCount")
+COUNTER_FIELDS = (*ESL_COUNTER_FIELDS, "gatewayCount")
+
+def esl_counters(esl: dict) -> dict:
+    battery = esl.get("batteryLevel")
+    return {
+        "eslCount": 1,
+        "activeEslCount": int(esl.get("status") == "active"),
+        "errorEslCount": int(esl.get("status") == "error"),
+        "lowBatteryEslCount": int(isinstance(battery, (int, float)) and battery < settings.LOW_BATTERY_THRESHOLD),
+    }
+
+def gateway_counters(gateway: dict) -> dict:
+    return {"gatewayCount": 1}
+
+def counter_deltas(changes: list, counters: Callable[[dict], dict]) -> dict:
+    """Net counter change per store id for a list of (before, after) document pairs."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in changes:
+        for doc, sign in ((before, -1), (after, 1)):
+            if doc is not None and doc.get("storeId"):
+                for field, value in counters(doc).items():
+                    deltas[doc["storeId"]][field] += sign * value
+    return deltas
+
+async def apply_counter_deltas(deltas: dict) -> None:
+    ops = []
+    for store_id, fields in deltas.items():
+        inc = {field: value for field, value in fields.items() if value}
+        if inc:
+            ops.append(UpdateOne({"_id": store_id}, {"$inc": inc}))
+    if ops:
+        await store_collection.bulk_write(ops, ordered=False)
+
+async def record_esl_changes(changes: list) -> None:
+    await apply_counter_deltas(counter_deltas(changes, esl_counters))
+
+async def record_gateway_changes(changes: list) -> None:
+    await apply_counter_deltas(counter_deltas(changes, gateway_counters))
+
+def format_store(store: dict) -> dict:
+    store = serialize_doc(store)
+    # Ensure managerId field exists (for backward compatibility)
+    if "managerId" not in store:
+        store["managerId"] = generate_manager_id(store.get("manager", "unknown"))
+    return store
+
+# Receive the (before, after) pairs of single store writes; services register their own
+store_change_hooks = []
+
+async def record_changes(changes: list) -> None:
+    for hook in store_change_hooks:
+        await hook(changes)
+
+store_repository = Repository(store_collection, "Store", formatter=format_store, on_change=record_changes)
\ No newline at end of file
@@ -1,3 +1,62 @@
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from config.settings import settings
 from database.mongo import db
+from database.repository import Repository
+from utils.pagination import serialize_doc
+from utils.timefmt import DURATION, TIMESTAMP, TimeFields
 
-sync_log_collection = db["sync_logs"] 
\ No newline at end of file
+sync_log_collection = db["sync_logs"]
+
+INDEXES = [
+    IndexModel([("syncedAt", DESCENDING)]),
+    IndexModel([("storeName", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("gatewayId", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("eslId", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("storeName", ASCENDING), ("syncedAt", DESCENDING)]),
+    IndexModel([("gatewayId", ASCENDING), ("syncedAt", DESCENDING)]),
+    IndexModel([("status", ASCENDING), ("syncedAt", DESCENDING)]),
+    # Retention: MongoDB removes entries once createdAt is older than this
+    IndexModel([("createdAt", ASCENDING)], expireAfterSeconds=settings.SYNC_LOG_RETENTION_DAYS * 86400),
+]
+
+# Exports stream in syncedAt order, which every syncedAt index below provides for the export filters
+EXPORT_SORT = [("syncedAt", ASCENDING)]
+
+QUERY_SHAPES = [
+    ({"storeName": ""}, [("_id", ASCENDING)]),
+    ({"gatewayId": ""}, [("_id", ASCENDING)]),
+    ({"eslId": ""}, [("_id", ASCENDING)]),
+    ({"status": ""}, [("_id", ASCENDING)]),
+    ({"syncedAt": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({"storeName": "", "syncedAt": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({"gatewayId": "", "syncedAt": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({"status": "", "syncedAt": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({}, EXPORT_SORT),
+    ({"syncedAt": {"$gte": datetime(2024, 1, 1)}}, EXPORT_SORT),
+    ({"storeName": "", "syncedAt": {"$gte": datetime(2024, 1, 1)}}, EXPORT_SORT),
+    ({"gatewayId": ""}, EXPORT_SORT),
+    ({"status": "", "syncedAt": {"$gte": datetime(2024, 1, 1)}}, EXPORT_SORT),
+]
+
+# syncedAt is stored as a datetime, duration in seconds
+sync_log_time_fields = TimeFields(syncedAt=TIMESTAMP, duration=DURATION)
+
+def format_sync_log(log: dict) -> dict:
+    return serialize_doc(sync_log_time_fields.decode(log))
+
+# Receive the (before, after) pairs of sync log writes, including batched ingestion
+sync_log_change_hooks = []
+
+async def record_changes(changes: list) -> None:
+    for hook in sync_log_change_hooks:
+        await hook(changes)
+
+sync_log_repository = Repository(
+    sync_log_collection,
+    "Sync log",
+    formatter=format_sync_log,
+    encoder=sync_log_time_fields.encode,
+    on_change=record_changes,
+)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+from database.mongo import db
+
+# Per (storeName, gatewayId, hour) sync counters, maintained as sync logs are ingested
+sync_rollup_collection = db["sync_rollups"]
+
+INDEXES = [
+    IndexModel([("storeName", ASCENDING), ("gatewayId", ASCENDING), ("hour", ASCENDING)], unique=True),
+    IndexModel([("gatewayId", ASCENDING), ("hour", ASCENDING)]),
+    IndexModel([("hour", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({"hour": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({"storeName": "", "hour": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({"gatewayId": "", "hour": {"$gte": datetime(2024, 1, 1)}}, []),
+]
@@ -0,0 +1,24 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from config.settings import settings
+from database.mongo import db
+
+# Battery and signal history, one document per label and UTC day holding parallel
+# t/battery/signal arrays; raw readings are downsampled to hourly means after a few days
+telemetry_collection = db["esl_telemetry"]
+
+RAW, HOURLY = "raw", "hourly"
+
+INDEXES = [
+    IndexModel([("eslId", ASCENDING), ("day", ASCENDING)], unique=True),
+    IndexModel([("resolution", ASCENDING), ("day", ASCENDING)]),
+    # Retention: MongoDB removes a day once it is older than this
+    IndexModel([("day", ASCENDING)], expireAfterSeconds=settings.TELEMETRY_RETENTION_DAYS * 86400),
+]
+
+QUERY_SHAPES = [
+    ({"eslId": ObjectId(), "day": {"$gte": datetime(2024, 1, 1)}}, []),
+    ({"resolution": RAW, "day": {"$lt": datetime(2024, 1, 1)}}, []),
+    ({"day": {"$gte": datetime(2024, 1, 1)}}, []),
+]
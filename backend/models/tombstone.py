@@ -0,0 +1,18 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from database.mongo import db
+
+# One document per label that left a store (deleted or moved to another store),
+# carrying the change version of its removal so gateways can drop it
+tombstone_collection = db["esl_tombstones"]
+
+INDEXES = [
+    IndexModel([("storeId", ASCENDING), ("changeVersion", ASCENDING), ("_id", ASCENDING)]),
+    # Retention is enforced by the change feed's purge job, which records what it removed
+    IndexModel([("deletedAt", ASCENDING), ("changeVersion", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({"storeId": ObjectId(), "changeVersion": {"$gt": 0}}, [("changeVersion", ASCENDING), ("_id", ASCENDING)]),
+]
@@ -1,3 +1,23 @@
+from pymongo import ASCENDING, IndexModel
+from config.settings import settings
 from database.mongo import db
+from database.repository import Repository
+from utils.cache import TTLCache
 
-user_collection = db["users"] 
\ No newline at end of file
+user_collection = db["users"]
+
+INDEXES = [
+    IndexModel([("email", ASCENDING)], unique=True),
+    IndexModel([("role", ASCENDING), ("_id", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+]
+
+QUERY_SHAPES = [
+    ({"email": ""}, None),
+    ({"role": ""}, [("_id", ASCENDING)]),
+    ({"status": ""}, [("_id", ASCENDING)]),
+]
+user_repository = Repository(user_collection, "User", projection={"hashed_password": 0})
+
+# Authenticated user records keyed by the JWT "sub" claim; invalidated on user writes
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
\ No newline at end of file
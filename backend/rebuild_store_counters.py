@@ -0,0 +1,9 @@
+import asyncio
+from services.store_counters import rebuild_store_counters
+
+async def main():
+    result = await rebuild_store_counters()
+    print(f"Rebuilt counters for {result['stores']} stores")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+import asyncio
+from models.sync_log import sync_log_collection
+from models.sync_rollup import sync_rollup_collection
+from services.sync_rollups import record_rollups
+
+BATCH_SIZE = 5000
+
+async def rebuild_sync_rollups():
+    """Recompute the hourly sync rollups from the sync logs still in the collection."""
+    await sync_rollup_collection.delete_many({})
+    projection = {"storeName": 1, "gatewayId": 1, "status": 1, "syncedAt": 1, "duration": 1, "createdAt": 1}
+    batch, processed = [], 0
+    async for log in sync_log_collection.find({}, projection).batch_size(BATCH_SIZE):
+        batch.append(log)
+        if len(batch) >= BATCH_SIZE:
+            await record_rollups(batch)
+            processed += len(batch)
+            batch = []
+    await record_rollups(batch)
+    processed += len(batch)
+    print(f"Rebuilt sync rollups from {processed} sync logs")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_sync_rollups())
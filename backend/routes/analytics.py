@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Query
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta
+from models.sync_rollup import sync_rollup_collection
+from services.sync_rollups import summarize_rollups
+from utils.pagination import build_filters
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+DEFAULT_WINDOW = timedelta(hours=24)
+
+@router.get("/sync-health")
+async def get_sync_health(
+    groupBy: List[Literal["store", "gateway", "hour"]] = Query(["store"]),
+    storeName: Optional[str] = None,
+    gatewayId: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    sortBy: Optional[Literal["total", "errorCount", "successRate", "p50", "p95", "p99"]] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """Success rate, error counts and duration percentiles from the hourly sync rollups.
+
+    Covers the last 24 hours unless ``since``/``until`` are given. ``sortBy``
+    orders groups descending, e.g. ``groupBy=gateway&sortBy=p95`` for the slowest gateways.
+    """
+    query = build_filters(storeName=storeName, gatewayId=gatewayId)
+    hour_range = {"$gte": since or datetime.utcnow() - DEFAULT_WINDOW}
+    if until:
+        hour_range["$lt"] = until
+    query["hour"] = hour_range
+    docs = [doc async for doc in sync_rollup_collection.find(query, {"_id": 0})]
+    rows = summarize_rollups(docs, list(dict.fromkeys(groupBy)))
+    if sortBy:
+        rows.sort(key=lambda row: (row[sortBy] is not None, row[sortBy] or 0), reverse=True)
+    return rows[:limit] if limit else rows
@@ -1,15 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from models.user import user_collection
+from models.user import user_cache, user_collection
 from schemas.auth import Token, UserLogin, UserRegister
-from utils.auth import verify_password, create_access_token, verify_token, get_password_hash
+from utils.auth import create_access_token, password_hasher, verify_token
 from bson import ObjectId
 from datetime import datetime
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     payload = verify_token(token)
     if payload is None:
@@ -19,21 +19,29 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    user = user_collection.find_one({"_id": ObjectId(user_id)})
+    user = user_cache.get(user_id)
     if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
+        # Taken before the read, so a user update that lands meanwhile keeps this copy out of the cache
+        generation = user_cache.generation()
+        user = await user_collection.find_one({"_id": ObjectId(user_id)})
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        user_cache.set(user_id, user, generation=generation)
+    
+    if not user.get("is_active", True):
+        raise HTTPException(status_code=401, detail="Account is deactivated")
     
     return user
 
 @router.post("/register", response_model=Token)
-def register(user_data: UserRegister):
+async def register(user_data: UserRegister):
     # Check if user already exists
-    existing_user = user_collection.find_one({"email": user_data.email})
+    existing_user = await user_collection.find_one({"email": user_data.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     user_doc = {
         "email": user_data.email,
         "hashed_password": hashed_password,
@@ -43,7 +51,7 @@ def register(user_data: UserRegister):
         "is_active": True
     }
     
-    result = user_collection.insert_one(user_doc)
+    result = await user_collection.insert_one(user_doc)
     user_doc["_id"] = result.inserted_id
     
     # Generate token
@@ -51,12 +59,12 @@ def register(user_data: UserRegister):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin):
-    user = user_collection.find_one({"email": user_credentials.email})
+async def login(user_credentials: UserLogin):
+    user = await user_collection.find_one({"email": user_credentials.email})
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
-    if not verify_password(user_credentials.password, user.get("hashed_password", "")):
+    if not await password_hasher.verify(user_credentials.password, user.get("hashed_password", "")):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
     if not user.get("is_active", True):
@@ -66,7 +74,7 @@ def login(user_credentials: UserLogin):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me")
-def get_current_user_info(current_user = Depends(get_current_user)):
+async def get_current_user_info(current_user = Depends(get_current_user)):
     return {
         "id": str(current_user["_id"]),
         "email": current_user["email"],
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from models.esl import esl_collection
+from services.dispatcher import REFRESH, dispatcher
+from services.references import esl_references
+
+router = APIRouter(prefix="/dispatch", tags=["Dispatch"])
+
+def running_dispatcher():
+    if not dispatcher.running:
+        raise HTTPException(status_code=503, detail="Label dispatch is not enabled")
+    return dispatcher
+
+@router.post("/refresh", status_code=202)
+async def refresh_store(storeId: Optional[str] = None, storeName: Optional[str] = None):
+    """Queue a low-priority refresh of every label in a store."""
+    if storeId is None and storeName is None:
+        raise HTTPException(status_code=400, detail="storeId or storeName is required")
+    running = running_dispatcher()
+    query = await esl_references.filters(storeId=storeId, storeName=storeName)
+    running.ensure_capacity(await esl_collection.count_documents(query))
+    projection = {"storeId": 1, "storeName": 1, "productName": 1}
+    labels = [label async for label in esl_collection.find(query, projection)]
+    return {"queued": running.enqueue(labels, REFRESH)}
+
+@router.get("/gateways")
+async def get_dispatch_lanes():
+    """Queue depth, sends in flight and rate-limit tokens of each gateway."""
+    return [
+        {
+            "gatewayId": str(lane.gateway_id),
+            "storeId": str(lane.store_id) if lane.store_id else None,
+            "status": lane.status,
+            "queued": len(lane.jobs),
+            "inFlight": lane.in_flight,
+            "tokens": round(lane.bucket.tokens, 2),
+        }
+        for lane in running_dispatcher().lanes.values()
+    ]
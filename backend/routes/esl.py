@@ -1,50 +1,165 @@
-from fastapi import APIRouter, HTTPException
-from models.esl import esl_collection
-from schemas.esl import ESL, ESLCreate, ESLUpdate
-from bson import ObjectId
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from typing import Literal, Optional
+from datetime import datetime, timedelta
+from database.versions import change_versions
+from models.esl import DISPLAY_FIELDS, esl_collection, esl_repository, esl_time_fields, format_esl, record_changes
+from schemas.esl import ESL, ESLBase, ESLCreate, ESLUpdate
+from schemas.bulk import BulkResult
+from services.label_delta import ENCODING_NAMES, encode_delta
+from services.label_renderer import RENDER_PROJECTION, label_renderer
+from services.references import esl_references
+from services.telemetry import read_history
+from utils.export import export_cursor, export_response, id_range_filter
+from utils.bulk import bulk_create, bulk_delete, bulk_update, read_bulk_items
+from utils.pagination import MAX_PAGE_SIZE, build_filters, range_filter
 
 router = APIRouter(prefix="/esls", tags=["ESL"])
 
 @router.get("/", response_model=list[ESL])
-def get_esls():
-    esls = list(esl_collection.find())
-    formatted_esls = []
-    for e in esls:
-        e["id"] = str(e["_id"])
-        del e["_id"]
-        formatted_esls.append(e)
-    return formatted_esls
+async def get_esls(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+    productId: Optional[str] = None,
+    productName: Optional[str] = None,
+    labelSize: Optional[str] = None,
+    syncedBefore: Optional[datetime] = None,
+    expand: bool = False,
+):
+    filters = await esl_references.filters(
+        storeId=storeId, storeName=storeName, productId=productId, productName=productName
+    )
+    filters.update(build_filters(status=status, labelSize=labelSize))
+    filters.update(range_filter("lastSync", until=syncedBefore))
+    return await esl_repository.list_page(response, filters, after, limit, expand)
+
+@router.get("/export")
+async def export_esls(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    query = await esl_references.filters(storeId=storeId, storeName=storeName)
+    query.update(build_filters(status=status))
+    query.update(id_range_filter(since, until))
+    fields = ["id", *ESLBase.model_fields]
+    return export_response(export_cursor(esl_collection, query), fmt, fields, "esls", gzip, format_esl)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_esls(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_create(
+        esl_collection, items, ESLCreate, esl_time_fields.encode, record_changes, esl_references.resolve,
+        versions=change_versions,
+    )
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_esls(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_update(
+        esl_collection, items, ESLUpdate, esl_time_fields.encode, record_changes, esl_references.resolve_partial,
+        versions=change_versions, versioned_fields=DISPLAY_FIELDS,
+    )
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_esls(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_delete(esl_collection, items, record_changes)
+
+@router.post("/render")
+async def render_store_esls(
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    bitsPerPixel: int = Query(1, ge=1, le=2),
+):
+    query = await esl_references.filters(storeId=storeId, storeName=storeName)
+    if "storeId" not in query:
+        raise HTTPException(status_code=400, detail="storeId or storeName is required")
+    return await label_renderer.render_store(query["storeId"], bitsPerPixel)
+
+async def render_esl_label(esl_id: str, bits_per_pixel: int):
+    doc = await esl_collection.find_one({"_id": esl_repository.object_id(esl_id)}, RENDER_PROJECTION)
+    if doc is None:
+        raise esl_repository.not_found()
+    try:
+        label = label_renderer.render_esl(doc, bits_per_pixel)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await label_renderer.persist()
+    return label
+
+def label_headers(label) -> dict:
+    return {
+        "ETag": f'"{label.content_hash}"',
+        "X-Label-Width": str(label.width),
+        "X-Label-Height": str(label.height),
+        "X-Bits-Per-Pixel": str(label.bits_per_pixel),
+    }
+
+@router.get("/{esl_id}/image")
+async def get_esl_image(
+    esl_id: str,
+    bitsPerPixel: int = Query(1, ge=1, le=2),
+    if_none_match: Optional[str] = Header(None),
+):
+    label = await render_esl_label(esl_id, bitsPerPixel)
+    headers = label_headers(label)
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers={"ETag": headers["ETag"]})
+    return Response(content=label.data, media_type="application/octet-stream", headers=headers)
+
+@router.get("/{esl_id}/image/delta")
+async def get_esl_image_delta(
+    esl_id: str,
+    base: Optional[str] = None,
+    bitsPerPixel: int = Query(1, ge=1, le=2),
+):
+    """Update payload relative to the frame the label shows now (``base`` is that frame's ETag).
+
+    The first byte of the body is the encoding (0 full, 1 rects, 2 rle), also
+    given in ``X-Frame-Encoding``; unknown bases fall back to a full frame.
+    """
+    label = await render_esl_label(esl_id, bitsPerPixel)
+    headers = label_headers(label)
+    base = base.strip('"') if base else None
+    if base == label.content_hash:
+        return Response(status_code=304, headers={"ETag": headers["ETag"]})
+    previous = await label_renderer.load_frame(base) if base else None
+    if previous is not None and previous.bits_per_pixel == label.bits_per_pixel:
+        payload = encode_delta(previous.data, label.data, label.height)
+        headers["X-Base-Hash"] = base
+    else:
+        payload = encode_delta(None, label.data, label.height)
+    headers["X-Frame-Encoding"] = ENCODING_NAMES[payload[0]]
+    return Response(content=payload, media_type="application/octet-stream", headers=headers)
+
+@router.get("/{esl_id}/telemetry")
+async def get_esl_telemetry(esl_id: str, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Battery and signal readings, raw for recent days and hourly means before that (last 7 days by default)."""
+    since = since or datetime.utcnow() - timedelta(days=7)
+    return await read_history(esl_repository.object_id(esl_id), since, until)
 
 @router.get("/{esl_id}", response_model=ESL)
-def get_esl(esl_id: str):
-    esl = esl_collection.find_one({"_id": ObjectId(esl_id)})
-    if not esl:
-        raise HTTPException(status_code=404, detail="ESL not found")
-    esl["id"] = str(esl["_id"])
-    del esl["_id"]
-    return esl
+async def get_esl(esl_id: str, expand: bool = False):
+    return await esl_repository.get(esl_id, expand)
 
 @router.post("/", response_model=ESL)
-def create_esl(esl: ESLCreate):
-    result = esl_collection.insert_one(esl.dict())
-    new_esl = esl_collection.find_one({"_id": result.inserted_id})
-    new_esl["id"] = str(new_esl["_id"])
-    del new_esl["_id"]
-    return new_esl
+async def create_esl(esl: ESLCreate):
+    return await esl_repository.create(await esl_references.resolve_one(esl.dict()))
 
 @router.put("/{esl_id}", response_model=ESL)
-def update_esl(esl_id: str, esl: ESLUpdate):
-    result = esl_collection.update_one({"_id": ObjectId(esl_id)}, {"$set": esl.dict()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="ESL not found")
-    updated_esl = esl_collection.find_one({"_id": ObjectId(esl_id)})
-    updated_esl["id"] = str(updated_esl["_id"])
-    del updated_esl["_id"]
-    return updated_esl
+async def update_esl(esl_id: str, esl: ESLUpdate):
+    fields = await esl_references.resolve_one(esl.dict(exclude_unset=True), required=False)
+    return await esl_repository.update(esl_id, fields)
 
 @router.delete("/{esl_id}")
-def delete_esl(esl_id: str):
-    result = esl_collection.delete_one({"_id": ObjectId(esl_id)})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="ESL not found")
-    return {"message": "ESL deleted"} 
\ No newline at end of file
+async def delete_esl(esl_id: str):
+    await esl_repository.delete(esl_id)
+    return {"message": "ESL deleted"}
\ No newline at end of file
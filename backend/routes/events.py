@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from bson import ObjectId
+from services.events import EVENT_TYPES, event_bus
+from services.references import store_resolver
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+@router.get("/stream")
+async def stream_events(
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    types: Optional[str] = Query(None, description="Comma-separated subset of esl, gateway, syncLog"),
+    lastEventId: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-Sent Events feed of ESL, gateway and sync log changes, optionally for one store.
+
+    Reconnecting clients resume after ``Last-Event-ID`` (sent automatically by
+    ``EventSource``) or ``lastEventId``. A ``reset`` event means some changes
+    could not be replayed and the client should re-fetch its lists.
+    """
+    wanted = frozenset(types.split(",")) if types else frozenset(EVENT_TYPES)
+    unknown = wanted.difference(EVENT_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+
+    store_id = None
+    if storeId is not None:
+        if not ObjectId.is_valid(storeId):
+            raise HTTPException(status_code=400, detail="Invalid storeId")
+        store_id = ObjectId(storeId)
+        storeName = (await store_resolver.names_for([store_id])).get(store_id)
+        if storeName is None:
+            raise HTTPException(status_code=404, detail="Store not found")
+    elif storeName is not None:
+        store_id = (await store_resolver.ids_for([storeName])).get(storeName)
+        if store_id is None:
+            raise HTTPException(status_code=404, detail="Store not found")
+
+    subscription = event_bus.subscribe(str(store_id) if store_id else None, storeName, wanted)
+    return StreamingResponse(
+        event_bus.stream(subscription, last_event_id or lastEventId),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Literal, Optional
+from bson import ObjectId
+from models.esl import esl_collection
+from services.battery_forecast import battery_forecaster
+from services.fleet_index import fleet_index
+from services.references import esl_references
+
+router = APIRouter(prefix="/fleet", tags=["Fleet"])
+
+LevelField = Literal["batteryLevel", "signalStrength"]
+
+async def fleet_mask(storeId, storeName, status, batteryBelow, signalBelow):
+    snapshot = fleet_index.ready()
+    store_id = None
+    if storeId is not None or storeName is not None:
+        store_id = (await esl_references.filters(storeId=storeId, storeName=storeName))["storeId"]
+        if not isinstance(store_id, ObjectId):
+            raise HTTPException(status_code=404, detail="Store not found")
+    return snapshot, snapshot.mask(store_id, status, batteryBelow, signalBelow)
+
+@router.get("/esls")
+async def filter_esls(
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+    batteryBelow: Optional[int] = None,
+    signalBelow: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=10000),
+):
+    """Labels matching the filters, e.g. ``?storeName=...&batteryBelow=20``, with the total match count."""
+    snapshot, mask = await fleet_mask(storeId, storeName, status, batteryBelow, signalBelow)
+    rows = mask.nonzero()[0]
+    return {"total": len(rows), "esls": snapshot.describe(rows[:limit])}
+
+@router.get("/histogram")
+async def get_histogram(
+    field: LevelField = "signalStrength",
+    bucketSize: int = Query(10, ge=1, le=100),
+    groupBy: Optional[Literal["store"]] = None,
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """Label counts per ``bucketSize`` wide bucket of ``field``, optionally one histogram per store."""
+    snapshot, mask = await fleet_mask(storeId, storeName, status, None, None)
+    return {"field": field, "bucketSize": bucketSize, **snapshot.histogram(field, mask, bucketSize, groupBy == "store")}
+
+@router.get("/top")
+async def get_top(
+    field: LevelField = "batteryLevel",
+    order: Literal["lowest", "highest"] = "lowest",
+    k: int = Query(100, ge=1, le=10000),
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """The ``k`` labels with the lowest (default) or highest ``field``, e.g. the 100 weakest batteries."""
+    snapshot, mask = await fleet_mask(storeId, storeName, status, None, None)
+    return {"field": field, "order": order, "esls": snapshot.describe(snapshot.top(field, mask, k, order == "highest"))}
+
+@router.get("/battery-swaps")
+async def get_battery_swaps(
+    withinDays: float = Query(7, gt=0),
+    storeId: Optional[str] = None,
+    storeName: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """Labels forecast to run flat within ``withinDays``, grouped by store, soonest first."""
+    query = await esl_references.filters(storeId=storeId, storeName=storeName)
+    query["batteryDaysRemaining"] = {"$lte": withinDays}
+    projection = {"storeId": 1, "storeName": 1, "productName": 1, "batteryLevel": 1, "batteryDaysRemaining": 1}
+    stores = {}
+    async for esl in esl_collection.find(query, projection).sort("batteryDaysRemaining", 1).limit(limit):
+        store = stores.setdefault(esl.get("storeId"), {
+            "storeId": str(esl["storeId"]) if esl.get("storeId") else None,
+            "storeName": esl.get("storeName"),
+            "esls": [],
+        })
+        store["esls"].append({
+            "id": str(esl["_id"]),
+            "productName": esl.get("productName"),
+            "batteryLevel": esl.get("batteryLevel"),
+            "batteryDaysRemaining": esl.get("batteryDaysRemaining"),
+        })
+    return list(stores.values())
+
+@router.post("/forecast")
+async def run_forecast():
+    """Run the battery forecast now instead of waiting for the next scheduled run."""
+    return await battery_forecaster.run()
@@ -1,50 +1,91 @@
-from fastapi import APIRouter, HTTPException
-from models.gateway import gateway_collection
-from schemas.gateway import Gateway, GatewayCreate, GatewayUpdate
-from bson import ObjectId
+from fastapi import APIRouter, Query, Request, Response
+from typing import Optional
+from datetime import datetime
+from models.gateway import gateway_collection, gateway_repository, gateway_time_fields, record_changes
+from schemas.gateway import Gateway, GatewayCreate, GatewayHeartbeat, GatewayUpdate
+from schemas.bulk import BulkResult
+from services.change_feed import changes_since
+from services.heartbeat import heartbeat_buffer
+from services.references import gateway_references
+from utils.bulk import bulk_create, bulk_delete, bulk_update, read_bulk_items
+from utils.pagination import MAX_PAGE_SIZE, build_filters, range_filter
 
 router = APIRouter(prefix="/gateways", tags=["Gateways"])
 
 @router.get("/", response_model=list[Gateway])
-def get_gateways():
-    gateways = list(gateway_collection.find())
-    formatted_gateways = []
-    for g in gateways:
-        g["id"] = str(g["_id"])
-        del g["_id"]
-        formatted_gateways.append(g)
-    return formatted_gateways
+async def get_gateways(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    storeName: Optional[str] = None,
+    storeId: Optional[str] = None,
+    status: Optional[str] = None,
+    heartbeatBefore: Optional[datetime] = None,
+    expand: bool = False,
+):
+    filters = await gateway_references.filters(storeId=storeId, storeName=storeName)
+    filters.update(build_filters(status=status))
+    filters.update(range_filter("lastHeartbeat", until=heartbeatBefore))
+    return await gateway_repository.list_page(response, filters, after, limit, expand)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_gateways(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_create(
+        gateway_collection, items, GatewayCreate, gateway_time_fields.encode, record_changes,
+        gateway_references.resolve,
+    )
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_gateways(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_update(
+        gateway_collection, items, GatewayUpdate, gateway_time_fields.encode, record_changes,
+        gateway_references.resolve_partial,
+    )
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_gateways(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_delete(gateway_collection, items, record_changes)
+
+@router.post("/{gateway_id}/heartbeat", status_code=202)
+async def record_heartbeat(gateway_id: str, heartbeat: GatewayHeartbeat):
+    """Buffer a heartbeat; it reaches the gateway document on the next flush."""
+    fields = gateway_time_fields.encode(heartbeat.dict(exclude={"syncCount", "errorCount"}, exclude_none=True))
+    fields["lastHeartbeat"] = datetime.utcnow()
+    counters = {k: v for k, v in (("syncCount", heartbeat.syncCount), ("errorCount", heartbeat.errorCount)) if v}
+    heartbeat_buffer.record(gateway_repository.object_id(gateway_id), fields, counters)
+    return {"message": "Heartbeat accepted"}
+
+@router.get("/{gateway_id}/changes")
+async def get_gateway_changes(
+    gateway_id: str,
+    since: str = "0",
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Labels of the gateway's store changed or removed after the ``since`` checkpoint.
+
+    Start from ``0``; pass back the returned ``checkpoint`` and repeat while ``hasMore``.
+    """
+    gateway = await gateway_collection.find_one({"_id": gateway_repository.object_id(gateway_id)}, {"storeId": 1})
+    if gateway is None:
+        raise gateway_repository.not_found()
+    return await changes_since(gateway.get("storeId"), since, limit)
 
 @router.get("/{gateway_id}", response_model=Gateway)
-def get_gateway(gateway_id: str):
-    gateway = gateway_collection.find_one({"_id": ObjectId(gateway_id)})
-    if not gateway:
-        raise HTTPException(status_code=404, detail="Gateway not found")
-    gateway["id"] = str(gateway["_id"])
-    del gateway["_id"]
-    return gateway
+async def get_gateway(gateway_id: str, expand: bool = False):
+    return await gateway_repository.get(gateway_id, expand)
 
 @router.post("/", response_model=Gateway)
-def create_gateway(gateway: GatewayCreate):
-    result = gateway_collection.insert_one(gateway.dict())
-    new_gateway = gateway_collection.find_one({"_id": result.inserted_id})
-    new_gateway["id"] = str(new_gateway["_id"])
-    del new_gateway["_id"]
-    return new_gateway
+async def create_gateway(gateway: GatewayCreate):
+    return await gateway_repository.create(await gateway_references.resolve_one(gateway.dict()))
 
 @router.put("/{gateway_id}", response_model=Gateway)
-def update_gateway(gateway_id: str, gateway: GatewayUpdate):
-    result = gateway_collection.update_one({"_id": ObjectId(gateway_id)}, {"$set": gateway.dict()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Gateway not found")
-    updated_gateway = gateway_collection.find_one({"_id": ObjectId(gateway_id)})
-    updated_gateway["id"] = str(updated_gateway["_id"])
-    del updated_gateway["_id"]
-    return updated_gateway
+async def update_gateway(gateway_id: str, gateway: GatewayUpdate):
+    return await gateway_repository.update(gateway_id, await gateway_references.resolve_one(gateway.dict()))
 
 @router.delete("/{gateway_id}")
-def delete_gateway(gateway_id: str):
-    result = gateway_collection.delete_one({"_id": ObjectId(gateway_id)})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Gateway not found")
-    return {"message": "Gateway deleted"} 
\ No newline at end of file
+async def delete_gateway(gateway_id: str):
+    await gateway_repository.delete(gateway_id)
+    return {"message": "Gateway deleted"}
\ No newline at end of file
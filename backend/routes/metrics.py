@@ -0,0 +1,37 @@
+from fastapi import APIRouter
+from database.versions import change_versions
+from models.user import user_cache
+from services.battery_forecast import battery_forecaster
+from services.change_feed import tombstone_purger
+from services.dispatcher import dispatcher
+from services.events import event_bus
+from services.fleet_index import fleet_index
+from services.heartbeat import heartbeat_buffer
+from services.label_renderer import label_renderer
+from services.price_propagation import price_propagator
+from services.references import product_resolver, store_resolver
+from services.sync_log_writer import sync_log_writer
+from services.telemetry import telemetry_recorder
+from utils.auth import password_hasher, token_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/")
+async def get_metrics():
+    return {
+        "userCache": user_cache.stats(),
+        "tokenCache": token_cache.stats(),
+        "passwordHasher": password_hasher.stats(),
+        "pricePropagation": price_propagator.stats(),
+        "labelRenderer": label_renderer.stats(),
+        "heartbeats": heartbeat_buffer.stats(),
+        "syncLogWriter": sync_log_writer.stats(),
+        "fleetIndex": fleet_index.stats(),
+        "telemetry": telemetry_recorder.stats(),
+        "batteryForecast": battery_forecaster.stats(),
+        "events": event_bus.stats(),
+        "changeVersions": change_versions.stats(),
+        "tombstonePurge": tombstone_purger.stats(),
+        "dispatcher": dispatcher.stats(),
+        "referenceCache": {"stores": store_resolver.stats(), "products": product_resolver.stats()},
+    }
\ No newline at end of file
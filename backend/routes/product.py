@@ -1,44 +1,62 @@
-from fastapi import APIRouter, HTTPException
-from models.product import product_collection
+from fastapi import APIRouter, Query, Request, Response
+from typing import Optional
+from database.versions import change_versions
+from models.product import product_collection, product_repository, record_changes
 from schemas.product import Product, ProductCreate, ProductUpdate
-from bson import ObjectId
+from schemas.bulk import BulkResult
+from utils.bulk import bulk_create, bulk_delete, bulk_update, read_bulk_items
+from utils.pagination import MAX_PAGE_SIZE, build_filters
+from services.price_propagation import PRICE_FIELDS, price_propagator
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 @router.get("/", response_model=list[Product])
-def get_products():
-    products = list(product_collection.find())
-    for p in products:
-        p["id"] = str(p["_id"])
-    return products
+async def get_products(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    barcode: Optional[str] = None,
+):
+    filters = build_filters(category=category, barcode=barcode)
+    return await product_repository.list_page(response, filters, after, limit)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_products(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_create(product_collection, items, ProductCreate, versions=change_versions)
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_products(request: Request):
+    items = await read_bulk_items(request)
+    # The change hooks apply renames from the before documents
+    result = await bulk_update(product_collection, items, ProductUpdate, on_change=record_changes, versions=change_versions)
+    price_propagator.enqueue(
+        r["id"] for r in result["results"]
+        if r["status"] == "updated" and any(field in items[r["index"]] for field in PRICE_FIELDS)
+    )
+    return result
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_products(request: Request):
+    items = await read_bulk_items(request)
+    return await bulk_delete(product_collection, items, on_change=record_changes)
 
 @router.get("/{product_id}", response_model=Product)
-def get_product(product_id: str):
-    product = product_collection.find_one({"_id": ObjectId(product_id)})
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    product["id"] = str(product["_id"])
-    return product
+async def get_product(product_id: str):
+    return await product_repository.get(product_id)
 
 @router.post("/", response_model=Product)
-def create_product(product: ProductCreate):
-    result = product_collection.insert_one(product.dict())
-    new_product = product_collection.find_one({"_id": result.inserted_id})
-    new_product["id"] = str(new_product["_id"])
-    return new_product
+async def create_product(product: ProductCreate):
+    return await product_repository.create(product.dict())
 
 @router.put("/{product_id}", response_model=Product)
-def update_product(product_id: str, product: ProductUpdate):
-    result = product_collection.update_one({"_id": ObjectId(product_id)}, {"$set": product.dict()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    updated_product = product_collection.find_one({"_id": ObjectId(product_id)})
-    updated_product["id"] = str(updated_product["_id"])
+async def update_product(product_id: str, product: ProductUpdate):
+    updated_product = await product_repository.update(product_id, product.dict())
+    price_propagator.enqueue([updated_product["id"]])
     return updated_product
 
 @router.delete("/{product_id}")
-def delete_product(product_id: str):
-    result = product_collection.delete_one({"_id": ObjectId(product_id)})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return {"message": "Product deleted"} 
\ No newline at end of file
+async def delete_product(product_id: str):
+    await product_repository.delete(product_id)
+    return {"message": "Product deleted"}
\ No newline at end of file
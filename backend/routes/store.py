@@ -1,109 +1,50 @@
-from fastapi import APIRouter, HTTPException
-from models.store import store_collection
+from fastapi import APIRouter, Query, Response
+from typing import Optional
+from models.store import COUNTER_FIELDS, generate_manager_id, store_repository
 from schemas.store import Store, StoreCreate, StoreUpdate
-from bson import ObjectId
+from services.store_counters import rebuild_store_counters
+from utils.pagination import MAX_PAGE_SIZE, build_filters
 
 router = APIRouter(prefix="/stores", tags=["Stores"])
 
 @router.get("/", response_model=list[Store])
-def get_stores():
-    stores = list(store_collection.find())
-    for s in stores:
-        s["id"] = str(s["_id"])
-        # Remove the _id field to avoid conflicts with the response model
-        s.pop("_id", None)
-        # Ensure managerId field exists (for backward compatibility)
-        if "managerId" not in s:
-            import re
-            manager_name = s.get("manager", "unknown")
-            s["managerId"] = f"mgr-{re.sub(r'[^a-zA-Z0-9]', '', manager_name.lower())[:8]}-{str(hash(manager_name))[-4:]}"
-    return stores
+async def get_stores(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+):
+    filters = build_filters(status=status, location=location)
+    return await store_repository.list_page(response, filters, after, limit)
+
+@router.post("/rebuild-counters")
+async def rebuild_counters():
+    """Recompute every store's ESL and gateway counters from scratch."""
+    return await rebuild_store_counters()
 
 @router.get("/{store_id}", response_model=Store)
-def get_store(store_id: str):
-    try:
-        object_id = ObjectId(store_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid store ID format")
-    
-    store = store_collection.find_one({"_id": object_id})
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    store["id"] = str(store["_id"])
-    # Remove the _id field to avoid conflicts with the response model
-    store.pop("_id", None)
-    # Ensure managerId field exists (for backward compatibility)
-    if "managerId" not in store:
-        import re
-        manager_name = store.get("manager", "unknown")
-        store["managerId"] = f"mgr-{re.sub(r'[^a-zA-Z0-9]', '', manager_name.lower())[:8]}-{str(hash(manager_name))[-4:]}"
-    return store
+async def get_store(store_id: str):
+    return await store_repository.get(store_id)
 
 @router.post("/", response_model=Store)
-def create_store(store: StoreCreate):
-    # Auto-generate managerId based on manager name
-    import re
-    manager_id = f"mgr-{re.sub(r'[^a-zA-Z0-9]', '', store.manager.lower())[:8]}-{str(hash(store.manager))[-4:]}"
-    
+async def create_store(store: StoreCreate):
     store_data = store.model_dump()
-    store_data["managerId"] = manager_id
-    
-    result = store_collection.insert_one(store_data)
-    new_store = store_collection.find_one({"_id": result.inserted_id})
-    new_store["id"] = str(new_store["_id"])
-    # Remove the _id field to avoid conflicts with the response model
-    new_store.pop("_id", None)
-    return new_store
+    # Auto-generate managerId based on manager name
+    store_data["managerId"] = generate_manager_id(store.manager)
+    # Nothing can reference the new store's id yet
+    store_data.update(dict.fromkeys(COUNTER_FIELDS, 0))
+    return await store_repository.create(store_data)
 
 @router.put("/{store_id}", response_model=Store)
-def update_store(store_id: str, store: StoreUpdate):
-    try:
-        # Validate ObjectId format
-        object_id = ObjectId(store_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid store ID format")
-    
-    # Get the current store data to check if manager has changed
-    current_store = store_collection.find_one({"_id": object_id})
-    if not current_store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    
-    # Prepare update data
+async def update_store(store_id: str, store: StoreUpdate):
     update_data = store.model_dump(exclude_unset=True)
-    
     # If manager is being updated, regenerate managerId
-    if "manager" in update_data and update_data["manager"]:
-        import re
-        manager_id = f"mgr-{re.sub(r'[^a-zA-Z0-9]', '', update_data['manager'].lower())[:8]}-{str(hash(update_data['manager']))[-4:]}"
-        update_data["managerId"] = manager_id
-    
-    # Perform the update
-    result = store_collection.update_one({"_id": object_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Store not found")
-    
-    # Get the updated store
-    updated_store = store_collection.find_one({"_id": object_id})
-    updated_store["id"] = str(updated_store["_id"])
-    # Remove the _id field to avoid conflicts with the response model
-    updated_store.pop("_id", None)
-    
-    # Ensure managerId field exists (for backward compatibility)
-    if "managerId" not in updated_store:
-        import re
-        manager_name = updated_store.get("manager", "unknown")
-        updated_store["managerId"] = f"mgr-{re.sub(r'[^a-zA-Z0-9]', '', manager_name.lower())[:8]}-{str(hash(manager_name))[-4:]}"
-    
-    return updated_store
+    if update_data.get("manager"):
+        update_data["managerId"] = generate_manager_id(update_data["manager"])
+    return await store_repository.update(store_id, update_data)
 
 @router.delete("/{store_id}")
-def delete_store(store_id: str):
-    try:
-        object_id = ObjectId(store_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid store ID format")
-    
-    result = store_collection.delete_one({"_id": object_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Store not found")
-    return {"message": "Store deleted"} 
\ No newline at end of file
+async def delete_store(store_id: str):
+    await store_repository.delete(store_id)
+    return {"message": "Store deleted"}
\ No newline at end of file
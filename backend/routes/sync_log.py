@@ -1,44 +1,66 @@
-from fastapi import APIRouter, HTTPException
-from models.sync_log import sync_log_collection
-from schemas.sync_log import SyncLog, SyncLogCreate, SyncLogUpdate
-from bson import ObjectId
+from fastapi import APIRouter, Query, Request, Response
+from typing import Literal, Optional
+from datetime import datetime
+from models.sync_log import EXPORT_SORT, format_sync_log, sync_log_collection, sync_log_repository
+from schemas.sync_log import SyncLog, SyncLogBase, SyncLogCreate, SyncLogUpdate
+from schemas.bulk import IngestResult
+from services.sync_log_writer import sync_log_writer
+from utils.bulk import read_bulk_items, validate_items
+from utils.export import export_cursor, export_response
+from utils.pagination import MAX_PAGE_SIZE, build_filters, range_filter
 
 router = APIRouter(prefix="/sync-logs", tags=["SyncLogs"])
 
 @router.get("/", response_model=list[SyncLog])
-def get_sync_logs():
-    logs = list(sync_log_collection.find())
-    for l in logs:
-        l["id"] = str(l["_id"])
-    return logs
+async def get_sync_logs(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+    gatewayId: Optional[str] = None,
+    eslId: Optional[str] = None,
+):
+    filters = build_filters(storeName=storeName, status=status, gatewayId=gatewayId, eslId=eslId)
+    return await sync_log_repository.list_page(response, filters, after, limit)
+
+@router.get("/export")
+async def export_sync_logs(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    storeName: Optional[str] = None,
+    status: Optional[str] = None,
+    gatewayId: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    query = build_filters(storeName=storeName, status=status, gatewayId=gatewayId)
+    query.update(range_filter("syncedAt", since, until))
+    fields = ["id", *SyncLogBase.model_fields]
+    cursor = export_cursor(sync_log_collection, query, sort=EXPORT_SORT)
+    return export_response(cursor, fmt, fields, "sync_logs", gzip, format_sync_log)
+
+@router.post("/batch", response_model=IngestResult, status_code=202)
+async def ingest_sync_logs(request: Request):
+    """Queue a batch of sync log events (JSON array or NDJSON) for batched insertion."""
+    items = await read_bulk_items(request)
+    events, errors = validate_items(items, SyncLogCreate)
+    sync_log_writer.append(events)
+    return {"accepted": len(events), "rejected": len(errors), "errors": errors}
 
 @router.get("/{log_id}", response_model=SyncLog)
-def get_sync_log(log_id: str):
-    log = sync_log_collection.find_one({"_id": ObjectId(log_id)})
-    if not log:
-        raise HTTPException(status_code=404, detail="Sync log not found")
-    log["id"] = str(log["_id"])
-    return log
+async def get_sync_log(log_id: str):
+    return await sync_log_repository.get(log_id)
 
 @router.post("/", response_model=SyncLog)
-def create_sync_log(log: SyncLogCreate):
-    result = sync_log_collection.insert_one(log.dict())
-    new_log = sync_log_collection.find_one({"_id": result.inserted_id})
-    new_log["id"] = str(new_log["_id"])
-    return new_log
+async def create_sync_log(log: SyncLogCreate):
+    return await sync_log_repository.create(dict(log.dict(), createdAt=datetime.utcnow()))
 
 @router.put("/{log_id}", response_model=SyncLog)
-def update_sync_log(log_id: str, log: SyncLogUpdate):
-    result = sync_log_collection.update_one({"_id": ObjectId(log_id)}, {"$set": log.dict()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Sync log not found")
-    updated_log = sync_log_collection.find_one({"_id": ObjectId(log_id)})
-    updated_log["id"] = str(updated_log["_id"])
-    return updated_log
+async def update_sync_log(log_id: str, log: SyncLogUpdate):
+    return await sync_log_repository.update(log_id, log.dict())
 
 @router.delete("/{log_id}")
-def delete_sync_log(log_id: str):
-    result = sync_log_collection.delete_one({"_id": ObjectId(log_id)})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Sync log not found")
-    return {"message": "Sync log deleted"} 
\ No newline at end of file
+async def delete_sync_log(log_id: str):
+    await sync_log_repository.delete(log_id)
+    return {"message": "Sync log deleted"}
\ No newline at end of file
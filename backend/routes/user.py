@@ -1,48 +1,42 @@
-from fastapi import APIRouter, HTTPException
-from models.user import user_collection
+from fastapi import APIRouter, Query, Response
+from typing import Optional
+from models.user import user_cache, user_repository
 from schemas.user import User, UserCreate, UserUpdate
-from utils.auth import get_password_hash
-from bson import ObjectId
+from utils.auth import password_hasher
+from utils.pagination import MAX_PAGE_SIZE, build_filters
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/", response_model=list[User])
-def get_users():
-    users = list(user_collection.find())
-    for u in users:
-        u["id"] = str(u["_id"])
-    return users
+async def get_users(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    filters = build_filters(role=role, status=status)
+    return await user_repository.list_page(response, filters, after, limit)
 
 @router.get("/{user_id}", response_model=User)
-def get_user(user_id: str):
-    user = user_collection.find_one({"_id": ObjectId(user_id)})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user["id"] = str(user["_id"])
-    return user
+async def get_user(user_id: str):
+    return await user_repository.get(user_id)
 
 @router.post("/", response_model=User)
-def create_user(user: UserCreate):
+async def create_user(user: UserCreate):
     data = user.dict()
     password = data.pop("password")
-    data["hashed_password"] = get_password_hash(password)
-    result = user_collection.insert_one(data)
-    new_user = user_collection.find_one({"_id": result.inserted_id})
-    new_user["id"] = str(new_user["_id"])
-    return new_user
+    data["hashed_password"] = await password_hasher.hash(password)
+    return await user_repository.create(data)
 
 @router.put("/{user_id}", response_model=User)
-def update_user(user_id: str, user: UserUpdate):
-    result = user_collection.update_one({"_id": ObjectId(user_id)}, {"$set": user.dict()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="User not found")
-    updated_user = user_collection.find_one({"_id": ObjectId(user_id)})
-    updated_user["id"] = str(updated_user["_id"])
+async def update_user(user_id: str, user: UserUpdate):
+    updated_user = await user_repository.update(user_id, user.dict())
+    user_cache.pop(user_id)
     return updated_user
 
 @router.delete("/{user_id}")
-def delete_user(user_id: str):
-    result = user_collection.delete_one({"_id": ObjectId(user_id)})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="User not found")
-    return {"message": "User deleted"} 
\ No newline at end of file
+async def delete_user(user_id: str):
+    await user_repository.delete(user_id)
+    user_cache.pop(user_id)
+    return {"message": "User deleted"}
\ No newline at end of file
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class IngestError(BaseModel):
+    index: int
+    error: str
+
+class IngestResult(BaseModel):
+    accepted: int
+    rejected: int
+    errors: List[IngestError]
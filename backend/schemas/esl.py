@@ -1,15 +1,25 @@
 from pydantic import BaseModel
 from typing import Optional
+from schemas.product import Product
+from schemas.store import Store
 
 class ESLBase(BaseModel):
     labelSize: str
     batteryLevel: int
     signalStrength: int
     status: str
-    productName: str
-    storeName: str
+    # References by id; a name may be sent instead and is resolved to the id.
+    # The names are kept on the label for display.
+    productId: Optional[str] = None
+    storeId: Optional[str] = None
+    productName: Optional[str] = None
+    storeName: Optional[str] = None
     lastSync: Optional[str] = None
     isRecentlySync: Optional[bool] = False
+    # Price content shown on the label, kept in sync with the product
+    mrp: Optional[float] = None
+    discount: Optional[float] = None
+    sellingPrice: Optional[float] = None
 
 class ESLCreate(ESLBase):
     pass
@@ -19,6 +29,18 @@ class ESLUpdate(ESLBase):
 
 class ESLInDB(ESLBase):
     id: str
+    # lastSync relative to now ("2 min ago"); ignored when written back
+    lastSyncDisplay: Optional[str] = None
+    # Content hash of the last image rendered for this label
+    renderHash: Optional[str] = None
+    # Written by the battery forecast job
+    batteryDaysRemaining: Optional[float] = None
+    batteryForecastAt: Optional[str] = None
+    # Bumped on every write that changes what the label shows
+    changeVersion: Optional[int] = None
+    # Referenced documents, included with ?expand=true
+    store: Optional[Store] = None
+    product: Optional[Product] = None
 
 class ESL(ESLInDB):
     pass 
\ No newline at end of file
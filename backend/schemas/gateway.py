@@ -1,9 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from schemas.store import Store
 
 class GatewayBase(BaseModel):
-    storeName: str
-    storeId: str
+    # Store reference by id; the store name may be sent instead
+    storeId: Optional[str] = None
+    storeName: Optional[str] = None
     ipAddress: str
     firmwareVersion: str
     lastHeartbeat: str
@@ -18,8 +20,19 @@ class GatewayCreate(GatewayBase):
 class GatewayUpdate(GatewayBase):
     pass
 
+class GatewayHeartbeat(BaseModel):
+    status: str = "active"
+    ipAddress: Optional[str] = None
+    firmwareVersion: Optional[str] = None
+    uptime: Optional[str] = None
+    # Syncs and errors since the previous heartbeat
+    syncCount: int = Field(0, ge=0)
+    errorCount: int = Field(0, ge=0)
+
 class GatewayInDB(GatewayBase):
     id: str
+    # Included with ?expand=true
+    store: Optional[Store] = None
 
 class Gateway(GatewayInDB):
     pass 
\ No newline at end of file
@@ -17,6 +17,7 @@ class ProductUpdate(ProductBase):
 
 class ProductInDB(ProductBase):
     id: str
+    changeVersion: Optional[int] = None
 
 class Product(ProductInDB):
     pass 
\ No newline at end of file
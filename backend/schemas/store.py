@@ -5,15 +5,19 @@ class StoreBase(BaseModel):
     name: str
     location: str
     manager: str
-    eslCount: int
     status: str
     lastSync: Optional[str] = None
+    # Maintained by the backend from ESL and gateway writes
+    eslCount: int = 0
+    activeEslCount: int = 0
+    errorEslCount: int = 0
+    lowBatteryEslCount: int = 0
+    gatewayCount: int = 0
 
 class StoreCreate(BaseModel):
     name: str
     location: str
     manager: str
-    eslCount: int = 0
     status: str = "active"
     lastSync: Optional[str] = None
 
@@ -21,7 +25,6 @@ class StoreUpdate(BaseModel):
     name: Optional[str] = None
     location: Optional[str] = None
     manager: Optional[str] = None
-    eslCount: Optional[int] = None
     status: Optional[str] = None
     lastSync: Optional[str] = None
 
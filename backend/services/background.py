@@ -0,0 +1,54 @@
+import asyncio
+from typing import Optional
+from utils.logger import logger
+
+
+class BackgroundFlusher:
+    """Base for write-behind workers that buffer in memory and flush on an interval.
+
+    Subclasses implement ``flush()``. It runs every ``interval`` seconds, or sooner
+    when ``wake()`` is called (typically once a buffer reaches its batch size).
+    ``stop()`` performs a final flush so nothing buffered is lost on shutdown.
+    """
+
+    name = "flusher"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def flush(self):
+        raise NotImplementedError
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break  # stop() performs the final flush
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"{self.name} flush failed: {e}", exc_info=True)
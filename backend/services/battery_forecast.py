@@ -0,0 +1,149 @@
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from pymongo import UpdateOne
+from config.settings import settings
+from models.esl import esl_collection
+from models.telemetry import telemetry_collection
+from services.background import BackgroundFlusher
+from services.telemetry import SUM_FIELDS, downsample_telemetry
+
+WRITE_BATCH_SIZE = 1000
+
+# Fits need readings spread over at least this many days
+MIN_SPAN_DAYS = 1.0
+# Levels falling more slowly than this (percent per day) count as flat
+MIN_DAILY_DROP = 0.01
+
+
+def fit_depletion(n, sum_t, sum_y, sum_tt, sum_ty, earliest) -> np.ndarray:
+    """Days until each label's battery reaches 0, from its least-squares line.
+
+    Each argument is an array with one entry per label: the regression sums of
+    its readings, with t in days relative to now (so <= 0), and the start of
+    its oldest day of readings. Labels with too little history or a level that is not
+    falling get NaN.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denominator = n * sum_tt - sum_t * sum_t
+        slope = (n * sum_ty - sum_t * sum_y) / denominator
+        # The fitted level now (t = 0) divided by the daily drop
+        intercept = (sum_y - slope * sum_t) / n
+        remaining = np.maximum(intercept, 0) / -slope
+    usable = (n >= 2) & (denominator > 0) & (slope < -MIN_DAILY_DROP) & (-earliest >= MIN_SPAN_DAYS)
+    return np.where(usable, remaining, np.nan)
+
+
+def _number(value) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+
+
+def forecast(esls: list, days: list, now: datetime) -> tuple[list, int, int]:
+    """The forecast updates for ``esls`` from their label-days of telemetry in ``days``.
+
+    Returns the ``UpdateOne`` ops, the number of labels with a forecast and the
+    number of label-days used. Runs in the threadpool: it is a Python loop over
+    every label and label-day.
+    """
+    rows = {esl["_id"]: row for row, esl in enumerate(esls)}
+    count = len(esls)
+    # One entry per label-day: the label's row, the day's offset from now and its sums
+    doc_rows, offsets, sums = [], [], []
+    # The level of each label's latest reading, and the offset of the day it was taken on
+    last_level, last_day = np.full(count, np.nan), np.full(count, -np.inf)
+    for doc in days:
+        row = rows.get(doc["eslId"])
+        if row is None:
+            continue
+        d = (doc["day"] - now).total_seconds() / 86400
+        if d > last_day[row] and doc.get("battery"):
+            last_day[row], last_level[row] = d, _number(doc["battery"][-1])
+        if doc.get("n"):
+            doc_rows.append(row)
+            offsets.append(d)
+            sums.append([doc.get(field, 0.0) for field in SUM_FIELDS])
+
+    doc_rows = np.array(doc_rows, dtype=np.int64)
+    d = np.array(offsets, dtype=float)
+    n, st, sy, stt, sty = np.array(sums, dtype=float).reshape(-1, len(SUM_FIELDS)).T
+    # Shift each day's sums from t since the start of the day to t relative to now
+    shifted = (n, st + n * d, sy, stt + 2 * d * st + n * d * d, sty + d * sy)
+    totals = [np.bincount(doc_rows, weights=values, minlength=count) for values in shifted]
+    earliest = np.zeros(count)
+    np.minimum.at(earliest, doc_rows, d)
+    # Every level change is recorded as a reading, so the current level is already the
+    # latest one unless it differs from it (set by another process, or not flushed yet);
+    # only then does it count as a reading taken now
+    level = np.array([_number(esl.get("batteryLevel")) for esl in esls], dtype=float)
+    newer = ~np.isnan(level) & (level != last_level)
+    totals[0] += newer
+    totals[2] += np.where(newer, level, 0)
+    remaining = fit_depletion(*totals, earliest)
+
+    ops, forecasted = [], 0
+    for esl, new in zip(esls, remaining.tolist()):
+        new = None if np.isnan(new) else round(new, 1)
+        forecasted += new is not None
+        if new != esl.get("batteryDaysRemaining"):
+            ops.append(UpdateOne({"_id": esl["_id"]}, {"$set": {"batteryDaysRemaining": new, "batteryForecastAt": now}}))
+    return ops, forecasted, len(doc_rows)
+
+
+class BatteryForecaster(BackgroundFlusher):
+    """Periodically forecasts battery depletion for every label.
+
+    Each run downsamples old telemetry, then reads only the regression sums (and
+    latest reading) of each label-day in the last ``window_days``. A label's
+    current level counts as a reading taken now when it is newer than its latest
+    reading. Every label is fitted in one vectorized pass in the threadpool, and
+    ``batteryDaysRemaining`` and ``batteryForecastAt`` are written only where the
+    estimate changed.
+    """
+
+    name = "battery-forecast"
+
+    def __init__(self, interval: float, window_days: int):
+        super().__init__(interval)
+        self.window_days = window_days
+        self.last_run: Optional[dict] = None
+
+    async def flush(self):
+        if self._stopping:
+            return  # nothing is buffered, so shutdown needs no final run
+        await self.run()
+
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        downsampled = (await downsample_telemetry())["downsampled"]
+        now = datetime.utcnow()
+
+        projection = {"batteryLevel": 1, "batteryDaysRemaining": 1}
+        esls = [esl async for esl in esl_collection.find({}, projection).batch_size(WRITE_BATCH_SIZE)]
+        since = (now - timedelta(days=self.window_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        projection = {"eslId": 1, "day": 1, "battery": {"$slice": -1}, **dict.fromkeys(SUM_FIELDS, 1)}
+        days = [doc async for doc in telemetry_collection.find({"day": {"$gte": since}}, projection).batch_size(WRITE_BATCH_SIZE)]
+        ops, forecasted, label_days = await run_in_threadpool(forecast, esls, days, now)
+
+        for start in range(0, len(ops), WRITE_BATCH_SIZE):
+            await esl_collection.bulk_write(ops[start:start + WRITE_BATCH_SIZE], ordered=False)
+
+        self.last_run = {
+            "labels": len(esls),
+            "labelDays": label_days,
+            "forecasted": forecasted,
+            "updated": len(ops),
+            "downsampled": downsampled,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        return self.last_run
+
+    def stats(self) -> dict:
+        return {"lastRun": self.last_run}
+
+
+battery_forecaster = BatteryForecaster(
+    interval=settings.BATTERY_FORECAST_INTERVAL_SECONDS,
+    window_days=settings.BATTERY_FORECAST_WINDOW_DAYS,
+)
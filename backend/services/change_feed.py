@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import DESCENDING, UpdateOne
+from config.settings import settings
+from database.versions import change_versions, counter_collection
+from models.esl import esl_change_hooks, esl_collection
+from models.product import product_collection
+from models.tombstone import tombstone_collection
+from services.background import BackgroundFlusher
+from utils.pagination import serialize_doc, serialize_refs
+
+# What a gateway needs to update a label, kept small for low-bandwidth links
+CHANGE_PROJECTION = {
+    "changeVersion": 1,
+    "labelSize": 1,
+    "status": 1,
+    "productId": 1,
+    "productName": 1,
+    "mrp": 1,
+    "discount": 1,
+    "sellingPrice": 1,
+}
+
+CHANGE_ORDER = [("changeVersion", 1), ("_id", 1)]
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Counter holding the newest tombstone version purged so far
+HORIZON_ID = "tombstoneHorizon"
+
+
+async def record_tombstones(changes: list) -> None:
+    """ESL change hook: leave a tombstone in the store a label was deleted from or moved out of."""
+    removed = [
+        before for before, after in changes
+        if before is not None and (after is None or after.get("storeId") != before.get("storeId"))
+    ]
+    if not removed:
+        return
+    # Fresh versions, held until the tombstones are written, so readers cannot page past them
+    now = datetime.utcnow()
+    async with change_versions.allocate(len(removed)) as stamps:
+        await tombstone_collection.insert_many([
+            {"eslId": before["_id"], "storeId": before.get("storeId"), "changeVersion": next(stamps), "deletedAt": now}
+            for before in removed
+        ], ordered=False)
+
+
+async def purged_horizon() -> int:
+    """Version up to which tombstones may already be gone; older checkpoints have to resync."""
+    doc = await counter_collection.find_one({"_id": HORIZON_ID})
+    return doc["value"] if doc else 0
+
+
+class TombstonePurger(BackgroundFlusher):
+    """Removes tombstones older than ``retention_days``, raising the purged horizon first.
+
+    The horizon is written before anything is deleted, so a gateway whose
+    checkpoint is below it is told to resync instead of silently missing a
+    removal.
+    """
+
+    name = "tombstone-purge"
+
+    def __init__(self, interval: float, retention_days: int):
+        super().__init__(interval)
+        self.retention_days = retention_days
+        self.purged = 0
+
+    async def flush(self):
+        if self._stopping:
+            return  # nothing is buffered, so shutdown needs no final run
+        await self.purge()
+
+    async def purge(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        expired = {"deletedAt": {"$lt": cutoff}}
+        newest = await tombstone_collection.find_one(expired, {"changeVersion": 1}, sort=[("changeVersion", DESCENDING)])
+        if newest is None:
+            return 0
+        await counter_collection.update_one({"_id": HORIZON_ID}, {"$max": {"value": newest["changeVersion"]}}, upsert=True)
+        result = await tombstone_collection.delete_many(dict(expired, changeVersion={"$lte": newest["changeVersion"]}))
+        self.purged += result.deleted_count
+        return result.deleted_count
+
+    def stats(self) -> dict:
+        return {"purged": self.purged}
+
+
+def parse_checkpoint(value: str) -> tuple[int, Optional[ObjectId]]:
+    """``"<version>"`` or ``"<version>:<id>"``, the second form resuming inside a version."""
+    version, _, last_id = value.partition(":")
+    if not version.isdigit() or (last_id and not ObjectId.is_valid(last_id)):
+        raise HTTPException(status_code=400, detail="Invalid checkpoint")
+    return int(version), ObjectId(last_id) if last_id else None
+
+
+def _checkpoint(doc: dict, partial: bool) -> str:
+    return f"{doc['changeVersion']}:{doc['_id']}" if partial else str(doc["changeVersion"])
+
+
+async def changes_since(store_id: Optional[ObjectId], since: str, limit: int) -> dict:
+    """Labels changed and removed in a store after the ``since`` checkpoint, oldest first.
+
+    Labels and tombstones are both ordered by ``(changeVersion, _id)`` and
+    merged into one batch of at most ``limit`` entries. Versions still being
+    written in this process are held back, so the returned checkpoint never
+    skips a change that commits later. A checkpoint below the purged horizon
+    gets a 410: removals it has not seen may be gone, so the gateway must sync
+    again from ``0``.
+    """
+    version, last_id = parse_checkpoint(since)
+    if version and version < await purged_horizon():
+        raise HTTPException(status_code=410, detail="Checkpoint is older than the retained changes, sync again from 0")
+    after = {"changeVersion": {"$gt": version}}
+    if last_id is not None:
+        after = {"$or": [after, {"changeVersion": version, "_id": {"$gt": last_id}}]}
+    query = {"storeId": store_id, "$and": [after]}
+    stable = change_versions.stable()
+    if stable is not None:
+        query["$and"].append({"changeVersion": {"$lte": stable}})
+
+    labels = [doc async for doc in esl_collection.find(query, CHANGE_PROJECTION).sort(CHANGE_ORDER).limit(limit)]
+    tombstones = [
+        doc async for doc in tombstone_collection.find(query, {"eslId": 1, "changeVersion": 1}).sort(CHANGE_ORDER).limit(limit)
+    ]
+    merged = sorted(labels + tombstones, key=lambda doc: (doc["changeVersion"], doc["_id"]))
+    batch = merged[:limit]
+    has_more = len(merged) > limit or len(labels) == limit or len(tombstones) == limit
+
+    checkpoint = _checkpoint(batch[-1], has_more) if batch else since
+
+    changes, deleted = [], []
+    for doc in batch:
+        if "eslId" in doc:
+            deleted.append({"id": str(doc["eslId"]), "changeVersion": doc["changeVersion"]})
+        else:
+            changes.append(serialize_refs(serialize_doc(doc), "productId"))
+    return {"changes": changes, "deleted": deleted, "checkpoint": checkpoint, "hasMore": has_more}
+
+
+async def backfill_change_versions(collections=(esl_collection, product_collection)) -> dict:
+    """Give every document written before change versions existed a version of its own."""
+    stamped = {}
+    for collection in collections:
+        count = 0
+        while True:
+            ids = [doc["_id"] async for doc in collection.find({"changeVersion": None}, {"_id": 1}).limit(BACKFILL_BATCH_SIZE)]
+            if not ids:
+                break
+            async with change_versions.allocate(len(ids)) as stamps:
+                await collection.bulk_write(
+                    [UpdateOne({"_id": doc_id, "changeVersion": None}, {"$set": {"changeVersion": next(stamps)}}) for doc_id in ids],
+                    ordered=False,
+                )
+            count += len(ids)
+        stamped[collection.name] = count
+    return stamped
+
+
+tombstone_purger = TombstonePurger(
+    interval=settings.TOMBSTONE_PURGE_INTERVAL_SECONDS,
+    retention_days=settings.TOMBSTONE_RETENTION_DAYS,
+)
+esl_change_hooks.append(record_tombstones)
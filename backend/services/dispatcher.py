@@ -0,0 +1,420 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from config.settings import settings
+from models.esl import esl_change_hooks
+from models.gateway import gateway_change_hooks, gateway_collection
+from services.heartbeat import heartbeat_buffer
+from services.sync_log_writer import sync_log_writer
+from services.sync_rollups import SUCCESS_STATUS
+from utils.logger import logger
+
+# Lower numbers go out first
+PRICE, CONTENT, REFRESH = 0, 1, 2
+PRIORITY_NAMES = {PRICE: "price", CONTENT: "content", REFRESH: "refresh"}
+
+# Label fields whose change makes a new image worth sending
+PRICE_FIELDS = ("mrp", "discount", "sellingPrice")
+CONTENT_FIELDS = ("labelSize", "productId", "productName")
+
+OFFLINE = "offline"
+
+
+class DispatchError(Exception):
+    """A label update that the gateway did not deliver."""
+
+
+# Sends one job through one gateway; raises DispatchError when it is not delivered
+Transport = Callable[[ObjectId, "DispatchJob"], Awaitable[None]]
+
+
+class DispatchJob:
+    __slots__ = ("esl_id", "store_id", "store_name", "product_name", "priority", "attempts", "enqueued_at", "due")
+
+    def __init__(self, label: dict, priority: int):
+        self.esl_id = label["_id"]
+        self.store_id = label.get("storeId")
+        self.store_name = label.get("storeName")
+        self.product_name = label.get("productName")
+        self.priority = priority
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+        # When a retry is scheduled for; None while the job is ready
+        self.due: Optional[float] = None
+
+
+class TokenBucket:
+    """``rate`` sends per second on average, with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def take(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def give_back(self) -> None:
+        """Return a token taken for a send that did not happen."""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class GatewayLane:
+    """The queue of one gateway: waiting jobs by priority, retries by due time and its limits."""
+
+    def __init__(self, gateway_id: ObjectId, store_id, status: Optional[str], concurrency: int, rate: float, burst: int):
+        self.gateway_id = gateway_id
+        self.store_id = store_id
+        self.status = status
+        self.window = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        # esl id -> job, for jobs that are waiting or scheduled for a retry
+        self.jobs: dict = {}
+        # (priority, order, job); entries whose priority no longer matches their job are stale
+        self.ready: list = []
+        # (due time, order, job)
+        self.delayed: list = []
+        self.in_flight = 0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def load(self) -> int:
+        return len(self.jobs) + self.in_flight
+
+    def push(self, job: DispatchJob, order: int) -> None:
+        job.due = None
+        heapq.heappush(self.ready, (job.priority, order, job))
+        self.jobs[job.esl_id] = job
+        self.wakeup.set()
+
+    def _promote_due(self) -> Optional[float]:
+        """Move retries that are due into the ready heap; returns the seconds until the next one."""
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, order, job = heapq.heappop(self.delayed)
+            if self.jobs.get(job.esl_id) is job:
+                job.due = None
+                heapq.heappush(self.ready, (job.priority, order, job))
+        return self.delayed[0][0] - now if self.delayed else None
+
+    def _drop_stale(self) -> None:
+        while self.ready:
+            priority, _, job = self.ready[0]
+            if self.jobs.get(job.esl_id) is job and job.priority == priority:
+                return
+            heapq.heappop(self.ready)
+
+    async def wait_ready(self) -> None:
+        while True:
+            self.wakeup.clear()
+            next_due = self._promote_due()
+            self._drop_stale()
+            if self.ready:
+                return
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=next_due)
+            except asyncio.TimeoutError:
+                pass
+
+    def retry(self, job: DispatchJob, delay: float, order: int) -> None:
+        job.due = time.monotonic() + delay
+        heapq.heappush(self.delayed, (job.due, order, job))
+        self.jobs[job.esl_id] = job
+        self.wakeup.set()
+
+    def pop(self) -> Optional[DispatchJob]:
+        self._promote_due()
+        self._drop_stale()
+        if not self.ready:
+            return None
+        _, _, job = heapq.heappop(self.ready)
+        del self.jobs[job.esl_id]
+        return job
+
+
+class Dispatcher:
+    """Decides when, and through which gateway, each label update goes out.
+
+    Every gateway has its own lane: a priority queue (price changes before
+    content changes before cosmetic refreshes), a window of at most
+    ``concurrency`` sends in flight and a token bucket of ``rate`` sends per
+    second. A label waits at most once per lane; enqueuing it again only raises
+    its priority, and a label waiting for a retry still waits out its backoff.
+    A label goes to the least loaded gateway of its store that is not offline;
+    lanes are indexed by store, so routing does not depend on the fleet size.
+    Failed sends are retried on the same lane with exponential backoff and
+    jitter, up to ``max_attempts``. Every outcome is written to the
+    sync logs, and the gateway's ``syncCount`` and ``errorCount`` are bumped
+    through the heartbeat buffer.
+
+    Jobs live in memory only: anything still queued at shutdown is dropped,
+    and gateways catch up through their change feed.
+    """
+
+    name = "dispatcher"
+
+    def __init__(
+        self,
+        concurrency: int,
+        rate: float,
+        burst: int,
+        max_attempts: int,
+        backoff: float,
+        max_backoff: float,
+        max_queued: int,
+    ):
+        self.transport: Optional[Transport] = None
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_queued = max_queued
+        self.lanes: dict = {}
+        # store id -> {gateway id: lane}
+        self.store_lanes: dict = {}
+        self.running = False
+        self._order = itertools.count()
+        self._sends: set = set()
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.unroutable = 0
+        self.rejected = 0
+
+    def queued(self) -> int:
+        return sum(len(lane.jobs) for lane in self.lanes.values())
+
+    async def start(self, transport: Transport) -> None:
+        if self.running:
+            return
+        self.transport = transport
+        self.running = True
+        async for gateway in gateway_collection.find({}, {"storeId": 1, "status": 1}):
+            self._add_lane(gateway)
+
+    async def stop(self) -> None:
+        self.running = False
+        for lane in list(self.lanes.values()):
+            if lane.task is not None:
+                lane.task.cancel()
+        await asyncio.gather(*[lane.task for lane in self.lanes.values() if lane.task], return_exceptions=True)
+        # Let sends already on the air report their outcome
+        await asyncio.gather(*self._sends, return_exceptions=True)
+        self.lanes = {}
+        self.store_lanes = {}
+
+    def _add_lane(self, gateway: dict) -> None:
+        lane = GatewayLane(
+            gateway["_id"], gateway.get("storeId"), gateway.get("status"), self.concurrency, self.rate, self.burst
+        )
+        lane.task = asyncio.create_task(self._run_lane(lane), name=f"{self.name}-{gateway['_id']}")
+        self.lanes[gateway["_id"]] = lane
+        self.store_lanes.setdefault(lane.store_id, {})[lane.gateway_id] = lane
+
+    def _remove_lane(self, gateway_id) -> list:
+        lane = self.lanes.pop(gateway_id, None)
+        if lane is None:
+            return []
+        store = self.store_lanes.get(lane.store_id, {})
+        store.pop(gateway_id, None)
+        if not store:
+            self.store_lanes.pop(lane.store_id, None)
+        if lane.task is not None:
+            lane.task.cancel()
+        return list(lane.jobs.values())
+
+    def _route(self, store_id) -> Optional[GatewayLane]:
+        lanes = self.store_lanes.get(store_id, {}).values()
+        online = [lane for lane in lanes if lane.status != OFFLINE]
+        return min(online or lanes, key=GatewayLane.load, default=None)
+
+    def _place(self, job: DispatchJob) -> bool:
+        lane = self._route(job.store_id)
+        if lane is None:
+            self.unroutable += 1
+            return False
+        current = lane.jobs.get(job.esl_id)
+        if current is not None:
+            if job.priority < current.priority:
+                current.priority = job.priority
+                # A retry keeps its backoff and leaves with the new priority once due
+                if current.due is None:
+                    heapq.heappush(lane.ready, (current.priority, next(self._order), current))
+                    lane.wakeup.set()
+            return True
+        lane.push(job, next(self._order))
+        return True
+
+    def enqueue(self, labels, priority: int) -> int:
+        """Queue an update for each label document (needs ``_id`` and ``storeId``); returns how many were queued."""
+        if not self.running:
+            return 0
+        queued = 0
+        room = self.max_queued - self.queued()
+        for label in labels:
+            if room <= 0:
+                self.rejected += 1
+                continue
+            if self._place(DispatchJob(label, priority)):
+                queued += 1
+                room -= 1
+        self.enqueued += queued
+        return queued
+
+    def ensure_capacity(self, count: int) -> None:
+        if self.queued() + count > self.max_queued:
+            raise HTTPException(
+                status_code=503,
+                detail="Dispatch queue is full, please retry",
+                headers={"Retry-After": "5"},
+            )
+
+    async def _run_lane(self, lane: GatewayLane) -> None:
+        while True:
+            await lane.wait_ready()
+            await lane.window.acquire()
+            await lane.bucket.take()
+            # Take the best job only now, so anything that arrived while waiting can go first
+            job = lane.pop()
+            if job is None:
+                lane.bucket.give_back()
+                lane.window.release()
+                continue
+            lane.in_flight += 1
+            task = asyncio.create_task(self._send(lane, job))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, lane: GatewayLane, job: DispatchJob) -> None:
+        job.attempts += 1
+        started = time.monotonic()
+        error = None
+        try:
+            await self.transport(lane.gateway_id, job)
+        except DispatchError as e:
+            error = str(e) or "Delivery failed"
+        except Exception as e:
+            logger.error(f"{self.name}: transport error for gateway {lane.gateway_id}: {e}")
+            error = "Transport error"
+        finally:
+            lane.in_flight -= 1
+            lane.window.release()
+        self._report(lane, job, error, time.monotonic() - started)
+        if error is None:
+            self.sent += 1
+            return
+        if job.attempts >= self.max_attempts or not self.running:
+            self.failed += 1
+            return
+        self.retried += 1
+        if self.lanes.get(lane.gateway_id) is not lane:
+            self._place(job)  # the gateway went away; try another one of the store
+        elif job.esl_id not in lane.jobs:  # otherwise a newer update is already waiting
+            delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff) * random.uniform(0.5, 1.0)
+            lane.retry(job, delay, next(self._order))
+
+    def _report(self, lane: GatewayLane, job: DispatchJob, error: Optional[str], seconds: float) -> None:
+        log = {
+            "eslId": str(job.esl_id),
+            "productName": job.product_name,
+            "gatewayId": str(lane.gateway_id),
+            "storeName": job.store_name,
+            "status": SUCCESS_STATUS if error is None else "failed",
+            "syncedAt": datetime.utcnow(),
+            "errorMessage": error,
+            "duration": round(seconds, 3),
+        }
+        try:
+            sync_log_writer.append([log])
+        except HTTPException:
+            pass  # the writer counts what it refuses
+        heartbeat_buffer.add_counters(lane.gateway_id, {"errorCount" if error else "syncCount": 1})
+
+    async def record_esl_changes(self, changes: list) -> None:
+        """ESL change hook: queue labels whose printed content changed."""
+        by_priority = {PRICE: [], CONTENT: []}
+        for before, after in changes:
+            if after is None:
+                continue
+            changed = lambda fields: any(before.get(field) != after.get(field) for field in fields)
+            if before is None or changed(CONTENT_FIELDS + ("storeId",)):
+                by_priority[CONTENT].append(after)
+            elif changed(PRICE_FIELDS):
+                by_priority[PRICE].append(after)
+        for priority, labels in by_priority.items():
+            if labels:
+                self.enqueue(labels, priority)
+
+    async def record_gateway_changes(self, changes: list) -> None:
+        """Gateway change hook: open, move and close lanes; queued jobs of a closed lane are routed again."""
+        if not self.running:
+            return
+        orphans = []
+        for before, after in changes:
+            gateway_id = (after or before)["_id"]
+            lane = self.lanes.get(gateway_id)
+            if after is None or (lane is not None and lane.store_id != after.get("storeId")):
+                orphans.extend(self._remove_lane(gateway_id))
+                lane = None
+            if after is not None:
+                if lane is None:
+                    self._add_lane(after)
+                else:
+                    lane.status = after.get("status")
+        for job in orphans:
+            self._place(job)
+
+    async def record_heartbeats(self, written: dict) -> None:
+        for gateway_id, fields in written.items():
+            lane = self.lanes.get(gateway_id)
+            if lane is not None and "status" in fields:
+                lane.status = fields["status"]
+
+    def stats(self) -> dict:
+        by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        for lane in self.lanes.values():
+            for job in lane.jobs.values():
+                by_priority[PRIORITY_NAMES[job.priority]] += 1
+        return {
+            "running": self.running,
+            "gateways": len(self.lanes),
+            "queued": by_priority,
+            "inFlight": sum(lane.in_flight for lane in self.lanes.values()),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "unroutable": self.unroutable,
+            "rejected": self.rejected,
+        }
+
+
+dispatcher = Dispatcher(
+    concurrency=settings.DISPATCH_CONCURRENCY,
+    rate=settings.DISPATCH_RATE_PER_SECOND,
+    burst=settings.DISPATCH_BURST,
+    max_attempts=settings.DISPATCH_MAX_ATTEMPTS,
+    backoff=settings.DISPATCH_BACKOFF_SECONDS,
+    max_backoff=settings.DISPATCH_MAX_BACKOFF_SECONDS,
+    max_queued=settings.DISPATCH_MAX_QUEUED,
+)
+esl_change_hooks.append(dispatcher.record_esl_changes)
+gateway_change_hooks.append(dispatcher.record_gateway_changes)
+heartbeat_buffer.hooks.append(dispatcher.record_heartbeats)
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import secrets
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, NamedTuple, Optional
+from fastapi import HTTPException
+from config.settings import settings
+from models.esl import esl_change_hooks, format_esl
+from models.gateway import format_gateway, gateway_change_hooks, gateway_collection, gateway_time_fields
+from models.sync_log import format_sync_log, sync_log_change_hooks
+from services.heartbeat import heartbeat_buffer
+
+EVENT_TYPES = ("esl", "gateway", "syncLog")
+
+
+class Event(NamedTuple):
+    seq: int
+    type: str
+    # Stores the event concerns: both the old and new store when a document moves
+    store_ids: frozenset
+    store_name: Optional[str]
+    frame: str
+
+
+class Subscription:
+    """One live client: its store scope, the event types it wants and its queue."""
+
+    def __init__(self, store_id: Optional[str], store_name: Optional[str], types: frozenset, max_queue: int):
+        self.store_id = store_id
+        self.store_name = store_name
+        self.types = types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.lagged = False
+
+    def matches(self, event: Event) -> bool:
+        if event.type not in self.types:
+            return False
+        if self.store_id is None:
+            return True
+        # Sync log events only carry the store's name
+        return self.store_id in event.store_ids or (not event.store_ids and event.store_name == self.store_name)
+
+
+class EventBus:
+    """In-process fan-out of ESL, gateway and sync log changes as Server-Sent Events.
+
+    Fed by the change hooks of every write made through this process. Each
+    event is serialized once into its SSE frame and numbered; the last
+    ``history`` events are kept in a ring buffer so a client that reconnects
+    with the id of the last event it saw (``Last-Event-ID``) gets what it
+    missed. When that is no longer possible, because the id is from before a
+    restart or has left the buffer, the client is sent a ``reset`` event and
+    should re-fetch its lists. A subscriber whose queue fills up catches up
+    from the buffer the same way instead of slowing down writers.
+    """
+
+    def __init__(self, history: int, max_queue: int, max_subscribers: int, keepalive: float):
+        # Ids are "<epoch>-<seq>", so ids from another process or run are never mistaken for ours
+        self.epoch = secrets.token_hex(4)
+        self.history: deque = deque(maxlen=history)
+        self.seq = 0
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.keepalive = keepalive
+        self.subscribers: set = set()
+        self.published = 0
+        self.lagged = 0
+        self.resets = 0
+
+    def token(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def publish(self, type: str, op: str, doc_id, data: Optional[dict], store_ids=(), store_name: Optional[str] = None):
+        self.seq += 1
+        payload = {"op": op, "id": str(doc_id), "data": data}
+        frame = f"id: {self.token(self.seq)}\nevent: {type}\ndata: {json.dumps(payload, default=str)}\n\n"
+        event = Event(self.seq, type, frozenset(str(store_id) for store_id in store_ids if store_id), store_name, frame)
+        self.history.append(event)
+        self.published += 1
+        for subscription in self.subscribers:
+            if subscription.lagged or not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.lagged = True
+                self.lagged += 1
+
+    def _publish_changes(self, type: str, changes: list, formatter) -> None:
+        for before, after in changes:
+            doc = after if after is not None else before
+            op = "created" if before is None else "deleted" if after is None else "updated"
+            stores = {change.get("storeId") for change in (before, after) if change is not None}
+            self.publish(type, op, doc["_id"], formatter(dict(after)) if after is not None else None, stores, doc.get("storeName"))
+
+    async def record_esl_changes(self, changes: list) -> None:
+        self._publish_changes("esl", changes, format_esl)
+
+    async def record_gateway_changes(self, changes: list) -> None:
+        self._publish_changes("gateway", changes, format_gateway)
+
+    async def record_sync_log_changes(self, changes: list) -> None:
+        self._publish_changes("syncLog", changes, format_sync_log)
+
+    async def record_heartbeats(self, written: dict) -> None:
+        """Publish flushed heartbeats as gateway updates carrying only the fields that changed."""
+        stores = {
+            doc["_id"]: doc.get("storeId")
+            async for doc in gateway_collection.find({"_id": {"$in": list(written)}}, {"storeId": 1})
+        }
+        for gateway_id, fields in written.items():
+            if gateway_id in stores and fields:
+                data = dict(gateway_time_fields.decode(dict(fields)), id=str(gateway_id))
+                self.publish("gateway", "heartbeat", gateway_id, data, [stores[gateway_id]])
+
+    def _since(self, token: str) -> Optional[list]:
+        """The buffered events after ``token``, or None if they can no longer all be replayed."""
+        epoch, _, seq = token.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self.history[0].seq if self.history else self.seq + 1
+        if seq < oldest - 1 or seq > self.seq:
+            return None
+        return list(islice(self.history, seq - oldest + 1, None))
+
+    def _catch_up(self, subscription: Subscription, token: str) -> tuple[list, int]:
+        """Frames the subscriber missed after ``token``, and the sequence number that brings it to."""
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.lagged = False
+        missed = self._since(token)
+        if missed is None:
+            self.resets += 1
+            return [f"id: {self.token(self.seq)}\nevent: reset\ndata: {{}}\n\n"], self.seq
+        return [event.frame for event in missed if subscription.matches(event)], self.seq
+
+    def subscribe(self, store_id: Optional[str], store_name: Optional[str], types: frozenset) -> Subscription:
+        if len(self.subscribers) >= self.max_subscribers:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many live event subscribers, please retry",
+                headers={"Retry-After": "5"},
+            )
+        return Subscription(store_id, store_name, types, self.max_queue)
+
+    async def stream(self, subscription: Subscription, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """SSE frames for ``subscription``, starting after ``last_event_id`` when given."""
+        # Registering and reading the buffer happen without yielding in between, so nothing is missed
+        self.subscribers.add(subscription)
+        try:
+            frames, last = self._catch_up(subscription, last_event_id) if last_event_id else ([], self.seq)
+            yield "retry: 3000\n\n"
+            for frame in frames:
+                yield frame
+            while True:
+                if subscription.lagged:
+                    frames, last = self._catch_up(subscription, self.token(last))
+                    for frame in frames:
+                        yield frame
+                    continue
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event.seq > last:
+                    last = event.seq
+                    yield event.frame
+        finally:
+            self.subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "buffered": len(self.history),
+            "lagged": self.lagged,
+            "resets": self.resets,
+        }
+
+
+event_bus = EventBus(
+    history=settings.EVENT_HISTORY_SIZE,
+    max_queue=settings.EVENT_SUBSCRIBER_QUEUE_SIZE,
+    max_subscribers=settings.EVENT_MAX_SUBSCRIBERS,
+    keepalive=settings.EVENT_KEEPALIVE_SECONDS,
+)
+esl_change_hooks.append(event_bus.record_esl_changes)
+gateway_change_hooks.append(event_bus.record_gateway_changes)
+sync_log_change_hooks.append(event_bus.record_sync_log_changes)
+heartbeat_buffer.hooks.append(event_bus.record_heartbeats)
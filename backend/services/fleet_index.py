@@ -0,0 +1,272 @@
+import time
+from typing import Iterable, Optional
+import numpy as np
+from bson import ObjectId
+from fastapi import HTTPException
+from config.settings import settings
+from models.esl import esl_change_hooks, esl_collection
+from services.background import BackgroundFlusher
+
+# Stored in a level column when the label has no numeric value
+MISSING = int(np.iinfo(np.int16).min)
+LEVEL_MAX = int(np.iinfo(np.int16).max)
+
+LEVEL_FIELDS = {"batteryLevel": "battery", "signalStrength": "signal"}
+
+FLEET_PROJECTION = {"batteryLevel": 1, "signalStrength": 1, "status": 1, "storeId": 1}
+
+LOAD_BATCH_SIZE = 10000
+
+
+def _level(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return MISSING
+    return int(min(max(value, MISSING + 1), LEVEL_MAX))
+
+
+def _str_id(value) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+class FleetSnapshot:
+    """Columnar copy of the fleet: one NumPy array per field, one row per label.
+
+    Status and store are dictionary-encoded as small integer codes. Rows freed
+    by deletes are reused; ``alive`` marks the rows currently in use.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.ids = np.empty(capacity, dtype=object)
+        self.battery = np.full(capacity, MISSING, dtype=np.int16)
+        self.signal = np.full(capacity, MISSING, dtype=np.int16)
+        self.status = np.zeros(capacity, dtype=np.int32)
+        self.store = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.rows: dict = {}
+        self.free: list[int] = []
+        self.status_names: list = []
+        self.status_codes: dict = {}
+        self.store_ids: list = []
+        self.store_codes: dict = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @staticmethod
+    def _code(value, names: list, codes: dict) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _grow(self):
+        capacity = len(self.alive) * 2
+        for name, fill in (("battery", MISSING), ("signal", MISSING), ("status", 0), ("store", 0), ("alive", False)):
+            column = getattr(self, name)
+            grown = np.full(capacity, fill, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+        ids = np.empty(capacity, dtype=object)
+        ids[:self.size] = self.ids[:self.size]
+        self.ids = ids
+
+    def upsert(self, doc: dict) -> None:
+        row = self.rows.get(doc["_id"])
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                if self.size == len(self.alive):
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self.rows[doc["_id"]] = row
+            self.ids[row] = doc["_id"]
+            self.alive[row] = True
+        self.battery[row] = _level(doc.get("batteryLevel"))
+        self.signal[row] = _level(doc.get("signalStrength"))
+        self.status[row] = self._code(doc.get("status"), self.status_names, self.status_codes)
+        self.store[row] = self._code(doc.get("storeId"), self.store_ids, self.store_codes)
+
+    def extend(self, docs: list) -> None:
+        """Append labels that are not in the snapshot yet, one column assignment per field."""
+        while self.size + len(docs) > len(self.alive):
+            self._grow()
+        start, end = self.size, self.size + len(docs)
+        for offset, doc in enumerate(docs):
+            self.rows[doc["_id"]] = start + offset
+        self.ids[start:end] = [doc["_id"] for doc in docs]
+        self.battery[start:end] = [_level(doc.get("batteryLevel")) for doc in docs]
+        self.signal[start:end] = [_level(doc.get("signalStrength")) for doc in docs]
+        self.status[start:end] = [self._code(doc.get("status"), self.status_names, self.status_codes) for doc in docs]
+        self.store[start:end] = [self._code(doc.get("storeId"), self.store_ids, self.store_codes) for doc in docs]
+        self.alive[start:end] = True
+        self.size = end
+
+    def remove(self, esl_id) -> None:
+        row = self.rows.pop(esl_id, None)
+        if row is not None:
+            self.alive[row] = False
+            self.ids[row] = None
+            self.free.append(row)
+
+    def column(self, field: str) -> np.ndarray:
+        return getattr(self, LEVEL_FIELDS[field])[:self.size]
+
+    def mask(
+        self,
+        store_id: Optional[ObjectId] = None,
+        status: Optional[str] = None,
+        battery_below: Optional[int] = None,
+        signal_below: Optional[int] = None,
+    ) -> np.ndarray:
+        """Boolean mask over the rows for the filters that were given."""
+        mask = self.alive[:self.size].copy()
+        for value, codes, column in ((store_id, self.store_codes, self.store), (status, self.status_codes, self.status)):
+            if value is not None:
+                code = codes.get(value)
+                if code is None:
+                    return np.zeros(self.size, dtype=bool)
+                mask &= column[:self.size] == code
+        for below, column in ((battery_below, self.battery), (signal_below, self.signal)):
+            if below is not None:
+                values = column[:self.size]
+                mask &= (values != MISSING) & (values < below)
+        return mask
+
+    def histogram(self, field: str, mask: np.ndarray, bucket_size: int, by_store: bool) -> dict:
+        """Label counts per ``bucket_size`` wide bucket of ``field`` over 0-100.
+
+        Values below 0 are counted in the first bucket and values past the last
+        bucket's lower bound in the last one.
+        """
+        values = self.column(field)
+        selected = mask & (values != MISSING)
+        count = 100 // bucket_size + 1
+        buckets = np.clip(values[selected] // bucket_size, 0, count - 1).astype(np.int64)
+        lower = [i * bucket_size for i in range(count)]
+        if not by_store:
+            counts = np.bincount(buckets, minlength=count)
+            return {"buckets": [{"from": start, "count": int(n)} for start, n in zip(lower, counts)]}
+        stores = self.store[:self.size][selected].astype(np.int64)
+        counts = np.bincount(stores * count + buckets, minlength=len(self.store_ids) * count)
+        return {
+            "stores": [
+                {
+                    "storeId": _str_id(store_id),
+                    "buckets": [{"from": start, "count": int(n)} for start, n in zip(lower, row)],
+                }
+                for store_id, row in zip(self.store_ids, counts.reshape(len(self.store_ids), count))
+                if row.any()
+            ]
+        }
+
+    def top(self, field: str, mask: np.ndarray, k: int, highest: bool = False) -> np.ndarray:
+        """Rows of the ``k`` labels with the lowest (or highest) ``field``, best first."""
+        values = self.column(field)
+        candidates = np.flatnonzero(mask & (values != MISSING))
+        keys = values[candidates].astype(np.int32)
+        if highest:
+            keys = -keys
+        if k < len(candidates):
+            part = np.argpartition(keys, k)[:k]
+            candidates, keys = candidates[part], keys[part]
+        return candidates[np.argsort(keys, kind="stable")]
+
+    def describe(self, rows: Iterable[int]) -> list:
+        return [
+            {
+                "id": str(self.ids[row]),
+                "storeId": _str_id(self.store_ids[self.store[row]]),
+                "status": self.status_names[self.status[row]],
+                "batteryLevel": int(self.battery[row]) if self.battery[row] != MISSING else None,
+                "signalStrength": int(self.signal[row]) if self.signal[row] != MISSING else None,
+            }
+            for row in rows
+        ]
+
+
+class FleetIndex(BackgroundFlusher):
+    """In-memory columnar index of label battery, signal, status and store.
+
+    Kept current from the (before, after) pairs of every ESL write made through
+    this process, and reloaded from MongoDB every ``interval`` seconds to pick
+    up writes made elsewhere. Writes that arrive during a reload are replayed
+    onto the new snapshot before it replaces the old one. Queries are answered
+    with vectorized NumPy operations over the whole fleet.
+    """
+
+    name = "fleet-index"
+
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self.snapshot = FleetSnapshot()
+        self.loaded_at: Optional[float] = None
+        self.last_load_seconds = 0.0
+        self.changes_applied = 0
+        self._replay: Optional[list] = None
+
+    async def start(self):
+        await super().start()
+        # Load right away instead of after the first interval
+        self.wake()
+
+    def ready(self) -> FleetSnapshot:
+        if self.loaded_at is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Fleet index is loading, please retry",
+                headers={"Retry-After": "1"},
+            )
+        return self.snapshot
+
+    @staticmethod
+    def _apply(snapshot: FleetSnapshot, changes: list) -> None:
+        for before, after in changes:
+            if after is None:
+                snapshot.remove(before["_id"])
+            else:
+                snapshot.upsert(after)
+
+    async def record_changes(self, changes: list) -> None:
+        self._apply(self.snapshot, changes)
+        self.changes_applied += len(changes)
+        if self._replay is not None:
+            self._replay.extend(changes)
+
+    async def flush(self):
+        """Reload the whole fleet into a new snapshot."""
+        if self._stopping:
+            return  # nothing is buffered, so shutdown needs no final reload
+        started = time.perf_counter()
+        self._replay = []
+        try:
+            snapshot = FleetSnapshot(capacity=max(1024, len(self.snapshot)))
+            batch = []
+            async for doc in esl_collection.find({}, FLEET_PROJECTION).batch_size(LOAD_BATCH_SIZE):
+                batch.append(doc)
+                if len(batch) >= LOAD_BATCH_SIZE:
+                    snapshot.extend(batch)
+                    batch = []
+            snapshot.extend(batch)
+            self._apply(snapshot, self._replay)
+        finally:
+            self._replay = None
+        self.snapshot = snapshot
+        self.loaded_at = time.time()
+        self.last_load_seconds = time.perf_counter() - started
+
+    def stats(self) -> dict:
+        return {
+            "labels": len(self.snapshot),
+            "stores": len(self.snapshot.store_ids),
+            "loadedAt": self.loaded_at,
+            "lastLoadSeconds": round(self.last_load_seconds, 3),
+            "changesApplied": self.changes_applied,
+        }
+
+
+fleet_index = FleetIndex(interval=settings.FLEET_INDEX_REFRESH_SECONDS)
+esl_change_hooks.append(fleet_index.record_changes)
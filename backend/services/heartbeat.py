@@ -0,0 +1,132 @@
+import time
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from config.settings import settings
+from models.gateway import gateway_collection
+from services.background import BackgroundFlusher
+
+
+class HeartbeatBuffer(BackgroundFlusher):
+    """Write-behind buffer for gateway heartbeats.
+
+    Heartbeats are merged per gateway in memory: fields to ``$set`` keep the
+    latest value and counters to ``$inc`` are summed. Each flush writes every
+    buffered gateway with one unordered ``bulk_write`` of ``UpdateOne``
+    operations, so a gateway costs one write per interval however often it beats.
+    Heartbeats for unknown gateway ids match nothing and are dropped by Mongo.
+    After each flush, every function in ``hooks`` receives the fields written,
+    keyed by gateway id.
+
+    Memory is bounded by the number of distinct gateways buffered. At
+    ``max_pending`` of them the flusher is woken early. At ``max_buffered``,
+    beats from gateways that are not buffered yet are refused with a 503 and
+    ``Retry-After`` until a flush drains the buffer. Beats that merge into an
+    existing entry are always accepted, since they take no extra memory.
+    """
+
+    name = "heartbeat-buffer"
+
+    def __init__(self, interval: float, max_pending: int, max_buffered: int):
+        super().__init__(interval)
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        # gateway id -> [fields to $set, counters to $inc, monotonic time of first buffered beat]
+        self._pending: dict[ObjectId, list] = {}
+        self.received = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.gateways_written = 0
+        self.last_flush_size = 0
+        self.last_flush_lag = 0.0
+        self.max_flush_lag = 0.0
+        self.hooks: list = []
+
+    def record(self, gateway_id: ObjectId, fields: dict, counters: dict, received_at: Optional[float] = None):
+        if gateway_id not in self._pending and len(self._pending) >= self.max_buffered:
+            self.rejected += 1
+            self.wake()
+            raise HTTPException(
+                status_code=503,
+                detail="Heartbeat ingestion is saturated, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.received += 1
+        self._merge(gateway_id, fields, counters, received_at or time.monotonic())
+        if len(self._pending) >= self.max_pending:
+            self.wake()
+
+    def add_counters(self, gateway_id: ObjectId, counters: dict) -> None:
+        """Buffer counter increments that did not come from a heartbeat (e.g. dispatch outcomes).
+
+        Never refused: callers are internal and only report gateways that exist.
+        """
+        self._merge(gateway_id, {}, counters, time.monotonic())
+        if len(self._pending) >= self.max_pending:
+            self.wake()
+
+    def _merge(self, gateway_id: ObjectId, fields: dict, counters: dict, first_seen: float):
+        entry = self._pending.get(gateway_id)
+        if entry is None:
+            self._pending[gateway_id] = [dict(fields), dict(counters), first_seen]
+            return
+        entry[0].update(fields)
+        for key, value in counters.items():
+            entry[1][key] = entry[1].get(key, 0) + value
+        entry[2] = min(entry[2], first_seen)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        ops = []
+        for gateway_id, (fields, counters, _) in pending.items():
+            update = {}
+            if fields:
+                update["$set"] = fields
+            if counters:
+                update["$inc"] = counters
+            ops.append(UpdateOne({"_id": gateway_id}, update))
+        try:
+            await gateway_collection.bulk_write(ops, ordered=False)
+        except Exception:
+            # Put the batch back (merging with anything that arrived meanwhile) for the next flush
+            for gateway_id, (fields, counters, first_seen) in pending.items():
+                newer = self._pending.pop(gateway_id, None)
+                self._pending[gateway_id] = [fields, counters, first_seen]
+                if newer is not None:
+                    self._merge(gateway_id, *newer)
+            raise
+
+        # Flush lag: how long the oldest heartbeat in the batch waited to reach Mongo
+        lag = time.monotonic() - min(first_seen for _, _, first_seen in pending.values())
+        self.flushes += 1
+        self.gateways_written += len(ops)
+        self.last_flush_size = len(ops)
+        self.last_flush_lag = lag
+        self.max_flush_lag = max(self.max_flush_lag, lag)
+        written = {gateway_id: fields for gateway_id, (fields, _, _) in pending.items()}
+        for hook in self.hooks:
+            await hook(written)
+
+    def stats(self) -> dict:
+        oldest = min((entry[2] for entry in self._pending.values()), default=None)
+        return {
+            "pendingGateways": len(self._pending),
+            "received": self.received,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "gatewaysWritten": self.gateways_written,
+            "lastFlushSize": self.last_flush_size,
+            "lastFlushLagSeconds": round(self.last_flush_lag, 3),
+            "maxFlushLagSeconds": round(self.max_flush_lag, 3),
+            "oldestPendingSeconds": round(time.monotonic() - oldest, 3) if oldest is not None else None,
+        }
+
+
+heartbeat_buffer = HeartbeatBuffer(
+    interval=settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.HEARTBEAT_MAX_PENDING,
+    max_buffered=settings.HEARTBEAT_MAX_BUFFERED,
+)
@@ -0,0 +1,113 @@
+import struct
+import numpy as np
+
+# First byte of every payload
+FULL, RECTS, RLE = 0, 1, 2
+ENCODING_NAMES = {FULL: "full", RECTS: "rects", RLE: "rle"}
+
+# Zero bytes tolerated inside one RLE literal before a new run is started;
+# a run header costs at least two bytes, so shorter gaps are cheaper to inline
+RLE_MAX_GAP = 2
+
+_RECT_HEADER = struct.Struct("<HHHH")  # y, height, x (bytes), width (bytes)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _encode_rects(new: np.ndarray, diff: np.ndarray) -> bytes:
+    """One rectangle per run of consecutive changed rows, spanning that run's changed byte columns."""
+    rows = np.flatnonzero(diff.any(axis=1))
+    breaks = np.flatnonzero(np.diff(rows) > 1) + 1
+    out = bytearray([RECTS])
+    bands = np.split(rows, breaks) if rows.size else []
+    out += _varint(len(bands))
+    for band in bands:
+        y0, y1 = int(band[0]), int(band[-1]) + 1
+        cols = np.flatnonzero(diff[y0:y1].any(axis=0))
+        x0, x1 = int(cols[0]), int(cols[-1]) + 1
+        out += _RECT_HEADER.pack(y0, y1 - y0, x0, x1 - x0)
+        out += new[y0:y1, x0:x1].tobytes()
+    return bytes(out)
+
+
+def _encode_rle(diff: np.ndarray) -> bytes:
+    """Runs of XOR bytes as (skip, length, bytes) triples over the flattened frame."""
+    flat = diff.ravel()
+    changed = np.flatnonzero(flat)
+    out = bytearray([RLE])
+    if changed.size == 0:
+        out += _varint(0)
+        return bytes(out)
+    breaks = np.flatnonzero(np.diff(changed) > RLE_MAX_GAP + 1)
+    starts = changed[np.concatenate(([0], breaks + 1))]
+    ends = changed[np.concatenate((breaks, [changed.size - 1]))] + 1
+    out += _varint(len(starts))
+    pos = 0
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        out += _varint(start - pos)
+        out += _varint(end - start)
+        out += flat[start:end].tobytes()
+        pos = end
+    return bytes(out)
+
+
+def encode_delta(previous, new: bytes, height: int) -> bytes:
+    """Smallest of changed rectangles, XOR run-length delta or a full frame.
+
+    ``previous`` and ``new`` are packed frames of the same label size and bit
+    depth (``height`` rows of equal length); with no usable previous frame the
+    full frame is sent.
+    """
+    full = bytes([FULL]) + new
+    if previous is None or len(previous) != len(new):
+        return full
+    new_rows = np.frombuffer(new, dtype=np.uint8).reshape(height, -1)
+    diff = np.frombuffer(previous, dtype=np.uint8).reshape(height, -1) ^ new_rows
+    candidates = [full, _encode_rects(new_rows, diff), _encode_rle(diff)]
+    return min(candidates, key=len)
+
+
+def apply_delta(previous, payload: bytes, height: int) -> bytes:
+    """Rebuild the new frame from the previous one and a payload from ``encode_delta``."""
+    encoding = payload[0]
+    if encoding == FULL:
+        return payload[1:]
+    frame = np.frombuffer(previous, dtype=np.uint8).reshape(height, -1).copy()
+    count, pos = _read_varint(payload, 1)
+    if encoding == RECTS:
+        for _ in range(count):
+            y, h, x, w = _RECT_HEADER.unpack_from(payload, pos)
+            pos += _RECT_HEADER.size
+            frame[y:y + h, x:x + w] = np.frombuffer(payload, dtype=np.uint8, count=h * w, offset=pos).reshape(h, w)
+            pos += h * w
+    elif encoding == RLE:
+        flat = frame.reshape(-1)
+        offset = 0
+        for _ in range(count):
+            skip, pos = _read_varint(payload, pos)
+            length, pos = _read_varint(payload, pos)
+            offset += skip
+            flat[offset:offset + length] ^= np.frombuffer(payload, dtype=np.uint8, count=length, offset=pos)
+            pos += length
+            offset += length
+    else:
+        raise ValueError(f"Unknown frame encoding: {encoding}")
+    return frame.tobytes()
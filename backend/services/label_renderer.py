@@ -0,0 +1,397 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+from bson import Binary
+from fastapi.concurrency import run_in_threadpool
+from pymongo import UpdateMany, UpdateOne
+from config.settings import settings
+from models.esl import esl_collection
+from models.label_frame import label_frame_collection
+from utils.cache import TTLCache
+
+TEMPLATE_VERSION = "price-v1"
+
+# Panel resolution (width, height) per labelSize
+LABEL_SIZES = {
+    "2.9 inch": (296, 128),
+    "4.2 inch": (400, 300),
+    "7.5 inch": (800, 480),
+}
+
+# Integer glyph scale factors and margin per panel
+LAYOUTS = {
+    "2.9 inch": {"name": 2, "price": 6, "small": 2, "margin": 6},
+    "4.2 inch": {"name": 3, "price": 9, "small": 3, "margin": 10},
+    "7.5 inch": {"name": 5, "price": 14, "small": 4, "margin": 16},
+}
+
+WHITE, BLACK, RED = 0, 1, 2
+
+RENDER_BATCH_SIZE = 1000
+
+# Fields read from an ESL document to render it
+RENDER_PROJECTION = {"labelSize": 1, "productName": 1, "sellingPrice": 1, "mrp": 1, "discount": 1, "renderHash": 1}
+
+# 5x7 bitmap font; lowercase is rendered as uppercase and unknown characters as "?"
+_FONT = {
+    " ": "00000 00000 00000 00000 00000 00000 00000",
+    "0": "01110 10001 10011 10101 11001 10001 01110",
+    "1": "00100 01100 00100 00100 00100 00100 01110",
+    "2": "01110 10001 00001 00010 00100 01000 11111",
+    "3": "11111 00010 00100 00010 00001 10001 01110",
+    "4": "00010 00110 01010 10010 11111 00010 00010",
+    "5": "11111 10000 11110 00001 00001 10001 01110",
+    "6": "00110 01000 10000 11110 10001 10001 01110",
+    "7": "11111 00001 00010 00100 01000 01000 01000",
+    "8": "01110 10001 10001 01110 10001 10001 01110",
+    "9": "01110 10001 10001 01111 00001 00010 01100",
+    "A": "01110 10001 10001 11111 10001 10001 10001",
+    "B": "11110 10001 10001 11110 10001 10001 11110",
+    "C": "01110 10001 10000 10000 10000 10001 01110",
+    "D": "11100 10010 10001 10001 10001 10010 11100",
+    "E": "11111 10000 10000 11110 10000 10000 11111",
+    "F": "11111 10000 10000 11110 10000 10000 10000",
+    "G": "01110 10001 10000 10111 10001 10001 01111",
+    "H": "10001 10001 10001 11111 10001 10001 10001",
+    "I": "01110 00100 00100 00100 00100 00100 01110",
+    "J": "00111 00010 00010 00010 00010 10010 01100",
+    "K": "10001 10010 10100 11000 10100 10010 10001",
+    "L": "10000 10000 10000 10000 10000 10000 11111",
+    "M": "10001 11011 10101 10101 10001 10001 10001",
+    "N": "10001 10001 11001 10101 10011 10001 10001",
+    "O": "01110 10001 10001 10001 10001 10001 01110",
+    "P": "11110 10001 10001 11110 10000 10000 10000",
+    "Q": "01110 10001 10001 10001 10101 10010 01101",
+    "R": "11110 10001 10001 11110 10100 10010 10001",
+    "S": "01111 10000 10000 01110 00001 00001 11110",
+    "T": "11111 00100 00100 00100 00100 00100 00100",
+    "U": "10001 10001 10001 10001 10001 10001 01110",
+    "V": "10001 10001 10001 10001 10001 01010 00100",
+    "W": "10001 10001 10001 10101 10101 10101 01010",
+    "X": "10001 10001 01010 00100 01010 10001 10001",
+    "Y": "10001 10001 10001 01010 00100 00100 00100",
+    "Z": "11111 00001 00010 00100 01000 10000 11111",
+    ".": "00000 00000 00000 00000 00000 01100 01100",
+    ",": "00000 00000 00000 00000 01100 00100 01000",
+    "-": "00000 00000 00000 11111 00000 00000 00000",
+    "$": "00100 01111 10100 01110 00101 11110 00100",
+    "%": "11000 11001 00010 00100 01000 10011 00011",
+    "/": "00000 00001 00010 00100 01000 10000 00000",
+    ":": "00000 01100 01100 00000 01100 01100 00000",
+    "#": "01010 01010 11111 01010 11111 01010 01010",
+    "&": "01100 10010 10100 01000 10101 10010 01101",
+    "'": "01100 00100 01000 00000 00000 00000 00000",
+    "(": "00010 00100 01000 01000 01000 00100 00010",
+    ")": "01000 00100 00010 00010 00010 00100 01000",
+    "+": "00000 00100 00100 11111 00100 00100 00000",
+    "?": "01110 10001 00001 00010 00100 00000 00100",
+    "!": "00100 00100 00100 00100 00100 00000 00100",
+    "*": "00000 00100 10101 01110 10101 00100 00000",
+}
+GLYPH_HEIGHT, GLYPH_WIDTH = 7, 5
+GLYPH_ADVANCE = GLYPH_WIDTH + 1
+
+
+def _build_glyph_table() -> np.ndarray:
+    """(128, 7, 6) boolean glyph table indexed by ASCII code, one blank spacing column per glyph."""
+    table = np.zeros((128, GLYPH_HEIGHT, GLYPH_ADVANCE), dtype=bool)
+    for char, rows in _FONT.items():
+        bits = np.array([[c == "1" for c in row] for row in rows.split()], dtype=bool)
+        table[ord(char), :, :GLYPH_WIDTH] = bits
+        if char.isalpha():
+            table[ord(char.lower()), :, :GLYPH_WIDTH] = bits
+    known = np.zeros(128, dtype=bool)
+    known[[ord(c) for c in _FONT] + [ord(c.lower()) for c in _FONT if c.isalpha()]] = True
+    table[~known] = table[ord("?")]
+    return table
+
+
+GLYPHS = _build_glyph_table()
+
+
+@dataclass(frozen=True)
+class RenderedLabel:
+    width: int
+    height: int
+    bits_per_pixel: int
+    content_hash: str
+    data: bytes
+
+
+def label_content(esl: dict) -> dict:
+    """The fields of an ESL record that are printed on the label."""
+    return {
+        "productName": esl.get("productName") or "",
+        "sellingPrice": esl.get("sellingPrice"),
+        "mrp": esl.get("mrp"),
+        "discount": esl.get("discount"),
+    }
+
+
+def content_hash(label_size: str, content: dict, bits_per_pixel: int) -> str:
+    key = json.dumps([TEMPLATE_VERSION, label_size, bits_per_pixel, content], sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def text_mask(text: str, scale: int) -> np.ndarray:
+    """Rasterise ``text`` into a boolean mask with one vectorised gather and two repeats.
+
+    Masks are memoised because prices and footer strings repeat across labels;
+    callers must treat the returned array as read-only.
+    """
+    codes = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8) & 0x7F
+    if codes.size == 0:
+        return np.zeros((GLYPH_HEIGHT * scale, 0), dtype=bool)
+    row = GLYPHS[codes].transpose(1, 0, 2).reshape(GLYPH_HEIGHT, -1)[:, :-1]  # drop trailing spacing
+    return row.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+def _fit(text: str, scale: int, max_width: int) -> tuple[str, int]:
+    """Shrink the scale, then truncate, until ``text`` fits in ``max_width`` pixels."""
+    while scale > 1 and len(text) * GLYPH_ADVANCE * scale > max_width:
+        scale -= 1
+    max_chars = max(1, (max_width + scale) // (GLYPH_ADVANCE * scale))
+    return text[:max_chars], scale
+
+
+def _blit(canvas: np.ndarray, mask: np.ndarray, y: int, x: int, color: int) -> None:
+    h = min(mask.shape[0], canvas.shape[0] - y)
+    w = min(mask.shape[1], canvas.shape[1] - x)
+    if h > 0 and w > 0:
+        canvas[y:y + h, x:x + w][mask[:h, :w]] = color
+
+
+def _format_price(value: Optional[float]) -> str:
+    return "--.--" if value is None else f"{value:.2f}"
+
+
+def render_pixels(label_size: str, content: dict, bits_per_pixel: int = 1) -> np.ndarray:
+    """Lay the label out as a (height, width) uint8 array of WHITE/BLACK/RED pixels."""
+    if label_size not in LABEL_SIZES:
+        raise ValueError(f"Unsupported label size: {label_size}")
+    width, height = LABEL_SIZES[label_size]
+    layout = LAYOUTS[label_size]
+    margin = layout["margin"]
+    inner_width = width - 2 * margin
+    accent = RED if bits_per_pixel == 2 else BLACK
+    canvas = np.zeros((height, width), dtype=np.uint8)
+
+    # Product name and a rule underneath it
+    name, scale = _fit(content["productName"].upper(), layout["name"], inner_width)
+    _blit(canvas, text_mask(name, scale), margin, margin, BLACK)
+    rule_y = margin + GLYPH_HEIGHT * scale + scale
+    canvas[rule_y:rule_y + max(1, scale // 2), margin:width - margin] = BLACK
+
+    # Selling price, centred in the body
+    small = layout["small"]
+    footer_height = GLYPH_HEIGHT * small + margin
+    price, scale = _fit(_format_price(content["sellingPrice"]), layout["price"], inner_width)
+    price_mask = text_mask(price, scale)
+    body_top, body_bottom = rule_y + scale, height - footer_height
+    price_y = max(body_top, body_top + (body_bottom - body_top - price_mask.shape[0]) // 2)
+    _blit(canvas, price_mask, price_y, (width - price_mask.shape[1]) // 2, BLACK)
+
+    footer_y = height - margin - GLYPH_HEIGHT * small
+    mrp, selling_price = content.get("mrp"), content.get("sellingPrice")
+    if mrp is not None and selling_price is not None and mrp > selling_price:
+        mrp_mask = text_mask(f"MRP {mrp:.2f}", small)
+        _blit(canvas, mrp_mask, footer_y, margin, BLACK)
+        strike_y = footer_y + mrp_mask.shape[0] // 2
+        canvas[strike_y:strike_y + max(1, small // 2), margin:margin + mrp_mask.shape[1]] = accent
+
+    if content.get("discount"):
+        save_mask = text_mask(f"SAVE {content['discount']:.2f}", small)
+        x = width - margin - save_mask.shape[1]
+        if bits_per_pixel == 2:
+            _blit(canvas, save_mask, footer_y, x, RED)
+        else:
+            # Inverted tag: black box with white text
+            pad = small
+            canvas[footer_y - pad:footer_y + save_mask.shape[0] + pad, x - pad:width - margin + pad] = BLACK
+            _blit(canvas, save_mask, footer_y, x, WHITE)
+    return canvas
+
+
+_PACK_2BPP = np.uint32((1 << 30) | (1 << 20) | (1 << 10) | 1)
+
+
+def pack_pixels(canvas: np.ndarray, bits_per_pixel: int) -> bytes:
+    """Pack pixels MSB-first: 8 px/byte at 1 bpp (any ink is black), 4 px/byte at 2 bpp."""
+    if bits_per_pixel == 1:
+        # Panel widths are multiples of 8, so rows pack without padding
+        return np.packbits(canvas).tobytes()
+    # Read each run of 4 pixels as one little-endian word p0 | p1<<8 | p2<<16 | p3<<24;
+    # one multiply moves them to p0<<30 | p1<<28 | p2<<26 | p3<<24 with no carries
+    words = np.ascontiguousarray(canvas).view("<u4")
+    return ((words * _PACK_2BPP) >> 24).astype(np.uint8).tobytes()
+
+
+def unpack_pixels(data: bytes, width: int, height: int, bits_per_pixel: int) -> np.ndarray:
+    packed = np.frombuffer(data, dtype=np.uint8).reshape(height, -1)
+    if bits_per_pixel == 1:
+        return np.unpackbits(packed, axis=1)[:, :width]
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    return ((packed[..., None] >> shifts) & 0b11).reshape(height, -1)[:, :width]
+
+
+def rasterise(label_size: str, content: dict, bits_per_pixel: int, key: str) -> RenderedLabel:
+    width, height = LABEL_SIZES.get(label_size, (0, 0))
+    pixels = render_pixels(label_size, content, bits_per_pixel)
+    return RenderedLabel(width, height, bits_per_pixel, key, pack_pixels(pixels, bits_per_pixel))
+
+
+class LabelRenderer:
+    """Renders labels through a content-addressed cache.
+
+    The cache key hashes the template version, label size, bit depth and printed
+    content, so identical labels (the same product on many shelves) are rasterised
+    once and a label whose content has not changed is never rendered again.
+
+    Newly rendered frames are also stored in ``label_frames`` by ``persist`` so
+    they can serve as the base of a later delta update. Frames carry a
+    ``lastUsedAt`` that a TTL index expires them by. Rendering or diffing against
+    a frame marks it used, and ``persist`` writes that back at most once per
+    ``touch_interval`` per frame, so a cache hit costs no write of its own.
+
+    Frames vary from a few KB to ~96 KB, so the cache is bounded by bytes as well
+    as by count. Only the event loop writes to the cache or the bookkeeping:
+    worker threads read the cache and rasterise, and hand new frames back.
+    """
+
+    def __init__(self, cache_size: int, touch_interval: float, cache_bytes: Optional[int] = None):
+        self.cache = TTLCache(maxsize=cache_size, ttl=float("inf"), maxbytes=cache_bytes, sizeof=lambda label: len(label.data))
+        # Frames whose lastUsedAt was refreshed within the interval
+        self._touched = TTLCache(maxsize=cache_size, ttl=touch_interval)
+        self.rendered = 0
+        self.touches = 0
+        self._unsaved: dict[str, RenderedLabel] = {}
+        self._used: set = set()
+
+    def _use(self, key: str) -> None:
+        if self._touched.get(key) is None:
+            self._used.add(key)
+
+    def _add(self, label: RenderedLabel) -> None:
+        self.cache.set(label.content_hash, label)
+        self._unsaved[label.content_hash] = label
+        self.rendered += 1
+
+    def render(self, label_size: str, content: dict, bits_per_pixel: int = 1) -> RenderedLabel:
+        key = content_hash(label_size, content, bits_per_pixel)
+        label = self.cache.get(key)
+        if label is not None:
+            self._use(key)
+        else:
+            label = rasterise(label_size, content, bits_per_pixel, key)
+            self._add(label)
+        return label
+
+    def render_esl(self, esl: dict, bits_per_pixel: int = 1) -> RenderedLabel:
+        return self.render(esl.get("labelSize"), label_content(esl), bits_per_pixel)
+
+    async def persist(self):
+        """Upsert frames rendered since the last call into ``label_frames`` and refresh the ones used since."""
+        now = datetime.utcnow()
+        ops = []
+        used, self._used = self._used, set()
+        for key in used:
+            self._touched.set(key, True)
+        if used:
+            ops.append(UpdateMany({"_id": {"$in": list(used)}}, {"$set": {"lastUsedAt": now}}))
+            self.touches += len(used)
+        while self._unsaved:
+            key, label = self._unsaved.popitem()
+            frame = {
+                "width": label.width,
+                "height": label.height,
+                "bitsPerPixel": label.bits_per_pixel,
+                "data": Binary(label.data),
+            }
+            ops.append(UpdateOne({"_id": key}, {"$setOnInsert": frame, "$set": {"lastUsedAt": now}}, upsert=True))
+            self._touched.set(key, True)
+        if ops:
+            await label_frame_collection.bulk_write(ops, ordered=False)
+
+    async def load_frame(self, key: str) -> Optional[RenderedLabel]:
+        label = self.cache.get(key)
+        if label is not None:
+            self._use(key)
+        else:
+            doc = await label_frame_collection.find_one({"_id": key})
+            if doc is None:
+                return None
+            label = RenderedLabel(doc["width"], doc["height"], doc["bitsPerPixel"], key, bytes(doc["data"]))
+            self.cache.set(key, label)
+            self._use(key)
+        return label
+
+    def _render_many(self, docs: list, bits_per_pixel: int) -> tuple[list, dict]:
+        """Runs in a worker thread: the label for each doc (``None`` if it cannot be
+        rendered) and the newly rasterised ones by hash, left for the loop to add."""
+        labels, new = [], {}
+        for doc in docs:
+            size, content = doc.get("labelSize"), label_content(doc)
+            key = content_hash(size, content, bits_per_pixel)
+            label = new.get(key) or self.cache.get(key)
+            if label is None:
+                try:
+                    label = new[key] = rasterise(size, content, bits_per_pixel, key)
+                except ValueError:
+                    pass
+            labels.append(label)
+        return labels, new
+
+    async def render_store(self, store_id, bits_per_pixel: int = 1) -> dict:
+        """Re-render every label in a store and record the hashes of the ones that changed.
+
+        Rendering runs in the threadpool one batch at a time; only labels whose
+        ``renderHash`` differs from the new image are written back, so those are
+        the only ones that need sending to the gateway.
+        """
+        started = time.perf_counter()
+        summary = {"labels": 0, "changed": 0, "unchanged": 0, "failed": 0}
+        cursor = esl_collection.find({"storeId": store_id}, RENDER_PROJECTION).batch_size(RENDER_BATCH_SIZE)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= RENDER_BATCH_SIZE:
+                await self._render_batch(batch, bits_per_pixel, summary)
+                batch = []
+        if batch:
+            await self._render_batch(batch, bits_per_pixel, summary)
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    async def _render_batch(self, docs: list, bits_per_pixel: int, summary: dict):
+        labels, new = await run_in_threadpool(self._render_many, docs, bits_per_pixel)
+        for label in new.values():
+            self._add(label)
+        for key in {label.content_hash for label in labels if label is not None} - new.keys():
+            self._use(key)
+        ops = []
+        for doc, label in zip(docs, labels):
+            if label is None:
+                summary["failed"] += 1
+            elif doc.get("renderHash") == label.content_hash:
+                summary["unchanged"] += 1
+            else:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"renderHash": label.content_hash}}))
+        summary["labels"] += len(docs)
+        summary["changed"] += len(ops)
+        if ops:
+            await esl_collection.bulk_write(ops, ordered=False)
+        await self.persist()
+
+    def stats(self) -> dict:
+        return {"rendered": self.rendered, "frameTouches": self.touches, "cache": self.cache.stats()}
+
+
+label_renderer = LabelRenderer(
+    settings.RENDER_CACHE_MAX_SIZE, settings.LABEL_FRAME_TOUCH_INTERVAL_SECONDS, settings.RENDER_CACHE_MAX_BYTES
+)
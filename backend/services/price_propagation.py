@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import Iterable
+from bson import ObjectId
+from pymongo import UpdateMany
+from config.settings import settings
+from database.versions import change_versions
+from models.esl import esl_collection, record_changes
+from models.gateway import gateway_collection
+from models.product import product_collection
+from models.sync_log import record_changes as record_sync_log_changes, sync_log_collection
+from services.background import BackgroundFlusher
+
+# Product fields that are printed on a label
+PRICE_FIELDS = ("mrp", "discount", "sellingPrice")
+
+SYNC_LOG_CHUNK_SIZE = 1000
+
+
+class PricePropagator(BackgroundFlusher):
+    """Turns product changes into batched, deduplicated label updates.
+
+    Changed product ids are buffered as an ordered set, so repeated edits to the
+    same product collapse into one job. Each flush takes up to ``batch_size``
+    products and then:
+
+    - reads the products with one ``$in`` query
+    - finds the labels whose price content is out of date
+    - rewrites them with one unordered ``bulk_write`` of ``UpdateMany`` per product,
+      stamping each product's labels with a new change version
+    - reports the rewritten labels to the ESL change hooks, like any other ESL
+      write (live events, store counters, fleet index, dispatch ahead of other updates)
+    - records a ``pending`` sync log per label with ``insert_many`` and reports them to
+      the sync log change hooks (hourly rollups, live events), like the sync log writer
+    """
+
+    name = "price-propagation"
+
+    def __init__(self, batch_size: int, interval: float):
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self._pending: dict[ObjectId, None] = {}
+        self.products_processed = 0
+        self.labels_updated = 0
+        self.sync_logs_written = 0
+
+    def enqueue(self, product_ids: Iterable) -> None:
+        for product_id in product_ids:
+            self._pending[ObjectId(product_id)] = None
+        if len(self._pending) >= self.batch_size:
+            self.wake()
+
+    async def flush(self):
+        while self._pending:
+            batch = list(self._pending)[:self.batch_size]
+            for product_id in batch:
+                del self._pending[product_id]
+            await self._propagate(batch)
+
+    async def _propagate(self, product_ids: list):
+        projection = {field: 1 for field in PRICE_FIELDS}
+        products = [p async for p in product_collection.find({"_id": {"$in": product_ids}}, projection)]
+        self.products_processed += len(products)
+
+        if not products:
+            return
+        async with change_versions.allocate(len(products)) as stamps:
+            ops = []
+            stale_filters = []
+            updates = {}
+            for product in products:
+                content = {field: product.get(field) for field in PRICE_FIELDS}
+                stale = {"productId": product["_id"], "$or": [{k: {"$ne": v}} for k, v in content.items()]}
+                stale_filters.append(stale)
+                updates[product["_id"]] = dict(content, changeVersion=next(stamps))
+                ops.append(UpdateMany(stale, {"$set": updates[product["_id"]]}))
+
+            # Collect the affected labels before rewriting them; the same filters select them
+            labels = [label async for label in esl_collection.find({"$or": stale_filters})]
+            await esl_collection.bulk_write(ops, ordered=False)
+        self.labels_updated += len(labels)
+        await record_changes([(label, dict(label, **updates[label["productId"]])) for label in labels])
+        await self._record_sync_logs(labels)
+
+    async def _record_sync_logs(self, labels: list):
+        if not labels:
+            return
+        store_ids = list({label.get("storeId") for label in labels})
+        gateways = {}
+        async for gateway in gateway_collection.find({"storeId": {"$in": store_ids}}, {"storeId": 1}):
+            gateways.setdefault(gateway["storeId"], str(gateway["_id"]))
+
+        created_at = datetime.utcnow()
+        logs = [
+            {
+                "eslId": str(label["_id"]),
+                "productName": label.get("productName"),
+                "gatewayId": gateways.get(label.get("storeId"), ""),
+                "storeName": label.get("storeName"),
+                "status": "pending",
+                "syncedAt": created_at,
+                "errorMessage": None,
+                "duration": 0.0,
+                "createdAt": created_at,
+            }
+            for label in labels
+        ]
+        for start in range(0, len(logs), SYNC_LOG_CHUNK_SIZE):
+            chunk = logs[start:start + SYNC_LOG_CHUNK_SIZE]
+            await sync_log_collection.insert_many(chunk, ordered=False)
+            await record_sync_log_changes([(None, log) for log in chunk])
+        self.sync_logs_written += len(logs)
+
+    def stats(self) -> dict:
+        return {
+            "pendingProducts": len(self._pending),
+            "productsProcessed": self.products_processed,
+            "labelsUpdated": self.labels_updated,
+            "syncLogsWritten": self.sync_logs_written,
+        }
+
+
+price_propagator = PricePropagator(
+    batch_size=settings.PRICE_PROPAGATION_BATCH_SIZE,
+    interval=settings.PRICE_PROPAGATION_INTERVAL_SECONDS,
+)
@@ -0,0 +1,260 @@
+from typing import Iterable, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateMany
+from config.settings import settings
+from database.versions import allocate, change_versions
+from models.esl import esl_collection, record_changes as record_esl_changes
+from models.gateway import gateway_collection, record_changes as record_gateway_changes
+from models.product import product_change_hooks, product_collection
+from models.store import store_change_hooks, store_collection
+from services.price_propagation import PRICE_FIELDS
+from utils.cache import TTLCache
+
+
+def ambiguous_message(model: str, name: str) -> str:
+    return f"{model} name '{name}' is ambiguous; send its id instead"
+
+
+class ReferenceResolver:
+    """Cached name <-> ObjectId lookups for one referenced collection.
+
+    Clients may still identify stores and products by name; each name or id is
+    resolved once and then served from an in-process LRU cache, with misses for a
+    whole batch fetched in one ``$in`` query. Renames go through ``renamed``,
+    which drops the stale entries and copies the new name onto the documents in
+    ``referenced_by`` (collection, id field, name field, change versions or
+    None, change hook), where it is kept for display only. Other processes see a
+    rename once their entries expire. ``copied`` fields are content the
+    referencing documents show as well; they are read uncached whenever a
+    reference is set.
+
+    Names are not unique, so a name is only cached when one document has it; a
+    name shared by several documents is ambiguous and has to be sent as an id.
+    """
+
+    def __init__(self, collection, name: str, referenced_by: list, maxsize: int, ttl: float, copied: tuple = ()):
+        self.collection = collection
+        self.name = name
+        self.referenced_by = referenced_by
+        self.copied = copied
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def _fetch(self, query: dict) -> list:
+        # A rename or delete that lands during the read makes it stale; forget() bumps the generation
+        generation = self.cache.generation()
+        docs = [doc async for doc in self.collection.find(query, {"name": 1})]
+        for doc in docs:
+            self.cache.set(("id", doc["_id"]), doc.get("name"), generation=generation)
+        return docs
+
+    async def find_ids(self, names: Iterable[str]) -> tuple[dict, set]:
+        """Map each name held by exactly one document to its id, and return the ambiguous names apart.
+
+        Unknown names are left out of both.
+        """
+        found, missing = {}, []
+        for name in set(names):
+            doc_id = self.cache.get(("name", name))
+            if doc_id is None:
+                missing.append(name)
+            else:
+                found[name] = doc_id
+        ambiguous = set()
+        if missing:
+            generation = self.cache.generation()
+            matches = {}
+            for doc in await self._fetch({"name": {"$in": missing}}):
+                matches.setdefault(doc.get("name"), []).append(doc["_id"])
+            for name, ids in matches.items():
+                if len(ids) > 1:
+                    ambiguous.add(name)
+                else:
+                    found[name] = ids[0]
+                    self.cache.set(("name", name), ids[0], generation=generation)
+        return found, ambiguous
+
+    async def ids_for(self, names: Iterable[str]) -> dict:
+        """Map each known name to its id; unknown names are left out and ambiguous ones refused with a 409."""
+        found, ambiguous = await self.find_ids(names)
+        if ambiguous:
+            raise HTTPException(status_code=409, detail=ambiguous_message(self.name, min(ambiguous)))
+        return found
+
+    async def names_for(self, ids: Iterable[ObjectId]) -> dict:
+        """Map each existing id to its current name; unknown ids are left out."""
+        found, missing = {}, []
+        for doc_id in set(ids):
+            name = self.cache.get(("id", doc_id))
+            if name is None:
+                missing.append(doc_id)
+            else:
+                found[doc_id] = name
+        if missing:
+            for doc in await self._fetch({"_id": {"$in": missing}}):
+                found[doc["_id"]] = doc.get("name")
+        return found
+
+    async def copied_values(self, ids: Iterable[ObjectId]) -> dict:
+        """Map each existing id to the current values of the ``copied`` fields."""
+        ids = list(set(ids))
+        if not ids:
+            return {}
+        projection = dict.fromkeys(self.copied, 1)
+        docs = self.collection.find({"_id": {"$in": ids}}, projection)
+        return {doc["_id"]: {field: doc.get(field) for field in self.copied} async for doc in docs}
+
+    def forget(self, names: Iterable[str] = (), ids: Iterable[ObjectId] = ()) -> None:
+        for name in names:
+            self.cache.pop(("name", name))
+        for doc_id in ids:
+            self.cache.pop(("id", doc_id))
+
+    async def renamed(self, previous: dict, current: dict) -> None:
+        """Apply renames given the {id: name} before and after an update.
+
+        The referencing documents are read before the rewrite and reported to
+        their collection's change hook, like any other write to them.
+        """
+        renames = {doc_id: name for doc_id, name in current.items() if doc_id in previous and previous[doc_id] != name}
+        if not renames:
+            return
+        self.forget(names=[previous[doc_id] for doc_id in renames], ids=renames)
+        for collection, id_field, name_field, versions, on_change in self.referenced_by:
+            async with allocate(versions, len(renames)) as stamps:
+                # Collect the affected documents before rewriting them; the same filters select them
+                docs = [doc async for doc in collection.find({id_field: {"$in": list(renames)}})]
+                ops, updates = [], {}
+                for doc_id, name in renames.items():
+                    updates[doc_id] = {name_field: name}
+                    if stamps:
+                        updates[doc_id]["changeVersion"] = next(stamps)
+                    ops.append(UpdateMany({id_field: doc_id}, {"$set": updates[doc_id]}))
+                await collection.bulk_write(ops, ordered=False)
+            if docs:
+                await on_change([(doc, dict(doc, **updates[doc[id_field]])) for doc in docs])
+
+    async def record_changes(self, changes: list) -> None:
+        """Change hook for the referenced collection: apply renames and forget deleted documents.
+
+        The previous names come from the before documents the repository already
+        reads back, so an update or delete costs no extra query.
+        """
+        previous = {before["_id"]: before.get("name") for before, _ in changes if before is not None}
+        await self.renamed(previous, {after["_id"]: after.get("name") for _, after in changes if after is not None})
+        deleted = [before for before, after in changes if before is not None and after is None]
+        self.forget(names=[doc.get("name") for doc in deleted], ids=[doc["_id"] for doc in deleted])
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+class References:
+    """The references one model holds, as ``(id field, name field, resolver)`` triples."""
+
+    def __init__(self, *references: tuple):
+        self.references = references
+
+    async def resolve(self, docs: list, required: bool = True) -> list:
+        """Fill in each document's ObjectId and display name from whichever of the two was sent.
+
+        Returns one error message (or None) per document. With ``required`` unset,
+        as for partial updates, references that were not sent are left alone.
+        Documents that set a reference also get the resolver's ``copied`` fields.
+        """
+        errors: list[Optional[str]] = [None] * len(docs)
+        for id_field, name_field, resolver in self.references:
+            by_id, by_name = [], []
+            for index, doc in enumerate(docs):
+                raw_id, name = doc.get(id_field), doc.get(name_field)
+                if raw_id is not None:
+                    if isinstance(raw_id, str) and ObjectId.is_valid(raw_id):
+                        doc[id_field] = ObjectId(raw_id)
+                        by_id.append(index)
+                    elif not isinstance(raw_id, ObjectId):
+                        errors[index] = errors[index] or f"Invalid {id_field}"
+                    else:
+                        by_id.append(index)
+                elif name is not None:
+                    by_name.append(index)
+                elif required:
+                    errors[index] = errors[index] or f"{id_field} or {name_field} is required"
+                else:
+                    doc.pop(id_field, None)
+                    doc.pop(name_field, None)
+
+            names = await resolver.names_for(docs[index][id_field] for index in by_id)
+            for index in by_id:
+                doc = docs[index]
+                if doc[id_field] in names:
+                    doc[name_field] = names[doc[id_field]]
+                else:
+                    errors[index] = errors[index] or f"{resolver.name} {doc[id_field]} not found"
+            ids, ambiguous = await resolver.find_ids(docs[index][name_field] for index in by_name)
+            for index in by_name:
+                doc = docs[index]
+                if doc[name_field] in ids:
+                    doc[id_field] = ids[doc[name_field]]
+                elif doc[name_field] in ambiguous:
+                    errors[index] = errors[index] or ambiguous_message(resolver.name, doc[name_field])
+                else:
+                    errors[index] = errors[index] or f"{resolver.name} '{doc[name_field]}' not found"
+            if resolver.copied:
+                linked = [index for index in by_id + by_name if not errors[index]]
+                values = await resolver.copied_values(docs[index][id_field] for index in linked)
+                for index in linked:
+                    docs[index].update(values.get(docs[index][id_field], {}))
+        return errors
+
+    async def resolve_partial(self, docs: list) -> list:
+        return await self.resolve(docs, required=False)
+
+    async def resolve_one(self, doc: dict, required: bool = True) -> dict:
+        error = (await self.resolve([doc], required))[0]
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+        return doc
+
+    async def filters(self, **params) -> dict:
+        """Equality filters on the id fields from query parameters given as either ids or names.
+
+        An unknown name gives a filter that matches nothing.
+        """
+        query = {}
+        for id_field, name_field, resolver in self.references:
+            raw_id, name = params.get(id_field), params.get(name_field)
+            if raw_id is not None:
+                if not ObjectId.is_valid(raw_id):
+                    raise HTTPException(status_code=400, detail=f"Invalid {id_field}")
+                query[id_field] = ObjectId(raw_id)
+            elif name is not None:
+                doc_id = (await resolver.ids_for([name])).get(name)
+                query[id_field] = doc_id if doc_id is not None else {"$in": []}
+        return query
+
+
+store_resolver = ReferenceResolver(
+    store_collection,
+    "Store",
+    referenced_by=[
+        # Store names are not printed on labels, so a rename leaves their versions alone
+        (esl_collection, "storeId", "storeName", None, record_esl_changes),
+        (gateway_collection, "storeId", "storeName", None, record_gateway_changes),
+    ],
+    maxsize=settings.REFERENCE_CACHE_MAX_SIZE,
+    ttl=settings.REFERENCE_CACHE_TTL_SECONDS,
+)
+product_resolver = ReferenceResolver(
+    product_collection,
+    "Product",
+    referenced_by=[(esl_collection, "productId", "productName", change_versions, record_esl_changes)],
+    maxsize=settings.REFERENCE_CACHE_MAX_SIZE,
+    ttl=settings.REFERENCE_CACHE_TTL_SECONDS,
+    # A label shows its product's current price from the moment it is linked
+    copied=PRICE_FIELDS,
+)
+
+esl_references = References(("storeId", "storeName", store_resolver), ("productId", "productName", product_resolver))
+gateway_references = References(("storeId", "storeName", store_resolver))
+store_change_hooks.append(store_resolver.record_changes)
+product_change_hooks.append(product_resolver.record_changes)
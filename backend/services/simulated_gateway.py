@@ -0,0 +1,49 @@
+import asyncio
+import random
+from collections import defaultdict
+from typing import Optional
+from bson import ObjectId
+from services.dispatcher import DispatchError, DispatchJob
+
+
+class SimulatedGateway:
+    """In-process stand-in for the gateway radio link, used as a dispatcher transport.
+
+    Each send takes ``latency`` seconds give or take ``jitter``, and fails with
+    probability ``failure_rate``. A gateway asked for more than ``capacity``
+    sends at once refuses the extra ones as busy. This catches a dispatcher
+    that ignores its concurrency window. With a ``seed`` the failures repeat from run to run.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        failure_rate: float = 0.0,
+        capacity: int = 8,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.capacity = capacity
+        self.random = random.Random(seed)
+        self.active: dict = defaultdict(int)
+        self.peak: dict = defaultdict(int)
+        # gateway id -> (esl id, priority) in delivery order
+        self.delivered: dict = defaultdict(list)
+        self.busy = 0
+
+    async def send(self, gateway_id: ObjectId, job: DispatchJob) -> None:
+        if self.active[gateway_id] >= self.capacity:
+            self.busy += 1
+            raise DispatchError("Gateway busy")
+        self.active[gateway_id] += 1
+        self.peak[gateway_id] = max(self.peak[gateway_id], self.active[gateway_id])
+        try:
+            await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+            if self.random.random() < self.failure_rate:
+                raise DispatchError("No acknowledgement from label")
+            self.delivered[gateway_id].append((job.esl_id, job.priority))
+        finally:
+            self.active[gateway_id] -= 1
@@ -0,0 +1,57 @@
+from typing import Optional
+from pymongo import UpdateOne
+from config.settings import settings
+from models.esl import esl_collection
+from models.gateway import gateway_collection
+from models.store import COUNTER_FIELDS, store_collection
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _count_if(condition: dict) -> dict:
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+async def compute_store_counters(store_ids: Optional[list] = None) -> dict:
+    """Counters per store id from one aggregation pass over ESLs and one over gateways."""
+    match = [{"$match": {"storeId": {"$in": store_ids}}}] if store_ids is not None else []
+    counters = {}
+    esl_pipeline = match + [{
+        "$group": {
+            "_id": "$storeId",
+            "eslCount": {"$sum": 1},
+            "activeEslCount": _count_if({"$eq": ["$status", "active"]}),
+            "errorEslCount": _count_if({"$eq": ["$status", "error"]}),
+            # Numbers sort between null and strings, so this only counts numeric levels
+            "lowBatteryEslCount": _count_if({"$and": [
+                {"$gt": ["$batteryLevel", None]},
+                {"$lt": ["$batteryLevel", settings.LOW_BATTERY_THRESHOLD]},
+            ]}),
+        }
+    }]
+    async for group in esl_collection.aggregate(esl_pipeline):
+        counters[group.pop("_id")] = group
+    gateway_pipeline = match + [{"$group": {"_id": "$storeId", "gatewayCount": {"$sum": 1}}}]
+    async for group in gateway_collection.aggregate(gateway_pipeline):
+        counters.setdefault(group["_id"], {})["gatewayCount"] = group["gatewayCount"]
+    for store_id in store_ids or ():
+        counters.setdefault(store_id, {})
+    zero = dict.fromkeys(COUNTER_FIELDS, 0)
+    return {store_id: {**zero, **values} for store_id, values in counters.items()}
+
+
+async def rebuild_store_counters() -> dict:
+    """Recompute every store's counters and overwrite them with ``$set``."""
+    counters = await compute_store_counters()
+    zero = dict.fromkeys(COUNTER_FIELDS, 0)
+    ops, updated = [], 0
+    async for store in store_collection.find({}, {"_id": 1}):
+        ops.append(UpdateOne({"_id": store["_id"]}, {"$set": counters.get(store["_id"], zero)}))
+        if len(ops) >= WRITE_BATCH_SIZE:
+            await store_collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await store_collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    return {"stores": updated}
@@ -0,0 +1,80 @@
+from datetime import datetime
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+from config.settings import settings
+from models.sync_log import record_changes, sync_log_collection, sync_log_time_fields
+from services.background import BackgroundFlusher
+from utils.logger import logger
+
+
+class SyncLogWriter(BackgroundFlusher):
+    """Append-only write-behind buffer for sync log events.
+
+    Events from any number of requests are coalesced in memory and written with
+    unordered ``insert_many`` calls of up to ``batch_size`` documents; nothing is
+    read back. Written batches are reported to the sync log change hooks, which
+    keep the hourly sync rollups up to date.
+    Each event is stamped with ``createdAt``, which the collection's
+    TTL index uses to expire old entries. Once ``max_pending`` events are waiting,
+    further appends are refused with a 503 and ``Retry-After``.
+    """
+
+    name = "sync-log-writer"
+
+    def __init__(self, batch_size: int, interval: float, max_pending: int):
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._buffer: list[dict] = []
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+
+    def append(self, events: list) -> None:
+        if len(self._buffer) + len(events) > self.max_pending:
+            self.rejected += len(events)
+            raise HTTPException(
+                status_code=503,
+                detail="Sync log ingestion is saturated, please retry",
+                headers={"Retry-After": "1"},
+            )
+        created_at = datetime.utcnow()
+        self._buffer.extend(sync_log_time_fields.encode(dict(event, createdAt=created_at)) for event in events)
+        self.accepted += len(events)
+        if len(self._buffer) >= self.batch_size:
+            self.wake()
+
+    async def flush(self):
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            try:
+                await sync_log_collection.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                rejected = {error["index"] for error in e.details.get("writeErrors", [])}
+                self.failed += len(rejected)
+                logger.error(f"{self.name}: {len(rejected)} sync log events rejected by MongoDB")
+                batch = [event for index, event in enumerate(batch) if index not in rejected]
+            except Exception:
+                # Keep the batch for the next flush
+                self._buffer[:0] = batch
+                raise
+            self.written += len(batch)
+            await record_changes([(None, event) for event in batch])
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buffer),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+
+sync_log_writer = SyncLogWriter(
+    batch_size=settings.SYNC_LOG_BATCH_SIZE,
+    interval=settings.SYNC_LOG_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.SYNC_LOG_MAX_PENDING,
+)
@@ -0,0 +1,128 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable
+import numpy as np
+from pymongo import UpdateOne
+from models.sync_log import sync_log_change_hooks
+from models.sync_rollup import sync_rollup_collection
+from utils.timefmt import parse_duration, parse_timestamp
+
+# Upper bounds in seconds of the duration histogram buckets; one more bucket holds everything slower
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 7.5, 10, 15, 30, 60, 120)
+
+SUCCESS_STATUS = "success"
+FAILURE_STATUSES = ("failed", "error")
+
+GROUP_FIELDS = {"store": "storeName", "gateway": "gatewayId", "hour": "hour"}
+
+
+def _hour(event: dict) -> datetime:
+    synced_at = parse_timestamp(event.get("syncedAt")) or event.get("createdAt") or datetime.utcnow()
+    return synced_at.replace(minute=0, second=0, microsecond=0)
+
+
+def _increments(event: dict, sign: int) -> dict:
+    status = str(event.get("status") or "unknown").replace(".", "_").lstrip("$")
+    inc = {"total": sign, f"statuses.{status}": sign}
+    seconds = parse_duration(event.get("duration"))
+    if seconds is not None:
+        bucket = bisect_left(DURATION_BUCKETS, seconds)
+        inc.update({"durationSum": sign * seconds, "durationCount": sign, f"histogram.{bucket}": sign})
+    return inc
+
+
+async def record_rollups(events: Iterable[dict], retracted: Iterable[dict] = ()):
+    """Fold sync log events into their hourly rollups with one bulk ``$inc`` upsert per rollup.
+
+    ``retracted`` events are subtracted, which is how an edited log moves from
+    its old status to its new one.
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+    for sign, group in ((1, events), (-1, retracted)):
+        for event in group:
+            key = (event.get("storeName"), event.get("gatewayId"), _hour(event))
+            for field, value in _increments(event, sign).items():
+                totals[key][field] += value
+    ops = [
+        UpdateOne(
+            {"storeName": store_name, "gatewayId": gateway_id, "hour": hour},
+            {"$inc": {field: value for field, value in inc.items() if value}},
+            upsert=True,
+        )
+        for (store_name, gateway_id, hour), inc in totals.items()
+        if any(inc.values())
+    ]
+    if ops:
+        await sync_rollup_collection.bulk_write(ops, ordered=False)
+
+
+async def record_sync_log_changes(changes: list) -> None:
+    """Apply sync log writes to the rollups: new versions are added, previous ones retracted."""
+    await record_rollups(
+        [after for _, after in changes if after is not None],
+        retracted=[before for before, _ in changes if before is not None],
+    )
+
+
+def histogram_percentiles(histogram: np.ndarray, percentiles=(50, 95, 99)) -> dict:
+    """Estimate percentiles by linear interpolation inside the histogram buckets."""
+    count = histogram.sum()
+    if count <= 0:
+        return {f"p{p}": None for p in percentiles}
+    lower = np.concatenate(([0.0], DURATION_BUCKETS))
+    # The open-ended last bucket is reported at its lower bound
+    upper = np.concatenate((DURATION_BUCKETS, [DURATION_BUCKETS[-1]]))
+    cumulative = np.cumsum(histogram)
+    result = {}
+    for p in percentiles:
+        target = count * p / 100
+        bucket = min(int(np.searchsorted(cumulative, target)), len(histogram) - 1)
+        before = cumulative[bucket] - histogram[bucket]
+        fraction = (target - before) / histogram[bucket] if histogram[bucket] else 0.0
+        result[f"p{p}"] = round(float(lower[bucket] + fraction * (upper[bucket] - lower[bucket])), 3)
+    return result
+
+
+def summarize_rollups(docs: Iterable[dict], group_by: list) -> list:
+    """Merge rollup documents into one row per group with rates and duration percentiles."""
+    fields = [GROUP_FIELDS[g] for g in group_by]
+    groups = {}
+    for doc in docs:
+        key = tuple(doc.get(field) for field in fields)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "statuses": defaultdict(int),
+                "histogram": np.zeros(len(DURATION_BUCKETS) + 1),
+                "durationSum": 0.0,
+                "durationCount": 0,
+            }
+        for status, count in doc.get("statuses", {}).items():
+            group["statuses"][status] += count
+        for bucket, count in doc.get("histogram", {}).items():
+            group["histogram"][int(bucket)] += count
+        group["durationSum"] += doc.get("durationSum", 0)
+        group["durationCount"] += doc.get("durationCount", 0)
+
+    rows = []
+    for key, group in groups.items():
+        statuses = {status: int(count) for status, count in group["statuses"].items() if count}
+        succeeded = statuses.get(SUCCESS_STATUS, 0)
+        failed = sum(statuses.get(status, 0) for status in FAILURE_STATUSES)
+        row = dict(zip(group_by, key))
+        row.update({
+            "total": sum(statuses.values()),
+            "succeeded": succeeded,
+            "errorCount": failed,
+            "successRate": round(succeeded / (succeeded + failed), 4) if succeeded + failed else None,
+            "statuses": statuses,
+            "avgDuration": round(group["durationSum"] / group["durationCount"], 3) if group["durationCount"] else None,
+            **histogram_percentiles(group["histogram"]),
+        })
+        rows.append(row)
+    rows.sort(key=lambda row: tuple(str(row[g]) for g in group_by))
+    return rows
+
+
+sync_log_change_hooks.append(record_sync_log_changes)
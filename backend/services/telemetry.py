@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+from config.settings import settings
+from models.esl import esl_change_hooks
+from models.telemetry import HOURLY, RAW, telemetry_collection
+from services.background import BackgroundFlusher
+from utils.logger import logger
+
+WRITE_BATCH_SIZE = 1000
+
+# Least-squares sums of the day's battery readings, with t in days since the start of
+# the day; kept through downsampling so forecasts never re-read the readings
+SUM_FIELDS = ("n", "sumT", "sumY", "sumTT", "sumTY")
+
+
+def _day(at: datetime) -> datetime:
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _level(value) -> Optional[float]:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class TelemetryRecorder(BackgroundFlusher):
+    """Write-behind history of label battery and signal readings.
+
+    Registered as an ESL change hook: a reading is taken when a label is created
+    and whenever its battery or signal level changes. Readings are buffered and
+    each flush appends them to their label's document for the day, and adds
+    them to the day's regression sums, with one upsert per label-day. When ``max_pending`` readings are waiting,
+    new ones are dropped (and counted) rather than slowing down ESL writes.
+    """
+
+    name = "telemetry-recorder"
+
+    def __init__(self, interval: float, max_pending: int):
+        super().__init__(interval)
+        self.max_pending = max_pending
+        self._buffer: list[tuple] = []
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+
+    async def record_changes(self, changes: list) -> None:
+        now = datetime.utcnow()
+        for before, after in changes:
+            if after is None:
+                continue
+            reading = (_level(after.get("batteryLevel")), _level(after.get("signalStrength")))
+            if before is not None and reading == (_level(before.get("batteryLevel")), _level(before.get("signalStrength"))):
+                continue
+            if len(self._buffer) >= self.max_pending:
+                self.dropped += 1
+                continue
+            self._buffer.append((after["_id"], now, *reading))
+            self.recorded += 1
+        if len(self._buffer) >= WRITE_BATCH_SIZE:
+            self.wake()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        readings, self._buffer = self._buffer, []
+        grouped = {}
+        for esl_id, at, battery, signal in readings:
+            day = _day(at)
+            entry = grouped.get((esl_id, day))
+            if entry is None:
+                entry = grouped[(esl_id, day)] = ({"t": [], "battery": [], "signal": []}, dict.fromkeys(SUM_FIELDS, 0.0))
+            points, sums = entry
+            points["t"].append(at)
+            points["battery"].append(battery)
+            points["signal"].append(signal)
+            if battery is not None:
+                t = (at - day).total_seconds() / 86400
+                for field, value in zip(SUM_FIELDS, (1, t, battery, t * t, t * battery)):
+                    sums[field] += value
+        ops = [
+            UpdateOne(
+                {"eslId": esl_id, "day": day},
+                {
+                    "$setOnInsert": {"resolution": RAW},
+                    "$push": {field: {"$each": values} for field, values in points.items()},
+                    "$inc": sums,
+                },
+                upsert=True,
+            )
+            for (esl_id, day), (points, sums) in grouped.items()
+        ]
+        try:
+            for start in range(0, len(ops), WRITE_BATCH_SIZE):
+                await telemetry_collection.bulk_write(ops[start:start + WRITE_BATCH_SIZE], ordered=False)
+        except Exception:
+            # Keep the readings for the next flush; $push is not idempotent, so a partial
+            # write can duplicate a few readings, which the hourly means absorb
+            self._buffer[:0] = readings
+            raise
+        self.written += len(readings)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buffer),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "written": self.written,
+        }
+
+
+def hourly_means(day: datetime, times: list, *series: list) -> tuple:
+    """Average each series per hour of ``day``; returns the hour starts and one list of means per series."""
+    hours = np.array([int((t - day).total_seconds() // 3600) for t in times], dtype=np.int64).clip(0, 23)
+    present = np.bincount(hours, minlength=24) > 0
+    means = []
+    for values in series:
+        values = np.array(values, dtype=float)
+        valid = ~np.isnan(values)
+        counts = np.bincount(hours[valid], minlength=24)
+        sums = np.bincount(hours[valid], weights=values[valid], minlength=24)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means.append(np.round(sums / counts, 2))
+    kept = np.flatnonzero(present)
+    return (
+        [day + timedelta(hours=int(hour)) for hour in kept],
+        *[[None if np.isnan(value) else float(value) for value in mean[kept]] for mean in means],
+    )
+
+
+async def downsample_telemetry(raw_days: int = settings.TELEMETRY_RAW_DAYS) -> dict:
+    """Replace raw readings older than ``raw_days`` with hourly means; the regression sums stay as they are."""
+    cutoff = _day(datetime.utcnow()) - timedelta(days=raw_days)
+    ops, converted = [], 0
+    async for doc in telemetry_collection.find({"resolution": RAW, "day": {"$lt": cutoff}}).batch_size(WRITE_BATCH_SIZE):
+        times, battery, signal = hourly_means(doc["day"], doc.get("t", []), doc.get("battery", []), doc.get("signal", []))
+        ops.append(UpdateOne(
+            {"_id": doc["_id"], "resolution": RAW},
+            {"$set": {"resolution": HOURLY, "t": times, "battery": battery, "signal": signal}},
+        ))
+        if len(ops) >= WRITE_BATCH_SIZE:
+            await telemetry_collection.bulk_write(ops, ordered=False)
+            converted += len(ops)
+            ops = []
+    if ops:
+        await telemetry_collection.bulk_write(ops, ordered=False)
+        converted += len(ops)
+    if converted:
+        logger.info(f"Downsampled {converted} label-days of telemetry to hourly means")
+    return {"downsampled": converted}
+
+
+async def read_history(esl_id: ObjectId, since: datetime, until: Optional[datetime] = None) -> list:
+    """Readings of one label between ``since`` and ``until``, oldest first."""
+    query = {"eslId": esl_id, "day": {"$gte": _day(since)}}
+    if until:
+        query["day"]["$lte"] = until
+    points = []
+    async for doc in telemetry_collection.find(query).sort("day", 1):
+        for at, battery, signal in zip(doc.get("t", []), doc.get("battery", []), doc.get("signal", [])):
+            if at >= since and (until is None or at < until):
+                points.append({
+                    "at": at,
+                    "batteryLevel": battery,
+                    "signalStrength": signal,
+                    "resolution": doc.get("resolution"),
+                })
+    return points
+
+
+telemetry_recorder = TelemetryRecorder(
+    interval=settings.TELEMETRY_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.TELEMETRY_MAX_PENDING,
+)
+esl_change_hooks.append(telemetry_recorder.record_changes)
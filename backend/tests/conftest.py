@@ -0,0 +1,52 @@
+import os
+import pytest
+from pymongo.errors import PyMongoError
+
+# Tests get a database of their own, never the one configured in .env
+os.environ["MONGO_URL"] = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017/esl_test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def database():
+    """The test database, or None when MongoDB is not reachable.
+
+    Session-scoped, so every test runs on one event loop: the Motor client is
+    created at import and keeps using the loop it first ran on.
+    """
+    from database.mongo import client, db
+    try:
+        await client.admin.command("ping")
+    except PyMongoError:
+        yield None
+        return
+    yield db
+
+
+@pytest.fixture
+async def mongo(database):
+    """The emptied test database; the test is skipped when MongoDB is not reachable."""
+    if database is None:
+        pytest.skip("MongoDB is not reachable")
+    from services.references import product_resolver, store_resolver
+    db = database
+    for name in await db.list_collection_names():
+        await db[name].drop()
+    # Cached ids would point at documents of earlier tests
+    for resolver in (store_resolver, product_resolver):
+        resolver.cache.clear()
+    yield db
+
+
+@pytest.fixture
+async def api(mongo):
+    """An HTTP client for the app, without its lifespan: tests drive background services themselves."""
+    import httpx
+    from main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from bson import ObjectId
+from services.battery_forecast import fit_depletion, forecast
+
+NOW = datetime(2024, 1, 10, 12)
+
+
+def sums(points: list) -> list:
+    """Regression sums of (t, level) points, as fit_depletion takes them for one label."""
+    t, y = np.array(points, dtype=float).T
+    return [np.array([value]) for value in (len(t), t.sum(), y.sum(), (t * t).sum(), (t * y).sum())]
+
+
+def test_fit_depletion_extrapolates_the_line_to_zero():
+    points = [(-4, 80), (-3, 75), (-2, 70), (-1, 65)]
+    assert fit_depletion(*sums(points), np.array([-4.0]))[0] == pytest.approx(12.0)
+
+
+@pytest.mark.parametrize("points, earliest", [
+    ([(-1, 50)], -1.0),  # one reading
+    ([(-2, 50), (-1, 60)], -2.0),  # charging
+    ([(-2, 50), (-1, 50)], -2.0),  # flat
+    ([(-0.5, 50), (-0.1, 40)], -0.5),  # less than a day of history
+])
+def test_fit_depletion_skips_labels_it_cannot_fit(points, earliest):
+    assert np.isnan(fit_depletion(*sums(points), np.array([earliest]))[0])
+
+
+def day_doc(esl_id, days_ago: int, level: float) -> dict:
+    """One reading at noon, ``days_ago`` days before NOW."""
+    day = (NOW - timedelta(days=days_ago)).replace(hour=0)
+    return {"eslId": esl_id, "day": day, "battery": [level], "n": 1, "sumT": 0.5, "sumY": level, "sumTT": 0.25, "sumTY": 0.5 * level}
+
+
+def forecasts(esls: list, days: list) -> dict:
+    ops, _, _ = forecast(esls, days, NOW)
+    return {op._filter["_id"]: op._doc["$set"]["batteryDaysRemaining"] for op in ops}
+
+
+def test_current_level_counts_only_when_newer_than_the_last_reading():
+    same, changed = ObjectId(), ObjectId()
+    days = [day_doc(esl_id, days_ago, level) for esl_id in (same, changed) for days_ago, level in ((4, 80), (3, 75), (2, 70), (1, 65))]
+    esls = [{"_id": same, "batteryLevel": 65}, {"_id": changed, "batteryLevel": 58}]
+
+    result = forecasts(esls, days)
+
+    assert result[same] == 12.0  # the 65% reading is not counted twice
+    slope, intercept = np.polyfit([-4, -3, -2, -1, 0], [80, 75, 70, 65, 58], 1)
+    assert result[changed] == round(intercept / -slope, 1)
+
+
+def test_unchanged_estimates_are_not_rewritten():
+    fitted, unknown = ObjectId(), ObjectId()
+    days = [day_doc(fitted, days_ago, level) for days_ago, level in ((4, 80), (3, 75), (2, 70), (1, 65))]
+    esls = [{"_id": fitted, "batteryLevel": 65, "batteryDaysRemaining": 12.0}, {"_id": unknown, "batteryLevel": 40}]
+    ops, forecasted, label_days = forecast(esls, days, NOW)
+    assert (ops, forecasted, label_days) == ([], 1, 4)
@@ -0,0 +1,54 @@
+import json
+import pytest
+from fastapi import HTTPException, Request
+from schemas.esl import ESLCreate
+from utils.bulk import MAX_BULK_ITEMS, partial_model, read_bulk_items, validate_items
+
+pytestmark = pytest.mark.anyio
+
+LABEL = {"labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active", "productName": "Coffee"}
+
+
+def request(body: bytes, content_type: str = "application/json") -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+
+async def test_json_array_and_ndjson_read_the_same_items():
+    items = [LABEL, dict(LABEL, status="error")]
+    ndjson = "\n".join(json.dumps(item) for item in items) + "\n\n"
+
+    assert await read_bulk_items(request(json.dumps(items).encode())) == items
+    assert await read_bulk_items(request(ndjson.encode(), "application/x-ndjson; charset=utf-8")) == items
+    assert await read_bulk_items(request(b"")) == []
+
+
+@pytest.mark.parametrize("body, content_type, status", [
+    (b"[1, 2", "application/json", 400),
+    (b'{"id": 1}', "application/json", 400),
+    (b'{"id": 1}\nnot json', "application/x-ndjson", 400),
+    (b"\n".join([b"{}"] * (MAX_BULK_ITEMS + 1)), "application/x-ndjson", 413),
+])
+async def test_malformed_and_oversized_payloads_are_refused(body, content_type, status):
+    with pytest.raises(HTTPException) as refused:
+        await read_bulk_items(request(body, content_type))
+    assert refused.value.status_code == status
+
+
+async def test_payload_at_the_limit_is_accepted():
+    body = b"\n".join([b"{}"] * MAX_BULK_ITEMS)
+    assert len(await read_bulk_items(request(body, "application/x-ndjson"))) == MAX_BULK_ITEMS
+
+
+def test_validation_reports_each_invalid_item_by_index():
+    docs, errors = validate_items([LABEL, {"labelSize": "2.9 inch"}, LABEL], ESLCreate)
+    assert len(docs) == 2
+    assert [error["index"] for error in errors] == [1]
+    assert "batteryLevel" in errors[0]["error"]
+
+
+def test_partial_model_makes_every_field_optional():
+    patch = partial_model(ESLCreate).model_validate({"batteryLevel": 40}).model_dump(exclude_unset=True)
+    assert patch == {"batteryLevel": 40}
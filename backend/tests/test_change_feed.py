@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import pytest
+from models.tombstone import tombstone_collection
+from services.change_feed import tombstone_purger
+
+pytestmark = pytest.mark.anyio
+
+GATEWAY = {
+    "ipAddress": "192.168.1.10", "firmwareVersion": "v2.1.0", "lastHeartbeat": "2 min ago", "status": "active",
+    "syncCount": 0, "errorCount": 0, "uptime": "5d 3h",
+}
+LABEL = {"labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active"}
+
+
+async def setup_store(api) -> tuple[dict, dict]:
+    """A store with one gateway, and the label fields that link a label to it."""
+    store = (await api.post("/stores/", json={"name": "Store #001", "location": "Downtown", "manager": "John Smith"})).json()
+    product = (await api.post("/products/", json={
+        "name": "Premium Coffee Beans", "barcode": "1234567890123", "mrp": 15.99, "discount": 2.0, "sellingPrice": 13.99,
+        "category": "Beverages",
+    })).json()
+    gateway = (await api.post("/gateways/", json=dict(GATEWAY, storeId=store["id"]))).json()
+    return dict(LABEL, storeId=store["id"], productId=product["id"]), gateway
+
+
+async def changes(api, gateway: dict, since: str):
+    return await api.get(f"/gateways/{gateway['id']}/changes", params={"since": since})
+
+
+async def test_readings_leave_the_change_version_alone(api):
+    label_fields, gateway = await setup_store(api)
+    label = (await api.post("/esls/", json=label_fields)).json()
+    checkpoint = (await changes(api, gateway, "0")).json()["checkpoint"]
+
+    await api.patch("/esls/bulk", json=[{"id": label["id"], "batteryLevel": 60, "signalStrength": 70}])
+    assert (await changes(api, gateway, checkpoint)).json()["changes"] == []
+
+    await api.patch("/esls/bulk", json=[{"id": label["id"], "status": "active"}])
+    assert (await changes(api, gateway, checkpoint)).json()["changes"] == []
+
+    await api.patch("/esls/bulk", json=[{"id": label["id"], "status": "error"}])
+    assert [change["id"] for change in (await changes(api, gateway, checkpoint)).json()["changes"]] == [label["id"]]
+
+
+async def test_checkpoint_behind_purged_tombstones_must_resync(api):
+    label_fields, gateway = await setup_store(api)
+    kept = (await api.post("/esls/", json=label_fields)).json()
+    removed = (await api.post("/esls/", json=label_fields)).json()
+    stale = (await changes(api, gateway, "0")).json()["checkpoint"]
+    await api.delete(f"/esls/{removed['id']}")
+    current = (await changes(api, gateway, stale)).json()
+    assert [entry["id"] for entry in current["deleted"]] == [removed["id"]]
+
+    expired = datetime.utcnow() - timedelta(days=tombstone_purger.retention_days + 1)
+    await tombstone_collection.update_many({}, {"$set": {"deletedAt": expired}})
+    assert await tombstone_purger.purge() == 1
+
+    assert (await changes(api, gateway, stale)).status_code == 410
+    assert (await changes(api, gateway, current["checkpoint"])).status_code == 200
+    resync = (await changes(api, gateway, "0")).json()
+    assert [change["id"] for change in resync["changes"]] == [kept["id"]]
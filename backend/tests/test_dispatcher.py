@@ -0,0 +1,119 @@
+import asyncio
+import time
+import pytest
+from bson import ObjectId
+from services.dispatcher import CONTENT, PRICE, REFRESH, DispatchError, Dispatcher, TokenBucket
+from services.simulated_gateway import SimulatedGateway
+
+pytestmark = pytest.mark.anyio
+
+STORE = ObjectId()
+
+
+class RecordingTransport:
+    """Records (seconds since start, esl id, priority) per send; ids in ``fail_once`` fail their first attempt."""
+
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.started = time.monotonic()
+        self.sends = []
+
+    async def send(self, gateway_id, job):
+        self.sends.append((time.monotonic() - self.started, job.esl_id, job.priority))
+        if job.esl_id in self.fail_once:
+            self.fail_once.discard(job.esl_id)
+            raise DispatchError("No acknowledgement from label")
+
+
+def start_dispatcher(transport, gateways: int = 1, **limits) -> Dispatcher:
+    """A running dispatcher with lanes for ``gateways`` gateways of STORE, without MongoDB or sync logs."""
+    options = dict(concurrency=1, rate=1000.0, burst=1000, max_attempts=3, backoff=0.2, max_backoff=1.0, max_queued=100)
+    dispatcher = Dispatcher(**dict(options, **limits))
+    dispatcher.transport = transport
+    dispatcher.running = True
+    dispatcher.outcomes = []
+    dispatcher._report = lambda lane, job, error, seconds: dispatcher.outcomes.append((job.esl_id, error))
+    for _ in range(gateways):
+        dispatcher._add_lane({"_id": ObjectId(), "storeId": STORE, "status": "online"})
+    return dispatcher
+
+
+def labels(count: int) -> list:
+    return [{"_id": ObjectId(), "storeId": STORE} for _ in range(count)]
+
+
+async def drain(dispatcher: Dispatcher, count: int, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while len(dispatcher.outcomes) < count and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+
+async def test_higher_priorities_go_out_first():
+    gateway = SimulatedGateway(latency=0.01, jitter=0.0)
+    dispatcher = start_dispatcher(gateway.send)
+    refresh, content, price = labels(3), labels(1), labels(1)
+    dispatcher.enqueue(refresh, REFRESH)
+    dispatcher.enqueue(content, CONTENT)
+    dispatcher.enqueue(price, PRICE)
+    # Enqueuing a waiting label again only raises its priority
+    dispatcher.enqueue(refresh[2:], PRICE)
+    await drain(dispatcher, 5)
+
+    [delivered] = gateway.delivered.values()
+    expected = [price[0], refresh[2], content[0], refresh[0], refresh[1]]
+    assert [esl_id for esl_id, _ in delivered] == [label["_id"] for label in expected]
+
+
+async def test_sends_respect_the_token_bucket():
+    transport = RecordingTransport()
+    dispatcher = start_dispatcher(transport.send, concurrency=10, rate=20.0, burst=2)
+    dispatcher.enqueue(labels(6), CONTENT)
+    await drain(dispatcher, 6)
+
+    times = [seconds for seconds, _, _ in transport.sends]
+    assert len(times) == 6
+    # Two from the burst, then one every 1/20 s
+    assert times[2] - times[0] >= 0.04
+    assert times[-1] - times[0] >= 4 / 20 - 0.01
+
+
+async def test_token_given_back_is_available_again():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    await bucket.take()
+    await bucket.take()
+    bucket.give_back()
+    await asyncio.wait_for(bucket.take(), timeout=0.1)
+    bucket.give_back()
+    bucket.give_back()
+    bucket.give_back()
+    assert bucket.tokens <= bucket.burst
+
+
+async def test_retry_waits_out_its_backoff_even_when_the_priority_rises():
+    [label] = labels(1)
+    transport = RecordingTransport(fail_once=[label["_id"]])
+    dispatcher = start_dispatcher(transport.send, backoff=0.2)
+    dispatcher.enqueue([label], REFRESH)
+    while not dispatcher.outcomes:
+        await asyncio.sleep(0.005)
+    dispatcher.enqueue([label], PRICE)
+    await drain(dispatcher, 2)
+
+    (first, _, _), (retry, _, priority) = transport.sends
+    # Backoff is 0.2 s scaled by a jitter of 0.5 to 1
+    assert retry - first >= 0.1
+    assert priority == PRICE
+    assert dispatcher.outcomes[-1] == (label["_id"], None)
+    assert (dispatcher.retried, dispatcher.sent) == (1, 1)
+
+
+async def test_labels_go_to_the_least_loaded_gateway_of_their_store():
+    gateway = SimulatedGateway(latency=0.01, jitter=0.0)
+    dispatcher = start_dispatcher(gateway.send, gateways=3)
+    other_store = {"_id": ObjectId(), "storeId": ObjectId()}
+    assert dispatcher.enqueue(labels(6), CONTENT) == 6
+    assert dispatcher.enqueue([other_store], CONTENT) == 0
+    assert [len(lane.jobs) for lane in dispatcher.store_lanes[STORE].values()] == [2, 2, 2]
+    await drain(dispatcher, 6)
+    assert dispatcher.unroutable == 1
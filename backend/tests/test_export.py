@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+import pytest
+from models import sync_log
+from routes import sync_log as sync_log_routes
+from utils.export import iter_csv, iter_gzip, iter_ndjson
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.order = None
+
+    def sort(self, order):
+        self.order = order
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+
+class RecordingCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.cursors = []
+
+    def find(self, query, projection=None):
+        cursor = RecordingCursor(self.docs)
+        self.cursors.append((query, cursor))
+        return cursor
+
+
+def shape(query: dict) -> tuple:
+    return tuple(sorted(query))
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"since": datetime(2024, 1, 1)},
+    {"storeName": "Store #001", "since": datetime(2024, 1, 1), "until": datetime(2024, 2, 1)},
+    {"status": "failed", "since": datetime(2024, 1, 1)},
+    {"gatewayId": "GW-001"},
+])
+async def test_sync_log_export_sorts_only_by_an_indexed_shape(monkeypatch, filters):
+    collection = RecordingCollection()
+    monkeypatch.setattr(sync_log_routes, "sync_log_collection", collection)
+    arguments = dict(fmt="ndjson", storeName=None, status=None, gatewayId=None, since=None, until=None, gzip=False)
+    await sync_log_routes.export_sync_logs(**dict(arguments, **filters))
+
+    [(query, cursor)] = collection.cursors
+    declared = {(shape(q), tuple(sort)) for q, sort in sync_log.QUERY_SHAPES}
+    assert (shape(query), tuple(cursor.order)) in declared
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def test_ndjson_csv_and_gzip_streams_carry_every_document():
+    docs = [{"_id": i, "status": "success", "syncedAt": datetime(2024, 1, 15, 10, i % 60)} for i in range(1203)]
+
+    lines = (await collect(iter_ndjson(RecordingCursor(docs)))).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [str(i) for i in range(1203)]
+    assert json.loads(lines[0])["syncedAt"] == "2024-01-15T10:00:00"
+
+    rows = list(csv.DictReader(io.StringIO((await collect(iter_csv(RecordingCursor(docs), ["id", "status"]))).decode())))
+    assert len(rows) == 1203 and rows[-1] == {"id": "1202", "status": "success"}
+
+    compressed = await collect(iter_gzip(iter_ndjson(RecordingCursor(docs))))
+    assert gzip.decompress(compressed).decode().splitlines() == lines
@@ -0,0 +1,95 @@
+import random
+import numpy as np
+from bson import ObjectId
+from services.fleet_index import FleetSnapshot
+
+STORES = [ObjectId(), ObjectId(), None]
+STATUSES = ["active", "error", "offline"]
+
+
+def random_docs(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "_id": ObjectId(),
+            "batteryLevel": rng.choice([None, "n/a", rng.randint(-5, 105)]),
+            "signalStrength": rng.randint(0, 100),
+            "status": rng.choice(STATUSES),
+            "storeId": rng.choice(STORES),
+        }
+        for _ in range(count)
+    ]
+
+
+def number(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def test_mask_matches_a_scan_of_the_documents():
+    docs = random_docs(3000)
+    snapshot = FleetSnapshot(capacity=16)  # grows several times
+    snapshot.extend(docs[:1000])
+    for doc in docs[1000:]:
+        snapshot.upsert(doc)
+    for doc in docs[:300]:
+        snapshot.remove(doc["_id"])
+    live = docs[300:]
+
+    for store_id, status, below in [(None, None, None), (STORES[0], None, 20), (None, "error", 50), (STORES[2], "active", None)]:
+        mask = snapshot.mask(store_id=store_id, status=status, battery_below=below)
+        expected = {
+            doc["_id"] for doc in live
+            if (store_id is None or doc["storeId"] == store_id)
+            and (status is None or doc["status"] == status)
+            and (below is None or (number(doc["batteryLevel"]) and doc["batteryLevel"] < below))
+        }
+        assert set(snapshot.ids[:snapshot.size][mask]) == expected
+    assert not snapshot.mask(status="unknown").any()
+
+
+def test_removed_rows_are_reused():
+    docs = random_docs(3)
+    snapshot = FleetSnapshot(capacity=4)
+    snapshot.extend(docs)
+    snapshot.remove(docs[1]["_id"])
+    snapshot.upsert(dict(docs[1], _id=ObjectId()))
+    assert (len(snapshot), snapshot.size) == (3, 3)
+
+
+def test_histogram_clips_out_of_range_values_and_skips_missing_ones():
+    store = ObjectId()
+    levels = [-5, 0, 9, 10, 55, 99, 100, 105, None]
+    snapshot = FleetSnapshot()
+    snapshot.extend([{"_id": ObjectId(), "batteryLevel": level, "storeId": store, "status": "active"} for level in levels])
+    mask = snapshot.mask()
+
+    buckets = snapshot.histogram("batteryLevel", mask, 10, by_store=False)["buckets"]
+    assert [bucket["from"] for bucket in buckets] == list(range(0, 101, 10))
+    assert [bucket["count"] for bucket in buckets] == [3, 1, 0, 0, 0, 1, 0, 0, 0, 1, 2]
+    assert snapshot.histogram("batteryLevel", mask, 10, by_store=True)["stores"] == [{"storeId": str(store), "buckets": buckets}]
+
+
+def test_histogram_by_store_matches_a_scan():
+    docs = random_docs(2000, seed=1)
+    snapshot = FleetSnapshot()
+    snapshot.extend(docs)
+    stores = snapshot.histogram("batteryLevel", snapshot.mask(status="active"), 25, by_store=True)["stores"]
+    for entry in stores:
+        levels = [
+            doc["batteryLevel"] for doc in docs
+            if doc["status"] == "active" and str(doc["storeId"]) == str(entry["storeId"]) and number(doc["batteryLevel"])
+        ]
+        expected = np.bincount(np.clip(np.array(levels) // 25, 0, 4), minlength=5)
+        assert [bucket["count"] for bucket in entry["buckets"]] == expected.tolist()
+    assert sum(bucket["count"] for entry in stores for bucket in entry["buckets"]) == sum(
+        1 for doc in docs if doc["status"] == "active" and number(doc["batteryLevel"])
+    )
+
+
+def test_top_returns_the_lowest_levels_first():
+    docs = random_docs(500, seed=2)
+    snapshot = FleetSnapshot()
+    snapshot.extend(docs)
+    rows = snapshot.top("batteryLevel", snapshot.mask(), 10)
+    levels = [label["batteryLevel"] for label in snapshot.describe(rows)]
+    assert levels == sorted(doc["batteryLevel"] for doc in docs if number(doc["batteryLevel"]))[:10]
@@ -0,0 +1,43 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from services import heartbeat
+from services.heartbeat import HeartbeatBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.ops = []
+
+    async def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+
+async def test_new_gateways_are_refused_above_the_hard_limit(monkeypatch):
+    collection = RecordingCollection()
+    monkeypatch.setattr(heartbeat, "gateway_collection", collection)
+    buffer = HeartbeatBuffer(interval=60, max_pending=2, max_buffered=3)
+    gateways = [ObjectId() for _ in range(4)]
+    for gateway_id in gateways[:3]:
+        buffer.record(gateway_id, {"status": "online"}, {"syncCount": 1})
+
+    with pytest.raises(HTTPException) as refused:
+        buffer.record(gateways[3], {"status": "online"}, {})
+    assert refused.value.status_code == 503
+    assert refused.value.headers["Retry-After"] == "1"
+
+    # Gateways already buffered keep merging without taking more room
+    buffer.record(gateways[0], {"status": "offline"}, {"syncCount": 2})
+    stats = buffer.stats()
+    assert (stats["pendingGateways"], stats["received"], stats["rejected"]) == (3, 4, 1)
+
+    await buffer.flush()
+    assert len(collection.ops) == 3
+    first = next(op for op in collection.ops if op._filter == {"_id": gateways[0]})
+    assert first._doc == {"$set": {"status": "offline"}, "$inc": {"syncCount": 3}}
+
+    # A flush makes room again
+    buffer.record(gateways[3], {"status": "online"}, {})
+    assert buffer.stats()["pendingGateways"] == 1
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from services.label_delta import FULL, RECTS, RLE, _encode_rects, _encode_rle, apply_delta, encode_delta
+from services.label_renderer import LABEL_SIZES, pack_pixels, render_pixels
+
+CONTENT = {"productName": "Premium Coffee Beans", "sellingPrice": 13.99, "mrp": 15.99, "discount": 2.0}
+
+
+def frame(label_size: str, bits_per_pixel: int, **changes) -> bytes:
+    return pack_pixels(render_pixels(label_size, dict(CONTENT, **changes), bits_per_pixel), bits_per_pixel)
+
+
+@pytest.mark.parametrize("label_size", list(LABEL_SIZES))
+@pytest.mark.parametrize("bits_per_pixel", [1, 2])
+def test_price_change_delta_rebuilds_the_new_frame(label_size, bits_per_pixel):
+    height = LABEL_SIZES[label_size][1]
+    previous = frame(label_size, bits_per_pixel)
+    new = frame(label_size, bits_per_pixel, sellingPrice=11.49, discount=4.5)
+    payload = encode_delta(previous, new, height)
+    assert payload[0] != FULL and len(payload) < len(new)
+    assert apply_delta(previous, payload, height) == new
+
+
+def test_every_encoding_rebuilds_the_same_frame():
+    rng = np.random.default_rng(0)
+    previous = rng.integers(0, 256, size=(128, 37), dtype=np.uint8)
+    new = previous.copy()
+    new[5, 3] ^= 0xFF
+    new[40:44, 10:20] = rng.integers(0, 256, size=(4, 10), dtype=np.uint8)
+    new[127, 36] ^= 0x01
+    diff = previous ^ new
+    for payload in (bytes([FULL]) + new.tobytes(), _encode_rects(new, diff), _encode_rle(diff)):
+        assert apply_delta(previous.tobytes(), payload, 128) == new.tobytes()
+    assert encode_delta(previous.tobytes(), new.tobytes(), 128)[0] in (RECTS, RLE)
+
+
+def test_unchanged_and_baseless_frames():
+    previous = frame("2.9 inch", 1)
+    payload = encode_delta(previous, previous, 128)
+    assert apply_delta(previous, payload, 128) == previous
+    assert len(payload) <= 2
+    assert encode_delta(None, previous, 128) == bytes([FULL]) + previous
+    assert apply_delta(None, bytes([FULL]) + previous, 128) == previous
+
+
+def test_unknown_encoding_is_refused():
+    with pytest.raises(ValueError):
+        apply_delta(bytes(4), bytes([9, 0]), 1)
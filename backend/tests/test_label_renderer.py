@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from services import label_renderer as renderer_module
+from services.label_renderer import BLACK, RED, WHITE, LabelRenderer, label_content, pack_pixels, unpack_pixels
+from utils.cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_one_bit_packing_is_msb_first_and_any_ink_is_black():
+    canvas = np.zeros((1, 16), dtype=np.uint8)
+    canvas[0, [0, 7, 8]] = [BLACK, RED, BLACK]
+    assert pack_pixels(canvas, 1) == bytes([0b10000001, 0b10000000])
+
+
+def test_two_bit_packing_is_msb_first():
+    canvas = np.array([[WHITE, BLACK, RED, BLACK, RED, RED, WHITE, WHITE]], dtype=np.uint8)
+    assert pack_pixels(canvas, 2) == bytes([0b00011001, 0b10100000])
+
+
+@pytest.mark.parametrize("bits_per_pixel", [1, 2])
+def test_pixels_survive_a_pack_round_trip(bits_per_pixel):
+    canvas = np.random.default_rng(0).integers(0, 3, size=(128, 296), dtype=np.uint8)
+    packed = pack_pixels(canvas, bits_per_pixel)
+    assert len(packed) == 128 * 296 * bits_per_pixel // 8
+    expected = canvas if bits_per_pixel == 2 else (canvas > 0).astype(np.uint8)
+    assert np.array_equal(unpack_pixels(packed, 296, 128, bits_per_pixel), expected)
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = TTLCache(maxsize=100, ttl=float("inf"), maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("c", b"1234")  # 12 bytes: "a" goes
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, b"1234", b"1234")
+    cache.set("b", b"12")
+    cache.set("huge", b"x" * 11)  # larger than the whole cache, never stored
+    assert cache.get("huge") is None
+    assert cache.stats()["bytes"] == 6
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.writes = []
+
+    async def bulk_write(self, ops, ordered=True):
+        self.writes.append(ops)
+
+
+async def test_batch_render_adds_new_frames_on_the_loop(monkeypatch):
+    frames = RecordingCollection()
+    monkeypatch.setattr(renderer_module, "esl_collection", RecordingCollection())
+    monkeypatch.setattr(renderer_module, "label_frame_collection", frames)
+    renderer = LabelRenderer(cache_size=10, touch_interval=3600)
+    content = {"productName": "Coffee", "sellingPrice": 9.99, "mrp": 12.0, "discount": 2.01}
+    docs = [
+        {"_id": 1, "labelSize": "2.9 inch", **content},
+        {"_id": 2, "labelSize": "2.9 inch", **content},
+        {"_id": 3, "labelSize": "13 inch", **content},
+    ]
+
+    labels, new = renderer._render_many(docs, 1)
+    assert labels[0] is labels[1] and labels[2] is None
+    assert list(new) == [labels[0].content_hash]
+    assert len(renderer.cache) == 0 and renderer.rendered == 0  # the thread leaves the cache alone
+
+    summary = {"labels": 0, "changed": 0, "unchanged": 0, "failed": 0}
+    await renderer._render_batch(docs, 1, summary)
+    assert (summary["changed"], summary["failed"], renderer.rendered) == (2, 1, 1)
+    assert len(frames.writes[-1]) == 1
+
+    await renderer._render_batch(docs[:1], 1, summary)
+    assert renderer.render("2.9 inch", label_content(docs[0])).data == labels[0].data
+    assert renderer.rendered == 1
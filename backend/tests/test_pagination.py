@@ -0,0 +1,90 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from utils.pagination import NEXT_CURSOR_HEADER, keyset_page, range_filter
+
+pytestmark = pytest.mark.anyio
+
+
+class MemoryCursor:
+    def __init__(self, docs: list):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+
+class MemoryCollection:
+    """Enough of a collection for ``keyset_page``: equality filters and ``_id`` > cursor."""
+
+    def __init__(self, docs: list):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        def matches(doc):
+            for field, condition in query.items():
+                if isinstance(condition, dict):
+                    if not doc[field] > condition["$gt"]:
+                        return False
+                elif doc.get(field) != condition:
+                    return False
+            return True
+        return MemoryCursor([doc for doc in self.docs if matches(doc)])
+
+
+def collection(count: int) -> MemoryCollection:
+    return MemoryCollection([{"_id": ObjectId(), "status": "active" if i % 2 else "error"} for i in range(count)])
+
+
+async def test_cursor_walks_every_document_once():
+    labels = collection(7)
+    seen, after = [], None
+    while True:
+        response = Response()
+        page = await keyset_page(labels, response, after=after, limit=3)
+        seen.extend(doc["id"] for doc in page)
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            break
+        assert after == page[-1]["id"]
+    assert seen == [str(doc["_id"]) for doc in labels.docs]
+
+
+async def test_no_cursor_after_a_short_page_or_without_a_limit():
+    labels = collection(6)
+    response = Response()
+    assert len(await keyset_page(labels, response, limit=6)) == 6
+    # A full last page still gets a cursor; the next page is empty and has none
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    response = Response()
+    assert await keyset_page(labels, response, after=cursor, limit=6) == []
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    response = Response()
+    assert len(await keyset_page(labels, response, filters={"status": "active"})) == 3
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+async def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as rejected:
+        await keyset_page(collection(1), Response(), after="not-an-id", limit=10)
+    assert rejected.value.status_code == 400
+
+
+def test_range_filter_keeps_only_the_bounds_sent():
+    assert range_filter("syncedAt") == {}
+    assert range_filter("syncedAt", since=1) == {"syncedAt": {"$gte": 1}}
+    assert range_filter("syncedAt", 1, 2) == {"syncedAt": {"$gte": 1, "$lt": 2}}
@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from utils.auth import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_successes_failures_and_refusals_are_counted_apart():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    try:
+        hashed = await hasher.hash("s3cret")
+        assert await hasher.verify("s3cret", hashed) is True
+        assert await hasher.verify("wrong", hashed) is False
+        with pytest.raises(ValueError):
+            await hasher.verify("s3cret", "not-a-bcrypt-hash")
+
+        slow = asyncio.ensure_future(hasher.hash("other"))
+        await asyncio.sleep(0)  # let it take the only slot
+        with pytest.raises(HTTPException) as refused:
+            await hasher.verify("s3cret", hashed)
+        assert refused.value.status_code == 503
+        await slow
+
+        stats = hasher.stats()
+        assert (stats["completed"], stats["failed"], stats["rejected"], stats["pending"]) == (4, 1, 1, 0)
+    finally:
+        hasher.shutdown()
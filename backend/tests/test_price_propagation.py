@@ -0,0 +1,68 @@
+import json
+import pytest
+from services.events import event_bus
+from services.price_propagation import price_propagator
+
+pytestmark = pytest.mark.anyio
+
+PRODUCT = {"name": "Premium Coffee Beans", "barcode": "1234567890123", "mrp": 15.99, "discount": 2.0, "sellingPrice": 13.99, "category": "Beverages"}
+
+
+def published(after_seq: int, type: str = "esl") -> list:
+    events = [event for event in event_bus.history if event.seq > after_seq and event.type == type]
+    return [json.loads(event.frame.split("data: ", 1)[1]) for event in events]
+
+
+def esl_events(after_seq: int) -> list:
+    return published(after_seq)
+
+
+async def test_product_price_change_publishes_label_update(api):
+    store = (await api.post("/stores/", json={"name": "Store #001", "location": "Downtown", "manager": "John Smith"})).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+    label = (await api.post("/esls/", json={
+        "labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active",
+        "storeId": store["id"], "productId": product["id"],
+    })).json()
+    seq = event_bus.seq
+
+    response = await api.put(f"/products/{product['id']}", json=dict(PRODUCT, sellingPrice=11.49))
+    assert response.status_code == 200
+    await price_propagator.flush()
+
+    updates = [event for event in esl_events(seq) if event["id"] == label["id"]]
+    assert [event["op"] for event in updates] == ["updated"]
+    assert updates[0]["data"]["sellingPrice"] == 11.49
+    assert updates[0]["data"]["changeVersion"] > label["changeVersion"]
+
+
+async def test_unchanged_price_publishes_nothing(api):
+    store = (await api.post("/stores/", json={"name": "Store #001", "location": "Downtown", "manager": "John Smith"})).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+    await api.post("/esls/", json={
+        "labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active",
+        "storeId": store["id"], "productId": product["id"], "mrp": 15.99, "discount": 2.0, "sellingPrice": 13.99,
+    })
+    await price_propagator.flush()
+    seq = event_bus.seq
+
+    await api.put(f"/products/{product['id']}", json=dict(PRODUCT, category="Coffee"))
+    await price_propagator.flush()
+
+    assert esl_events(seq) == []
+
+
+async def test_propagation_sync_logs_reach_the_change_hooks(api):
+    store = (await api.post("/stores/", json={"name": "Store #001", "location": "Downtown", "manager": "John Smith"})).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+    label = (await api.post("/esls/", json={
+        "labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active",
+        "storeId": store["id"], "productId": product["id"],
+    })).json()
+    seq = event_bus.seq
+
+    await api.put(f"/products/{product['id']}", json=dict(PRODUCT, sellingPrice=11.49))
+    await price_propagator.flush()
+
+    logs = published(seq, "syncLog")
+    assert [(event["op"], event["data"]["eslId"], event["data"]["status"]) for event in logs] == [("created", label["id"], "pending")]
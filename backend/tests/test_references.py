@@ -0,0 +1,102 @@
+import json
+import pytest
+from bson import ObjectId
+from services.events import event_bus
+from services.references import ReferenceResolver
+
+pytestmark = pytest.mark.anyio
+
+STORE = {"name": "Store #001", "location": "Downtown", "manager": "John Smith"}
+PRODUCT = {"name": "Premium Coffee Beans", "barcode": "1234567890123", "mrp": 15.99, "discount": 2.0, "sellingPrice": 13.99, "category": "Beverages"}
+LABEL = {"labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active"}
+
+
+def published(after_seq: int) -> list:
+    events = [event for event in event_bus.history if event.seq > after_seq and event.type == "esl"]
+    return [json.loads(event.frame.split("data: ", 1)[1]) for event in events]
+
+
+async def test_new_label_shows_its_product_price(api):
+    store = (await api.post("/stores/", json=STORE)).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+
+    label = (await api.post("/esls/", json=dict(LABEL, storeId=store["id"], productName=PRODUCT["name"]))).json()
+
+    assert (label["mrp"], label["discount"], label["sellingPrice"]) == (15.99, 2.0, 13.99)
+    assert label["productId"] == product["id"]
+
+
+async def test_renames_reach_labels_and_old_names_stop_resolving(api):
+    store = (await api.post("/stores/", json=STORE)).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+    label = (await api.post("/esls/", json=dict(LABEL, storeName=STORE["name"], productId=product["id"]))).json()
+
+    await api.put(f"/products/{product['id']}", json=dict(PRODUCT, name="House Blend"))
+    await api.put(f"/stores/{store['id']}", json={"name": "Store #002"})
+
+    renamed = (await api.get(f"/esls/{label['id']}")).json()
+    assert (renamed["productName"], renamed["storeName"]) == ("House Blend", "Store #002")
+    response = await api.post("/esls/", json=dict(LABEL, storeName=STORE["name"], productId=product["id"]))
+    assert response.status_code == 400
+
+
+async def test_store_rename_reaches_the_esl_change_hooks(api):
+    store = (await api.post("/stores/", json=STORE)).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+    label = (await api.post("/esls/", json=dict(LABEL, storeId=store["id"], productId=product["id"]))).json()
+    seq = event_bus.seq
+
+    await api.put(f"/stores/{store['id']}", json={"name": "Store #002"})
+
+    updates = [event for event in published(seq) if event["id"] == label["id"]]
+    assert [(event["op"], event["data"]["storeName"]) for event in updates] == [("updated", "Store #002")]
+
+
+async def test_bulk_product_rename_and_delete_update_the_resolver(api):
+    store = (await api.post("/stores/", json=STORE)).json()
+    product = (await api.post("/products/", json=PRODUCT)).json()
+    label = (await api.post("/esls/", json=dict(LABEL, storeId=store["id"], productName=PRODUCT["name"]))).json()
+
+    await api.patch("/products/bulk", json=[{"id": product["id"], "name": "House Blend"}])
+    assert (await api.get(f"/esls/{label['id']}")).json()["productName"] == "House Blend"
+    response = await api.post("/esls/", json=dict(LABEL, storeId=store["id"], productName=PRODUCT["name"]))
+    assert response.status_code == 400
+
+    await api.request("DELETE", "/products/bulk", json=[product["id"]])
+    response = await api.post("/esls/", json=dict(LABEL, storeId=store["id"], productName="House Blend"))
+    assert response.status_code == 400
+
+
+async def test_ambiguous_names_are_refused(api):
+    await api.post("/stores/", json=STORE)
+    await api.post("/stores/", json=STORE)
+    product = (await api.post("/products/", json=PRODUCT)).json()
+
+    response = await api.post("/esls/", json=dict(LABEL, storeName=STORE["name"], productId=product["id"]))
+    assert response.status_code == 400 and "ambiguous" in response.json()["detail"]
+    response = await api.get("/esls/", params={"storeName": STORE["name"]})
+    assert response.status_code == 409
+
+
+class ForgettingCollection:
+    """Returns one store, and forgets it on the resolver mid-read like a concurrent rename would."""
+
+    def __init__(self, doc: dict):
+        self.doc = doc
+        self.resolver = None
+
+    def find(self, query, projection=None):
+        return self._iterate()
+
+    async def _iterate(self):
+        self.resolver.forget(ids=[self.doc["_id"]])
+        yield self.doc
+
+
+async def test_lookup_racing_a_rename_is_not_cached():
+    collection = ForgettingCollection({"_id": ObjectId(), "name": "Store #001"})
+    resolver = collection.resolver = ReferenceResolver(collection, "Store", referenced_by=[], maxsize=10, ttl=60)
+
+    assert await resolver.ids_for(["Store #001"]) == {"Store #001": collection.doc["_id"]}
+    assert await resolver.names_for([collection.doc["_id"]]) == {collection.doc["_id"]: "Store #001"}
+    assert len(resolver.cache) == 0
@@ -0,0 +1,42 @@
+import pytest
+from models.sync_rollup import sync_rollup_collection
+from rebuild_sync_rollups import rebuild_sync_rollups
+
+pytestmark = pytest.mark.anyio
+
+LOG = {
+    "eslId": "ESL-001", "productName": "Premium Coffee Beans", "gatewayId": "GW-001", "storeName": "Store #001",
+    "status": "success", "syncedAt": "2024-01-15 10:30:00", "errorMessage": None, "duration": "1.2s",
+}
+
+
+def counters(doc: dict) -> dict:
+    """Non-zero counters of a rollup; retracted ones stay behind as zeros, which a rebuild never writes."""
+    flat = {}
+    for key, value in doc.items():
+        for field, count in (value.items() if isinstance(value, dict) else [("", value)]):
+            if isinstance(count, (int, float)) and count:
+                flat[f"{key}.{field}".rstrip(".")] = count
+    return flat
+
+
+async def rollups() -> dict:
+    return {doc["hour"]: counters(doc) async for doc in sync_rollup_collection.find({}, {"_id": 0})}
+
+
+async def test_rollups_match_a_rebuild_after_edits_and_deletes(api):
+    await api.post("/sync-logs/", json=LOG)
+    edited = (await api.post("/sync-logs/", json=dict(LOG, eslId="ESL-002", duration="350ms"))).json()
+    deleted = (await api.post("/sync-logs/", json=dict(LOG, eslId="ESL-003", status="failed", duration="4s"))).json()
+
+    response = await api.put(f"/sync-logs/{edited['id']}", json=dict(LOG, eslId="ESL-002", status="failed", duration="2.5s"))
+    assert response.status_code == 200
+    assert (await api.delete(f"/sync-logs/{deleted['id']}")).status_code == 200
+    live = await rollups()
+
+    await rebuild_sync_rollups()
+    rebuilt = await rollups()
+    assert live.keys() == rebuilt.keys()
+    for hour, counts in live.items():
+        assert counts == pytest.approx(rebuilt[hour])
+    assert [counts["total"] for counts in live.values()] == [2]
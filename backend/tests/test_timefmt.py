@@ -0,0 +1,63 @@
+from datetime import datetime
+import pytest
+from utils.timefmt import DURATION, RELATIVE, TIMESTAMP, UPTIME, TimeFields, format_uptime, parse_duration
+
+pytestmark = pytest.mark.anyio
+
+STORED = {
+    TIMESTAMP: [datetime(2024, 1, 15, 10, 30), datetime(2024, 1, 15, 10, 30, 5, 123000), datetime(2024, 2, 29, 23, 59, 59, 999999)],
+    RELATIVE: [datetime(2024, 1, 15, 10, 30), datetime(2024, 1, 15, 10, 30, 5, 123000)],
+    DURATION: [0.0, 0.35, 350 * 0.001, 1.2, 30.0, 59.99, 125.0, 125.1, 3600.0],
+    UPTIME: [0.0, 59.0, 3600.0, 5 * 86400 + 3 * 3600, 90061.0, 90061.25, 3725.3, 7775999.123456],
+}
+
+
+@pytest.mark.parametrize("kind, value", [(kind, value) for kind, values in STORED.items() for value in values])
+def test_formatted_values_parse_back_to_the_stored_value(kind, value):
+    fields = TimeFields(field=kind)
+    sent = fields.decode({"field": value})
+    assert isinstance(sent["field"], str)
+    assert fields.encode({"field": sent["field"]})["field"] == value
+
+
+def test_relative_fields_carry_a_display_form():
+    sent = TimeFields(lastSync=RELATIVE).decode({"lastSync": datetime(2024, 1, 15, 10, 30)})
+    assert sent["lastSync"] == "2024-01-15 10:30:00"
+    assert sent["lastSyncDisplay"].endswith(" ago")
+
+
+def test_uptime_keeps_hours_and_minutes():
+    assert format_uptime(3600) == "0d 1h 0m"
+    assert format_uptime(parse_duration("5d 3h")) == "5d 3h 0m"
+    assert format_uptime(90) == "0d 0h 1m 30s"
+
+
+GATEWAY = {
+    "ipAddress": "192.168.1.10", "firmwareVersion": "v2.1.0", "lastHeartbeat": "2024-01-15 10:30:05.250000",
+    "status": "active", "syncCount": 0, "errorCount": 0, "uptime": "5d 3h",
+}
+
+
+def time_fields(doc: dict) -> dict:
+    return {key: doc[key] for key in ("lastSync", "lastHeartbeat", "uptime") if key in doc}
+
+
+async def test_get_then_put_leaves_time_fields_unchanged(api):
+    store = (await api.post("/stores/", json={"name": "Store #001", "location": "Downtown", "manager": "John Smith"})).json()
+    product = (await api.post("/products/", json={
+        "name": "Premium Coffee Beans", "barcode": "1234567890123", "mrp": 15.99, "discount": 2.0, "sellingPrice": 13.99,
+        "category": "Beverages",
+    })).json()
+    label = (await api.post("/esls/", json={
+        "labelSize": "2.9 inch", "batteryLevel": 85, "signalStrength": 92, "status": "active",
+        "storeId": store["id"], "productId": product["id"], "lastSync": "3 days ago",
+    })).json()
+    gateway = (await api.post("/gateways/", json=dict(GATEWAY, storeId=store["id"]))).json()
+
+    for path, created in ((f"/esls/{label['id']}", label), (f"/gateways/{gateway['id']}", gateway)):
+        before = (await api.get(path)).json()
+        assert (await api.put(path, json=before)).status_code == 200
+        after = (await api.get(path)).json()
+        assert time_fields(after) == time_fields(before)
+    assert gateway["uptime"] == "5d 3h 0m"
+    assert label["lastSyncDisplay"] == "3 days ago"
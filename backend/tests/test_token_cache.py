@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+from utils import auth
+from utils.auth import create_access_token, token_cache, verify_token
+
+
+def test_verified_tokens_are_decoded_once(monkeypatch):
+    token_cache.clear()
+    decodes = []
+    decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or decode(*args, **kwargs))
+    token = create_access_token({"sub": "user-1"})
+
+    first = verify_token(token)
+    first["sub"] = "changed by the caller"
+    assert verify_token(token)["sub"] == "user-1"
+    assert len(decodes) == 1
+
+
+def test_cached_payload_expires_with_the_token():
+    token_cache.clear()
+    token = create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=30))
+    assert verify_token(token)["sub"] == "user-1"
+    key = next(iter(token_cache._entries))
+    expires_at = token_cache._entries[key][1]
+    assert abs(expires_at - (time.time() + 30)) < 5
+
+
+def test_invalid_and_expired_tokens_are_rejected_and_not_cached():
+    token_cache.clear()
+    assert verify_token("not.a.token") is None
+    assert verify_token(create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=-1))) is None
+    assert len(token_cache) == 0
@@ -0,0 +1,76 @@
+import pytest
+from bson import ObjectId
+from fastapi.security import HTTPAuthorizationCredentials
+from models.user import user_cache
+from routes import auth
+from utils.auth import create_access_token
+from utils.cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted():
+    clock = Clock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # "b" was used least recently
+    assert (cache.get("b"), cache.get("a"), cache.get("c")) == (None, 1, 3)
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_a_value_loaded_across_a_pop_is_not_cached():
+    cache = TTLCache(maxsize=10, ttl=10)
+    generation = cache.generation()
+    cache.pop("user")  # an update lands while the reader is loading
+    cache.set("user", "old copy", generation=generation)
+    assert cache.get("user") is None
+    assert cache.stats()["staleSets"] == 1
+    cache.set("user", "new copy", generation=cache.generation())
+    assert cache.get("user") == "new copy"
+
+
+class UserCollection:
+    """Serves one user; ``on_read`` runs in the middle of a read, like a concurrent write would."""
+
+    def __init__(self, user: dict):
+        self.user = user
+        self.reads = 0
+        self.on_read = None
+
+    async def find_one(self, query):
+        self.reads += 1
+        found = dict(self.user)
+        if self.on_read:
+            self.on_read()
+        return found
+
+
+async def test_current_user_is_read_once_and_stale_reads_are_not_cached(monkeypatch):
+    user_id = ObjectId()
+    users = UserCollection({"_id": user_id, "email": "a@example.com", "is_active": True})
+    monkeypatch.setattr(auth, "user_collection", users)
+    user_cache.clear()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": str(user_id)}))
+
+    users.on_read = lambda: user_cache.pop(str(user_id))
+    await auth.get_current_user(credentials)
+    await auth.get_current_user(credentials)
+    assert users.reads == 2  # the first copy raced an update and stayed out of the cache
+
+    users.on_read = None
+    await auth.get_current_user(credentials)
+    await auth.get_current_user(credentials)
+    assert users.reads == 3
+    user_cache.clear()
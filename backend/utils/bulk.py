@@ -0,0 +1,268 @@
+import json
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterator, Optional, Type
+from bson import ObjectId
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from database.versions import ChangeVersions, allocate, needs_version
+
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_ITEMS = 100_000
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+SUCCESS_STATUSES = {"created", "updated", "deleted"}
+
+# Receives (before, after) document pairs for the writes that succeeded; before is
+# None for creates and after is None for deletes
+ChangeHook = Callable[[list], Awaitable[None]]
+
+# Completes a chunk of validated documents in place (e.g. resolving references)
+# and returns an error message or None for each
+ResolveHook = Callable[[list], Awaitable[list]]
+
+
+async def read_bulk_items(request: Request) -> list:
+    """Read a bulk request body sent either as a JSON array or as NDJSON (one item per line)."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPES):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body or b"[]")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed bulk payload: {e}")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Bulk payload must be a JSON array or NDJSON")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Bulk payload exceeds {MAX_BULK_ITEMS} items")
+    return items
+
+
+@lru_cache
+def partial_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """Same fields as ``model``, all optional, for partial bulk updates."""
+    fields = {name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    return create_model(f"{model.__name__}Patch", **fields)
+
+
+@lru_cache
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def validate_items(items: list, model: Type[BaseModel]) -> tuple[list, list]:
+    """Validate ``items`` against ``model``; returns the valid documents and ``{index, error}`` for the rest.
+
+    The whole list is validated in one call first; only a batch containing an
+    invalid item falls back to validating item by item.
+    """
+    try:
+        return [obj.model_dump() for obj in _list_adapter(model).validate_python(items)], []
+    except ValidationError:
+        pass
+    docs, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            docs.append(model.model_validate(item).model_dump())
+        except ValidationError as e:
+            errors.append({"index": index, "error": _validation_message(e)})
+    return docs, errors
+
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE) -> Iterator[tuple[int, list]]:
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+def _item_id(item) -> Optional[str]:
+    raw = item.get("id") if isinstance(item, dict) else item
+    return raw if isinstance(raw, str) and ObjectId.is_valid(raw) else None
+
+
+async def _write(collection, ops: list, op_results: list, status: str) -> None:
+    """Send one unordered bulk_write and mark each op's result with its outcome."""
+    if not ops:
+        return
+    for result in op_results:
+        result["status"] = status
+    try:
+        await collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            result = op_results[error["index"]]
+            result["status"] = "error"
+            result["error"] = error.get("errmsg")
+
+
+async def _existing(collection, ids: list, full: bool) -> dict:
+    """Map each id that exists to its document (only ``_id`` unless ``full``)."""
+    projection = None if full else {"_id": 1}
+    return {doc["_id"]: doc async for doc in collection.find({"_id": {"$in": ids}}, projection)}
+
+
+async def _resolve(resolve: Optional[ResolveHook], pending: list) -> list:
+    """Run ``resolve`` over the documents of ``(doc, result)`` pairs and drop the ones it rejects."""
+    if not resolve or not pending:
+        return pending
+    errors = await resolve([doc for doc, _ in pending])
+    kept = []
+    for (doc, result), error in zip(pending, errors):
+        if error:
+            result["error"] = error
+        else:
+            kept.append((doc, result))
+    return kept
+
+
+async def _notify(on_change: Optional[ChangeHook], op_results: list, changes: list) -> None:
+    if on_change:
+        succeeded = [change for result, change in zip(op_results, changes) if result["status"] in SUCCESS_STATUSES]
+        if succeeded:
+            await on_change(succeeded)
+
+
+def _summary(results: list) -> dict:
+    succeeded = sum(1 for r in results if r["status"] in SUCCESS_STATUSES)
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+async def bulk_create(
+    collection,
+    items: list,
+    model: Type[BaseModel],
+    encoder: Optional[Callable[[dict], dict]] = None,
+    on_change: Optional[ChangeHook] = None,
+    resolve: Optional[ResolveHook] = None,
+    versions: Optional[ChangeVersions] = None,
+) -> dict:
+    results = []
+    for start, chunk in _chunks(items):
+        pending = []
+        for offset, item in enumerate(chunk):
+            result = {"index": start + offset, "id": None, "status": "invalid", "error": None}
+            results.append(result)
+            try:
+                pending.append((model.model_validate(item).model_dump(), result))
+            except ValidationError as e:
+                result["error"] = _validation_message(e)
+
+        pending = await _resolve(resolve, pending)
+        ops, op_results, changes = [], [], []
+        async with allocate(versions, len(pending)) as stamps:
+            for doc, result in pending:
+                if encoder:
+                    doc = encoder(doc)
+                # Assign the id up front so the response needs no read-back
+                doc["_id"] = ObjectId()
+                if stamps:
+                    doc["changeVersion"] = next(stamps)
+                result["id"] = str(doc["_id"])
+                ops.append(InsertOne(doc))
+                op_results.append(result)
+                changes.append((None, doc))
+            await _write(collection, ops, op_results, "created")
+        await _notify(on_change, op_results, changes)
+    return _summary(results)
+
+
+async def bulk_update(
+    collection,
+    items: list,
+    model: Type[BaseModel],
+    encoder: Optional[Callable[[dict], dict]] = None,
+    on_change: Optional[ChangeHook] = None,
+    resolve: Optional[ResolveHook] = None,
+    versions: Optional[ChangeVersions] = None,
+    versioned_fields: Optional[tuple] = None,
+) -> dict:
+    """Apply partial updates; with ``versions`` set, documents whose ``versioned_fields``
+    change (any field when None) are stamped with a new ``changeVersion``."""
+    patch_model = partial_model(model)
+    results = []
+    for start, chunk in _chunks(items):
+        pending = []
+        for offset, item in enumerate(chunk):
+            result = {"index": start + offset, "id": None, "status": "invalid", "error": None}
+            results.append(result)
+            item_id = _item_id(item)
+            if item_id is None:
+                result["error"] = "Missing or invalid id"
+                continue
+            result["id"] = item_id
+            fields = {k: v for k, v in item.items() if k != "id"}
+            try:
+                update = patch_model.model_validate(fields).model_dump(exclude_unset=True)
+            except ValidationError as e:
+                result["error"] = _validation_message(e)
+                continue
+            if not update:
+                result["error"] = "No fields to update"
+                continue
+            pending.append((update, result))
+
+        pending = await _resolve(resolve, pending)
+        full = on_change is not None
+        existing = await _existing(collection, [ObjectId(result["id"]) for _, result in pending], full)
+        writes = []
+        for update, result in pending:
+            oid = ObjectId(result["id"])
+            if oid not in existing:
+                result["status"] = "not_found"
+                continue
+            if encoder:
+                update = encoder(update)
+            # Without the full documents, any versioned field counts as changed
+            writes.append((oid, update, result, needs_version(update, versioned_fields, existing[oid] if full else None)))
+        ops, op_results, changes = [], [], []
+        async with allocate(versions, sum(stamp for *_, stamp in writes)) as stamps:
+            for oid, update, result, stamp in writes:
+                if stamps and stamp:
+                    update["changeVersion"] = next(stamps)
+                ops.append(UpdateOne({"_id": oid}, {"$set": update}))
+                op_results.append(result)
+                changes.append((existing[oid], dict(existing[oid], **update)))
+            await _write(collection, ops, op_results, "updated")
+        await _notify(on_change, op_results, changes)
+    return _summary(results)
+
+
+async def bulk_delete(collection, items: list, on_change: Optional[ChangeHook] = None) -> dict:
+    results = []
+    for start, chunk in _chunks(items):
+        pending = []
+        for offset, item in enumerate(chunk):
+            result = {"index": start + offset, "id": None, "status": "invalid", "error": None}
+            results.append(result)
+            item_id = _item_id(item)
+            if item_id is None:
+                result["error"] = "Missing or invalid id"
+                continue
+            result["id"] = item_id
+            pending.append((ObjectId(item_id), result))
+
+        existing = await _existing(collection, [oid for oid, _ in pending], on_change is not None)
+        ops, op_results, changes = [], [], []
+        for oid, result in pending:
+            if oid not in existing:
+                result["status"] = "not_found"
+                continue
+            ops.append(DeleteOne({"_id": oid}))
+            op_results.append(result)
+            changes.append((existing[oid], None))
+        await _write(collection, ops, op_results, "deleted")
+        await _notify(on_change, op_results, changes)
+    return _summary(results)
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+from utils.pagination import serialize_doc
+
+EXPORT_BATCH_SIZE = 1000
+CSV_ROWS_PER_CHUNK = 500
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def id_range_filter(since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict:
+    """Filter on the creation time embedded in ``_id`` so the range is served by the ``_id`` index."""
+    id_range = {}
+    if since is not None:
+        id_range["$gte"] = ObjectId.from_datetime(since)
+    if until is not None:
+        id_range["$lt"] = ObjectId.from_datetime(until)
+    return {"_id": id_range} if id_range else {}
+
+
+def export_cursor(collection, query: dict, projection: Optional[dict] = None, sort: Optional[list] = None):
+    """A batched cursor over ``query``, in ``sort`` order or in natural order without one.
+
+    Only pass a ``sort`` that the index chosen for ``query`` already provides:
+    anything else makes MongoDB sort the whole result in memory before the
+    first document is sent, which fails past its sort memory limit.
+    """
+    cursor = collection.find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    return cursor.batch_size(EXPORT_BATCH_SIZE)
+
+
+async def iter_ndjson(docs: AsyncIterable[dict], formatter: Callable[[dict], dict] = serialize_doc) -> AsyncIterator[bytes]:
+    async for doc in docs:
+        yield (json.dumps(formatter(doc), default=_json_default) + "\n").encode()
+
+
+async def iter_csv(docs: AsyncIterable[dict], fields: list[str], formatter: Callable[[dict], dict] = serialize_doc) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for doc in docs:
+        writer.writerow(formatter(doc))
+        rows += 1
+        if rows % CSV_ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue().encode()
+
+
+async def iter_gzip(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    docs: AsyncIterable[dict],
+    fmt: str,
+    fields: list[str],
+    filename: str,
+    gzip: bool = False,
+    formatter: Callable[[dict], dict] = serialize_doc,
+) -> StreamingResponse:
+    """Stream ``docs`` as NDJSON or CSV without materialising the result set."""
+    if fmt == "csv":
+        chunks = iter_csv(docs, fields, formatter)
+    else:
+        chunks = iter_ndjson(docs, formatter)
+
+    filename = f"{filename}.{fmt}"
+    media_type = MEDIA_TYPES[fmt]
+    if gzip:
+        chunks = iter_gzip(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
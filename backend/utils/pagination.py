@@ -0,0 +1,80 @@
+from typing import Callable, Optional
+from bson import ObjectId
+from fastapi import HTTPException, Response
+
+MAX_PAGE_SIZE = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def serialize_doc(doc: dict) -> dict:
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def serialize_refs(doc: dict, *fields: str) -> dict:
+    """Render ObjectId reference fields as strings, like ``id``."""
+    for field in fields:
+        if isinstance(doc.get(field), ObjectId):
+            doc[field] = str(doc[field])
+    return doc
+
+
+def lookup_one(collection_name: str, local_field: str, as_field: str) -> list:
+    """Aggregation stages that embed the referenced document as ``as_field`` (left out when it is missing)."""
+    return [
+        {"$lookup": {"from": collection_name, "localField": local_field, "foreignField": "_id", "as": as_field}},
+        {"$set": {as_field: {"$arrayElemAt": [f"${as_field}", 0]}}},
+    ]
+
+
+def build_filters(**fields) -> dict:
+    """Build an equality filter from the query parameters that were actually sent."""
+    return {name: value for name, value in fields.items() if value is not None}
+
+
+def range_filter(field: str, since=None, until=None) -> dict:
+    """``{field: {"$gte": since, "$lt": until}}`` with only the bounds that were sent."""
+    bounds = build_filters(**{"$gte": since, "$lt": until})
+    return {field: bounds} if bounds else {}
+
+
+async def keyset_page(
+    collection,
+    response: Response,
+    filters: Optional[dict] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    formatter: Callable[[dict], dict] = serialize_doc,
+    projection: Optional[dict] = None,
+    pipeline: Optional[list] = None,
+) -> list:
+    """Return one page of documents ordered by ``_id``, starting after the ``after`` cursor.
+
+    The id of the last document is sent back in the ``X-Next-Cursor`` header when
+    more documents may follow, so clients page with ``?after=<cursor>``. Without
+    a ``limit`` every matching document is returned, as before paging existed.
+    Extra aggregation stages in ``pipeline`` (such as ``$lookup``) run on the page only.
+    """
+    query = dict(filters or {})
+    if after:
+        if not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        query["_id"] = {"$gt": ObjectId(after)}
+
+    if pipeline:
+        stages = [{"$match": query}, {"$sort": {"_id": 1}}] + ([{"$limit": limit}] if limit else [])
+        if projection:
+            stages.append({"$project": projection})
+        cursor = collection.aggregate(stages + pipeline)
+    else:
+        cursor = collection.find(query, projection).sort("_id", 1).limit(limit or 0)
+    page = []
+    last_id = None
+    async for doc in cursor:
+        last_id = doc["_id"]
+        page.append(formatter(doc))
+
+    if limit and last_id is not None and len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(last_id)
+    return page
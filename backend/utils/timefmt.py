@@ -0,0 +1,150 @@
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_DURATION_UNITS = {
+    "ms": 0.001,
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]*)")
+_JUST_NOW = ("just now", "now")
+
+
+def parse_timestamp(value, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Parse an ISO 8601, ``TIMESTAMP_FORMAT`` or relative (``"2 min ago"``) string into a naive UTC datetime."""
+    if value is None or isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.strptime(text, TIMESTAMP_FORMAT)
+    except ValueError:
+        pass
+    lowered = text.lower()
+    if lowered in _JUST_NOW or lowered.endswith(" ago"):
+        seconds = 0 if lowered in _JUST_NOW else parse_duration(lowered[:-4])
+        if seconds is None:
+            return None
+        return (now or datetime.utcnow()) - timedelta(seconds=seconds)
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+
+def parse_duration(value) -> Optional[float]:
+    """Seconds in a duration such as ``"1.2s"``, ``"350ms"``, ``"2 min"`` or ``"1d 4h"``; plain numbers are seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().lower()
+    parts = _DURATION_PART.findall(text)
+    if not parts or _DURATION_PART.sub("", text).strip(" ,"):
+        return None
+    total = 0.0
+    for number, unit in parts:
+        factor = _DURATION_UNITS.get(unit or "s")
+        if factor is None:
+            return None
+        total += float(number) * factor
+    return total
+
+
+def format_timestamp(value: datetime) -> str:
+    """``TIMESTAMP_FORMAT``, with the fraction of a second when there is one so it parses back exactly."""
+    return value.isoformat(sep=" ")
+
+
+def format_relative(value: datetime, now: Optional[datetime] = None) -> str:
+    """``"Just now"``, ``"30 sec ago"``, ``"2 min ago"``, ``"1 hour ago"``, ``"3 days ago"``."""
+    seconds = int(((now or datetime.utcnow()) - value).total_seconds())
+    if seconds < 10:
+        return "Just now"
+    if seconds < 60:
+        return f"{seconds} sec ago"
+    if seconds < 3600:
+        return f"{seconds // 60} min ago"
+    if seconds < 86400:
+        hours = seconds // 3600
+        return f"{hours} hour{'s' if hours != 1 else ''} ago"
+    days = seconds // 86400
+    return f"{days} day{'s' if days != 1 else ''} ago"
+
+
+def _seconds(value: float) -> str:
+    # repr is the shortest string that parses back to the same float
+    return repr(float(value)).removesuffix(".0") + "s"
+
+
+def format_duration(value: float) -> str:
+    """``"0.35s"``, ``"1.2s"``, ``"30s"``, ``"2m 5s"``; whole minutes only when nothing is lost."""
+    if value >= 60 and value == int(value):
+        minutes, seconds = divmod(int(value), 60)
+        return f"{minutes}m {seconds}s"
+    return _seconds(value)
+
+
+def format_uptime(value: float) -> str:
+    """``"5d 3h 0m"``, with the leftover seconds when there are any (``"0d 0h 1m 30s"``)."""
+    minutes = int(value // 60)
+    days, rest = divmod(minutes, 1440)
+    text = f"{days}d {rest // 60}h {rest % 60}m"
+    seconds = value - minutes * 60
+    return f"{text} {_seconds(seconds)}" if seconds else text
+
+
+# How each kind of typed field is parsed from and shown as a string
+TIMESTAMP, RELATIVE, DURATION, UPTIME = "timestamp", "relative", "duration", "uptime"
+
+_PARSERS: dict[str, Callable] = {
+    TIMESTAMP: parse_timestamp,
+    RELATIVE: parse_timestamp,
+    DURATION: parse_duration,
+    UPTIME: parse_duration,
+}
+_FORMATTERS: dict[str, Callable] = {
+    TIMESTAMP: format_timestamp,
+    RELATIVE: format_timestamp,
+    DURATION: format_duration,
+    UPTIME: format_uptime,
+}
+
+
+class TimeFields:
+    """Converts a model's time fields between stored values and display strings.
+
+    Documents store datetimes and durations in seconds so they can be indexed and
+    range-filtered; the API keeps sending and receiving the display strings.
+    Strings that cannot be parsed are stored unchanged rather than dropped.
+
+    Every string sent out parses back to the stored value, so a GET then PUT
+    leaves the document as it was. ``RELATIVE`` fields go out as timestamps,
+    with the relative form (``"3 days ago"``) in a read-only ``<field>Display``.
+    """
+
+    def __init__(self, **kinds: str):
+        self.kinds = kinds
+
+    def encode(self, doc: dict) -> dict:
+        for field, kind in self.kinds.items():
+            value = doc.get(field)
+            if isinstance(value, str):
+                parsed = _PARSERS[kind](value)
+                if parsed is not None:
+                    doc[field] = parsed
+        return doc
+
+    def decode(self, doc: dict) -> dict:
+        for field, kind in self.kinds.items():
+            value = doc.get(field)
+            if value is not None and not isinstance(value, str):
+                doc[field] = _FORMATTERS[kind](value)
+                if kind == RELATIVE:
+                    doc[f"{field}Display"] = format_relative(value)
+        return doc